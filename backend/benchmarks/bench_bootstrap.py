@@ -0,0 +1,137 @@
+"""Dashboard page load: separate requests versus ``/api/dashboard/bootstrap``.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_bootstrap --size 100000 --rtt-ms 0,40
+
+Starts a uvicorn server over TCP on the generated dataset (see
+``generate_data``), once with the analytics snapshot and once answering from
+SQL. A page load is either the three requests the dashboard used to make in
+turn (stats, categories, first history page) or one bootstrap request. Each
+``--rtt-ms`` value adds that much simulated network round trip per request on
+the client. p50/p99 page-load latency per mode is merged into
+``benchmarks/results/bootstrap.json``.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from .bench_dashboard import DATA_DIR
+from .bench_workers import free_port, stop, wait_until_ready
+from .common import RESULTS_DIR, environment_info, percentile, write_results
+from .generate_data import ensure_dataset
+
+DAYS_BACK = 30
+PAGE_SIZE = 100
+SEPARATE = [
+    ("/api/dashboard/stats", {"days_back": DAYS_BACK}),
+    ("/api/dashboard/categories", {}),
+    ("/api/dashboard/feedback", {"limit": PAGE_SIZE}),
+]
+BOOTSTRAP = [("/api/dashboard/bootstrap", {"days_back": DAYS_BACK, "limit": PAGE_SIZE})]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=100000)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--rtt-ms", default="0,40", help="Comma-separated simulated round trips per request")
+    parser.add_argument("--modes", default="snapshot,sql", help="Comma-separated: snapshot, sql")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "bootstrap.json")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def serve(port: int):
+    import logging
+    import uvicorn
+    from src.main import app
+    from src.api.triage import llm_service
+    from .common import StubLLMClient
+
+    logging.disable(logging.WARNING)
+    llm_service.client = StubLLMClient(median_ms=0)
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def wait_for_snapshot(base_url: str, timeout: float = 300.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if httpx.get(f"{base_url}/ready", timeout=5.0).json().get("analytics_snapshot") == "loaded":
+            return
+        time.sleep(0.5)
+    raise RuntimeError("Analytics snapshot did not load")
+
+
+async def page_loads(base_url: str, requests: list, iterations: int, rtt_ms: float) -> dict:
+    import httpx
+
+    latencies = []
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        for i in range(iterations + 3):
+            start = time.perf_counter()
+            for path, params in requests:
+                await asyncio.sleep(rtt_ms / 1000)
+                (await client.get(path, params=params)).raise_for_status()
+            # The first loads warm connections and caches
+            if i >= 3:
+                latencies.append((time.perf_counter() - start) * 1000)
+    return {"p50_ms": round(percentile(latencies, 50), 2), "p99_ms": round(percentile(latencies, 99), 2)}
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args.serve)
+        return
+
+    database_url = f"sqlite+aiosqlite:///{DATA_DIR}/feedback_{args.size}.db"
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    async def prepare():
+        engine = await ensure_dataset(database_url, args.size)
+        await engine.dispose()
+
+    asyncio.run(prepare())
+    rtts = [float(value) for value in args.rtt_ms.split(",")]
+    result = {"rows": args.size, "iterations": args.iterations, "environment": environment_info()}
+    for mode in args.modes.split(","):
+        port = free_port()
+        env = {
+            **os.environ,
+            "DATABASE_URL": database_url,
+            "LLM_API_KEY": "bench-key",
+            "ANALYTICS_SNAPSHOT_ENABLED": str(mode == "snapshot").lower(),
+            "INCIDENT_CLUSTERING_ENABLED": "false",
+            "ADMISSION_CONTROL_ENABLED": "false",
+        }
+        server = subprocess.Popen(
+            [sys.executable, "-m", "benchmarks.bench_bootstrap", "--serve", str(port)],
+            env=env, cwd=Path(__file__).parent.parent
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            wait_until_ready(base_url)
+            if mode == "snapshot":
+                wait_for_snapshot(base_url)
+            result[mode] = {}
+            for rtt in rtts:
+                separate = asyncio.run(page_loads(base_url, SEPARATE, args.iterations, rtt))
+                bootstrap = asyncio.run(page_loads(base_url, BOOTSTRAP, args.iterations, rtt))
+                result[mode][f"rtt-{rtt:g}ms"] = {"separate": separate, "bootstrap": bootstrap}
+                print(f"{mode:8} rtt {rtt:5.0f} ms  separate p50 {separate['p50_ms']:8.2f} ms  "
+                      f"bootstrap p50 {bootstrap['p50_ms']:8.2f} ms  saved {separate['p50_ms'] - bootstrap['p50_ms']:7.2f} ms")
+        finally:
+            stop(server)
+
+    write_results(args.output, f"bootstrap-{args.size}", result)
+
+
+if __name__ == "__main__":
+    main()
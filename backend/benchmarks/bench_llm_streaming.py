@@ -0,0 +1,98 @@
+"""Classification latency with and without streaming early termination.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_llm_streaming --samples 200 --token-ms 20 --trailing-tokens 60
+
+Runs against the in-process stub, which spends ``--token-ms`` per output
+token and writes ``--trailing-tokens`` of explanation after the JSON, the way
+chatty models do. Reports p50/p99 latency per ``LLM_STREAMING`` setting,
+plus time to first token and time to verdict for the streamed run.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+from .bench_triage import SAMPLE_FEEDBACK
+from .common import RESULTS_DIR, StubLLMClient, environment_info, percentile, write_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="Median time before the first token")
+    parser.add_argument("--token-ms", type=float, default=20.0)
+    parser.add_argument("--trailing-tokens", type=int, default=60)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "llm_streaming.json")
+    return parser.parse_args()
+
+
+def histogram_mean_ms(histogram, *labels) -> float:
+    count = histogram.count(*labels)
+    series = histogram._series.get(labels)
+    return round(series[1] / count * 1000, 1) if count else 0.0
+
+
+async def run_mode(streaming: bool, args) -> dict:
+    from src.services import metrics
+    from src.services.llm_service import LLMService, TIER_PRIMARY
+
+    os.environ["LLM_STREAMING"] = str(streaming).lower()
+    service = LLMService()
+    service.client = StubLLMClient(median_ms=args.latency_ms, token_ms=args.token_ms,
+                                   trailing_tokens=args.trailing_tokens)
+    metrics.registry.clear()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def classify(i):
+        async with semaphore:
+            start = time.perf_counter()
+            await service.analyze_feedback(f"{SAMPLE_FEEDBACK[i % len(SAMPLE_FEEDBACK)]} (#{i})")
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(classify(i) for i in range(args.samples)))
+    result = {
+        "latency_ms": {"p50": round(percentile(latencies, 50), 1), "p99": round(percentile(latencies, 99), 1)},
+        "completion_tokens_per_request": round(
+            metrics.LLM_TIER_TOKENS.value(TIER_PRIMARY, "completion") / args.samples, 1
+        ),
+    }
+    if streaming:
+        result["mean_time_to_first_token_ms"] = histogram_mean_ms(metrics.LLM_TIME_TO_FIRST_TOKEN, TIER_PRIMARY)
+        result["mean_time_to_verdict_ms"] = histogram_mean_ms(metrics.LLM_TIME_TO_VERDICT, TIER_PRIMARY)
+    return result
+
+
+async def run(args) -> dict:
+    os.environ.setdefault("LLM_API_KEY", "bench-key")
+    result = {
+        "samples": args.samples,
+        "token_ms": args.token_ms,
+        "trailing_tokens": args.trailing_tokens,
+        "environment": environment_info(),
+    }
+    for streaming in (False, True):
+        name = "streaming" if streaming else "buffered"
+        result[name] = r = await run_mode(streaming, args)
+        print(f"{name:10} p50 {r['latency_ms']['p50']:8.1f} ms  p99 {r['latency_ms']['p99']:8.1f} ms  "
+              f"completion tokens {r['completion_tokens_per_request']:5.1f}")
+    r = result["streaming"]
+    print(f"streaming  first token {r['mean_time_to_first_token_ms']:.1f} ms  verdict {r['mean_time_to_verdict_ms']:.1f} ms (mean)")
+    return result
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    result = asyncio.run(run(args))
+    write_results(args.output, f"trailing-{args.trailing_tokens}", result)
+
+
+if __name__ == "__main__":
+    main()
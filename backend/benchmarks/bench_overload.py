@@ -0,0 +1,148 @@
+"""Overload the app with open-loop traffic, with and without admission control.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_overload --rate 400 --duration 10
+
+Requests arrive at a fixed rate whether or not earlier ones have finished,
+the way real clients keep arriving during an overload. The traffic mix is
+``--dashboard-share`` SQL-mode ``/api/dashboard/stats`` polls over a generated
+dataset, and the rest is ``/triage`` with a stubbed LLM. Each mode runs in its
+own process, because the middleware is installed when the app is imported.
+Reported per route: admitted requests, 503s, and p50/p99 latency of the
+admitted ones.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .common import RESULTS_DIR, StubLLMClient, environment_info, percentile, write_results
+from .bench_triage import SAMPLE_FEEDBACK
+
+ROUTES = {
+    "dashboard": ("GET", "/api/dashboard/stats", None),
+    "triage": ("POST", "/triage", None),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=400.0, help="Arrivals per second")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of arrivals")
+    parser.add_argument("--dashboard-share", type=float, default=0.5)
+    parser.add_argument("--rows", type=int, default=20000, help="Rows in the dashboard dataset")
+    parser.add_argument("--llm-latency-ms", type=float, default=300.0)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "overload.json")
+    parser.add_argument("--child", choices=["on", "off"], help=argparse.SUPPRESS)
+    parser.add_argument("--database-url", help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+async def drive(client, rate: float, duration: float, dashboard_share: float) -> dict:
+    results = {name: {"latencies": [], "shed": 0, "errors": 0} for name in ROUTES}
+    tasks = []
+
+    async def one(i: int):
+        # Spreads the dashboard share evenly over the arrivals
+        name = "dashboard" if int((i + 1) * dashboard_share) > int(i * dashboard_share) else "triage"
+        start = time.perf_counter()
+        try:
+            if name == "dashboard":
+                response = await client.get("/api/dashboard/stats", params={"days_back": 30})
+            else:
+                response = await client.post("/triage", json={"text": f"{SAMPLE_FEEDBACK[i % len(SAMPLE_FEEDBACK)]} (#{i})"})
+        except Exception:
+            results[name]["errors"] += 1
+            return
+        if response.status_code == 503:
+            results[name]["shed"] += 1
+        elif response.status_code == 200:
+            results[name]["latencies"].append((time.perf_counter() - start) * 1000)
+        else:
+            results[name]["errors"] += 1
+
+    loop = asyncio.get_running_loop()
+    begin = loop.time()
+    total = int(rate * duration)
+    for i in range(total):
+        delay = begin + i / rate - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(i)))
+    await asyncio.gather(*tasks)
+
+    return {
+        name: {
+            "admitted": len(data["latencies"]),
+            "shed": data["shed"],
+            "errors": data["errors"],
+            "p50_ms": round(percentile(data["latencies"], 50), 1),
+            "p99_ms": round(percentile(data["latencies"], 99), 1),
+        }
+        for name, data in results.items()
+    }
+
+
+async def run_child(args) -> dict:
+    import httpx
+    from src.main import app
+    from src.api.triage import llm_service
+
+    logging.disable(logging.WARNING)
+    llm_service.client = StubLLMClient(median_ms=args.llm_latency_ms)
+    await app.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=app)
+        limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", limits=limits, timeout=120) as client:
+            return await drive(client, args.rate, args.duration, args.dashboard_share)
+    finally:
+        await app.router.shutdown()
+
+
+def main():
+    args = parse_args()
+    if args.child:
+        os.environ["DATABASE_URL"] = args.database_url
+        os.environ["ADMISSION_CONTROL_ENABLED"] = "true" if args.child == "on" else "false"
+        os.environ["ANALYTICS_SNAPSHOT_ENABLED"] = "false"
+        os.environ["RATE_LIMIT_MAX_REQUESTS"] = str(10 ** 9)
+        os.environ.setdefault("LLM_API_KEY", "bench-key")
+        print(json.dumps(asyncio.run(run_child(args))))
+        return
+
+    from .generate_data import ensure_dataset
+
+    database_url = f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/overload.db"
+
+    async def prepare():
+        engine = await ensure_dataset(database_url, args.rows)
+        await engine.dispose()
+
+    asyncio.run(prepare())
+    result = {"rate": args.rate, "duration": args.duration, "dashboard_share": args.dashboard_share,
+              "environment": environment_info()}
+    for mode in ("off", "on"):
+        command = [
+            sys.executable, "-m", "benchmarks.bench_overload", "--child", mode, "--database-url", database_url,
+            "--rate", str(args.rate), "--duration", str(args.duration),
+            "--dashboard-share", str(args.dashboard_share), "--llm-latency-ms", str(args.llm_latency_ms),
+        ]
+        output = subprocess.run(command, check=True, capture_output=True, text=True).stdout
+        result[f"admission_{mode}"] = json.loads(output.strip().splitlines()[-1])
+        print(f"admission control {mode}:")
+        for name, metrics in result[f"admission_{mode}"].items():
+            print(f"  {name:10} admitted {metrics['admitted']:6}  shed {metrics['shed']:6}  errors {metrics['errors']:4}"
+                  f"  p50 {metrics['p50_ms']:9.1f} ms  p99 {metrics['p99_ms']:9.1f} ms")
+    write_results(args.output, f"overload-{int(args.rate)}rps", result)
+
+
+if __name__ == "__main__":
+    main()
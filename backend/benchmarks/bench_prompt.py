@@ -0,0 +1,94 @@
+"""Compare prompt size and build time with static and dynamic few-shot examples.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_prompt --rows 100000 --index-size 2000
+
+Seeds the example index from a generated dataset, pads it with perturbed
+examples up to ``--index-size`` so selection runs over a realistic number of
+candidates, then builds the triage prompt for ``--queries`` generated inputs in
+both modes. Prompt tokens are estimated at four characters per token, the same
+estimate the re-triage job budgets with.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+from .common import RESULTS_DIR, environment_info, percentile, write_results
+from .generate_data import CATEGORIES, TEXT_FRAGMENTS, TEXT_SUFFIXES, ensure_dataset
+
+CHARS_PER_TOKEN = 4
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--database-url")
+    parser.add_argument("--index-size", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "prompt.json")
+    return parser.parse_args()
+
+
+def perturbed_text(rng: np.random.Generator, category: str, vocabulary: list) -> str:
+    pool = TEXT_FRAGMENTS[category]
+    words = " ".join(vocabulary[i] for i in rng.integers(0, len(vocabulary), 3))
+    return f"{pool[rng.integers(len(pool))]} {words}{TEXT_SUFFIXES[rng.integers(len(TEXT_SUFFIXES))]}"
+
+
+async def run(args) -> dict:
+    os.environ.setdefault("LLM_API_KEY", "bench-key")
+    from src.services.few_shot import Example, example_index
+    from src.services.llm_service import LLMService
+    from sqlalchemy.ext.asyncio import async_sessionmaker
+
+    database_url = args.database_url or f"sqlite+aiosqlite:///{Path(__file__).parent}/data/feedback_{args.rows}.db"
+    engine = await ensure_dataset(database_url, args.rows)
+    async with async_sessionmaker(engine)() as session:
+        seeded = await example_index.seed(session)
+    await engine.dispose()
+
+    rng = np.random.default_rng(7)
+    vocabulary = [f"w{i}" for i in range(5000)]
+    while len(example_index) < args.index_size:
+        category = CATEGORIES[rng.integers(len(CATEGORIES))]
+        example_index.add(Example(perturbed_text(rng, category, vocabulary), category, int(rng.integers(1, 6))))
+    queries = [perturbed_text(rng, CATEGORIES[rng.integers(len(CATEGORIES))], vocabulary) for _ in range(args.queries)]
+
+    service = LLMService()
+    result = {"seeded_examples": seeded, "index_size": len(example_index), "environment": environment_info()}
+    for mode in ("static", "dynamic"):
+        service.few_shot_mode = mode
+        timings, tokens = [], []
+        for text in queries:
+            start = time.perf_counter()
+            prompt = service._create_prompt(text)
+            timings.append((time.perf_counter() - start) * 1e6)
+            tokens.append(len(prompt) / CHARS_PER_TOKEN)
+        result[mode] = {
+            "prompt_tokens_mean": round(sum(tokens) / len(tokens), 1),
+            "build_p50_us": round(percentile(timings, 50), 1),
+            "build_p99_us": round(percentile(timings, 99), 1),
+        }
+        print(f"{mode:8} ~{result[mode]['prompt_tokens_mean']:6.1f} prompt tokens  "
+              f"build p50 {result[mode]['build_p50_us']:7.1f} µs  p99 {result[mode]['build_p99_us']:7.1f} µs")
+    saved = 1 - result["dynamic"]["prompt_tokens_mean"] / result["static"]["prompt_tokens_mean"]
+    result["prompt_token_reduction"] = round(saved, 3)
+    print(f"dynamic prompts are {saved:.0%} smaller ({len(example_index)} indexed examples)")
+    return result
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    result = asyncio.run(run(args))
+    write_results(args.output, f"index-{args.index_size}", result)
+
+
+if __name__ == "__main__":
+    main()
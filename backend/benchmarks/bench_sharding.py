@@ -0,0 +1,113 @@
+"""Insert throughput of feedback records by SQLite shard count.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_sharding --shards 1,2,4,8 --inserts 3000
+
+For each shard count, creates fresh database files and stores ``--inserts``
+records through ``FeedbackService.create_feedback_record`` (one transaction
+per record, including the LLM usage rollup, as ``POST /triage`` does) from
+``--concurrency`` concurrent writers. One shard is the unsharded default.
+Inserts per second, p50/p99 insert latency and inserts that failed with
+"database is locked" (SQLite's busy timeout expired) per shard count are
+merged into ``benchmarks/results/sharding.json``.
+"""
+import argparse
+import asyncio
+import itertools
+import shutil
+import time
+from pathlib import Path
+
+from .common import RESULTS_DIR, environment_info, percentile, write_results
+
+DATA_DIR = Path(__file__).parent / "data" / "sharding"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--shards", default="1,2,4,8", help="Comma-separated shard counts")
+    parser.add_argument("--inserts", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "sharding.json")
+    return parser.parse_args()
+
+
+async def run(shard_count: int, inserts: int, concurrency: int) -> dict:
+    from sqlalchemy.exc import OperationalError
+
+    from src.database.connection import create_engine, init_db
+    from src.database.sharding import ShardSet, shard_url, shards
+    from src.services.feedback_service import FeedbackService
+
+    directory = DATA_DIR / f"shards-{shard_count}"
+    shutil.rmtree(directory, ignore_errors=True)
+    directory.mkdir(parents=True)
+    url = f"sqlite+aiosqlite:///{directory}/feedback.db"
+    engines = [create_engine(url)] + [create_engine(shard_url(url, index)) for index in range(1, shard_count)]
+    await init_db(engines[0])
+    bench_shards = ShardSet(engines)
+    await bench_shards.init()
+    # Point the configured shard set at the fresh files
+    shards.engines = bench_shards.engines
+    shards.session_factories = bench_shards.session_factories
+    shards.id_floor = bench_shards.id_floor
+    shards._placement = itertools.count()
+
+    session_factory = bench_shards.session_factories[0]
+    latencies = []
+    remaining = iter(range(inserts))
+    locked = 0
+
+    async def writer():
+        nonlocal locked
+        for i in remaining:
+            start = time.perf_counter()
+            async with session_factory() as db:
+                try:
+                    await FeedbackService(db).create_feedback_record(
+                        feedback_text=f"Checkout fails with error {i} after the last update",
+                        category="Bug Report",
+                        urgency_score=i % 5 + 1,
+                        client_ip="203.0.113.7",
+                        processing_time_ms=250.0,
+                        model_tier="primary",
+                        llm_prompt_tokens=420,
+                        llm_completion_tokens=18,
+                        llm_cost_usd=0.0002,
+                        llm_latency_ms=240.0
+                    )
+                except OperationalError:
+                    locked += 1
+                    continue
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(writer() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await bench_shards.dispose()
+    shutil.rmtree(directory, ignore_errors=True)
+    return {
+        "inserts_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "locked": locked,
+    }
+
+
+def main():
+    import logging
+
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    result = {"inserts": args.inserts, "concurrency": args.concurrency, "environment": environment_info()}
+    for shard_count in [int(value) for value in args.shards.split(",")]:
+        metrics = asyncio.run(run(shard_count, args.inserts, args.concurrency))
+        result[f"shards-{shard_count}"] = metrics
+        print(f"{shard_count:3} shards  {metrics['inserts_per_second']:8.1f} inserts/s  "
+              f"p50 {metrics['p50_ms']:7.2f} ms  p99 {metrics['p99_ms']:7.2f} ms  locked {metrics['locked']}")
+    write_results(args.output, f"sharding-{args.concurrency}", result)
+
+
+if __name__ == "__main__":
+    main()
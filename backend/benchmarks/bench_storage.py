@@ -0,0 +1,114 @@
+"""Compare on-disk size and insert throughput of the feedback_records layouts.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_storage --rows 1000000
+
+Loads the same generated rows (see ``generate_data``) into a fresh SQLite
+database twice: once with the schema-version-3 layout (category and client IP
+as strings, seven secondary indexes) and once with the current
+compact layout (``models/types.py``). Table and per-index sizes come from the
+``dbstat`` virtual table.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict
+
+import numpy as np
+from sqlalchemy import (
+    Column, DateTime, Float, Index, Integer, MetaData, String, Table, Text, insert, text
+)
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.sql import func
+
+from .common import RESULTS_DIR, environment_info, write_results
+from .generate_data import generate_batch
+
+DATA_DIR = Path(__file__).parent / "data"
+
+legacy_metadata = MetaData()
+# feedback_records at schema version 3, before the compact encodings
+legacy_table = Table(
+    "feedback_records",
+    legacy_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("feedback_text", Text, nullable=False),
+    Column("category", String(50), nullable=False, index=True),
+    Column("urgency_score", Integer, nullable=False),
+    Column("client_ip", String(45), nullable=True, index=True),
+    Column("processing_time_ms", Float, nullable=True),
+    Column("model_tier", String(16), nullable=True),
+    Column("created_at", DateTime(timezone=True), server_default=func.now(), index=True),
+    Column("updated_at", DateTime(timezone=True)),
+    Index("idx_category_urgency", "category", "urgency_score"),
+    Index("idx_created_urgency", "created_at", "urgency_score"),
+    Index("idx_category_created", "category", "created_at"),
+)
+
+
+async def load(layout: str, path: Path, rows: int, batch_size: int, seed: int) -> Dict:
+    from src.models.database import FeedbackRecord
+
+    path.unlink(missing_ok=True)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    table = legacy_table if layout == "legacy" else FeedbackRecord.__table__
+    async with engine.begin() as conn:
+        await conn.run_sync(table.create)
+
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    elapsed = 0.0
+    inserted = 0
+    while inserted < rows:
+        # Generating the rows is not part of the measured insert time
+        batch = generate_batch(rng, min(batch_size, rows - inserted), now)
+        start = time.perf_counter()
+        async with engine.begin() as conn:
+            await conn.execute(insert(table), batch)
+        elapsed += time.perf_counter() - start
+        inserted += len(batch)
+
+    async with engine.connect() as conn:
+        sizes = (await conn.execute(text(
+            "SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY name"
+        ))).all()
+    await engine.dispose()
+
+    sizes = {name: int(size) for name, size in sizes if not name.startswith("sqlite_")}
+    table_bytes = sizes.pop(table.name)
+    return {
+        "rows_per_second": round(inserted / elapsed),
+        "table_mb": round(table_bytes / 1e6, 1),
+        "indexes_mb": round(sum(sizes.values()) / 1e6, 1),
+        "file_mb": round(path.stat().st_size / 1e6, 1),
+        "index_mb": {name: round(size / 1e6, 1) for name, size in sizes.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "storage.json")
+    args = parser.parse_args()
+    DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    result = {"rows": args.rows, "environment": environment_info()}
+    for layout in ("legacy", "compact"):
+        path = DATA_DIR / f"storage_{layout}_{args.rows}.db"
+        result[layout] = asyncio.run(load(layout, path, args.rows, args.batch_size, args.seed))
+        path.unlink()
+        metrics = result[layout]
+        print(f"{layout:8} {metrics['rows_per_second']:>8,} rows/s  table {metrics['table_mb']:7.1f} MB  "
+              f"indexes {metrics['indexes_mb']:7.1f} MB  file {metrics['file_mb']:7.1f} MB")
+        for name, size in metrics["index_mb"].items():
+            print(f"         {name:40} {size:7.1f} MB")
+    write_results(args.output, f"storage-sqlite-{args.rows}", result)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Compare ingestion over POST /triage with the WebSocket stream.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_stream --items 5000 --window 32
+
+Starts one uvicorn server over TCP against a fresh SQLite database, with the
+LLM replaced by the in-process stub (``--llm-latency-ms``, 0 by default so
+per-request overhead is what is measured). The same items are then sent
+over keep-alive HTTP with ``--window`` concurrent requests, and over one
+WebSocket with ``--window`` credits. ``--no-store`` skips the insert, which
+otherwise dominates with SQLite. Items/s, p50/p99 latency, errors and the
+server's CPU time per item (client and server share the machine, so this is
+the cleaner measure of per-request overhead) are merged into
+``benchmarks/results/stream.json``. Linux only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .bench_triage import SAMPLE_FEEDBACK
+from .bench_workers import free_port, stop, wait_until_ready
+from .common import RESULTS_DIR, environment_info, percentile, write_results
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--window", type=int, default=32, help="Concurrent HTTP requests / WebSocket credits")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0)
+    parser.add_argument("--no-store", action="store_true", help="Skip the database insert to isolate transport cost")
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "stream.json")
+    parser.add_argument("--serve", type=int, help=argparse.SUPPRESS)
+    return parser.parse_args()
+
+
+def serve(port: int, llm_latency_ms: float, store: bool):
+    import logging
+    import uvicorn
+    from src.main import app
+    from src.api.triage import llm_service
+    from src.services.feedback_service import FeedbackService
+    from .common import StubLLMClient
+
+    logging.disable(logging.WARNING)
+    llm_service.client = StubLLMClient(median_ms=llm_latency_ms)
+    if not store:
+        async def skip_insert(self, **kwargs):
+            return None
+
+        FeedbackService.create_feedback_record = skip_insert
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+def cpu_seconds(pid: int) -> float:
+    """User plus system CPU time of a process (Linux)."""
+    fields = Path(f"/proc/{pid}/stat").read_text().rsplit(")", 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+
+
+def measured(run, pid: int, items: int) -> dict:
+    """Run one phase, adding the server's CPU time per item."""
+    before = cpu_seconds(pid)
+    result = asyncio.run(run)
+    result["server_cpu_ms_per_item"] = round((cpu_seconds(pid) - before) * 1000 / items, 3)
+    return result
+
+
+def texts(count: int):
+    return [f"{SAMPLE_FEEDBACK[i % len(SAMPLE_FEEDBACK)]} (#{i})" for i in range(count)]
+
+
+async def run_http(base_url: str, items: list, window: int) -> dict:
+    import httpx
+
+    latencies, errors, queue = [], [], asyncio.Queue()
+    for text in items:
+        queue.put_nowait(text)
+
+    async def worker(client):
+        while not queue.empty():
+            text = queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post("/triage", json={"text": text})
+            if response.status_code != 200:
+                errors.append(response.status_code)
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    limits = httpx.Limits(max_connections=window, max_keepalive_connections=window)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(window)))
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, errors)
+
+
+async def run_stream(ws_url: str, items: list) -> dict:
+    import websockets
+
+    sent_at, latencies, errors = {}, [], []
+    async with websockets.connect(ws_url, max_queue=None) as ws:
+        credit = json.loads(await ws.recv())["credit"]
+        start = time.perf_counter()
+        next_item = 0
+        while len(latencies) < len(items):
+            while credit and next_item < len(items):
+                sent_at[next_item] = time.perf_counter()
+                await ws.send(json.dumps({"id": next_item, "text": items[next_item]}))
+                next_item += 1
+                credit -= 1
+            reply = json.loads(await ws.recv())
+            if reply["type"] != "result":
+                errors.append(reply["status_code"])
+            latencies.append((time.perf_counter() - sent_at.pop(reply["id"])) * 1000)
+            credit += 1
+        elapsed = time.perf_counter() - start
+    return summarize(latencies, elapsed, errors)
+
+
+def summarize(latencies: list, elapsed: float, errors: list) -> dict:
+    return {
+        "items_per_second": round(len(latencies) / elapsed, 1),
+        "errors": len(errors),
+        "latency_ms": {"p50": round(percentile(latencies, 50), 2), "p99": round(percentile(latencies, 99), 2)},
+    }
+
+
+def main():
+    args = parse_args()
+    if args.serve:
+        serve(args.serve, args.llm_latency_ms, store=not args.no_store)
+        return
+
+    port = free_port()
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite+aiosqlite:///{tempfile.mkdtemp()}/stream.db",
+        "LLM_API_KEY": "bench-key",
+        "RATE_LIMIT_MAX_REQUESTS": str(10 ** 9),
+        "ANALYTICS_SNAPSHOT_ENABLED": "false",
+        "INCIDENT_CLUSTERING_ENABLED": "false",
+    }
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.bench_stream", "--serve", str(port),
+         "--llm-latency-ms", str(args.llm_latency_ms)] + (["--no-store"] if args.no_store else []),
+        env=env, cwd=Path(__file__).parent.parent
+    )
+    try:
+        wait_until_ready(f"http://127.0.0.1:{port}")
+        items = texts(args.items)
+        # Unmeasured warm-up of both paths
+        asyncio.run(run_http(f"http://127.0.0.1:{port}", items[:200], args.window))
+        asyncio.run(run_stream(f"ws://127.0.0.1:{port}/triage/stream", items[:200]))
+        result = {
+            "items": args.items,
+            "window": args.window,
+            "store": not args.no_store,
+            "http": measured(run_http(f"http://127.0.0.1:{port}", items, args.window), server.pid, len(items)),
+            "websocket": measured(run_stream(f"ws://127.0.0.1:{port}/triage/stream", items), server.pid, len(items)),
+            "environment": environment_info(),
+        }
+    finally:
+        stop(server)
+
+    for mode in ("http", "websocket"):
+        r = result[mode]
+        print(f"{mode:10} {r['items_per_second']:8.1f} items/s  p50 {r['latency_ms']['p50']:7.2f} ms  "
+              f"p99 {r['latency_ms']['p99']:7.2f} ms  server CPU {r['server_cpu_ms_per_item']:.3f} ms/item  "
+              f"errors {r['errors']}")
+    write_results(args.output, f"window-{args.window}{'-no-store' if args.no_store else ''}", result)
+
+
+if __name__ == "__main__":
+    main()
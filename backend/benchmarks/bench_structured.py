@@ -0,0 +1,99 @@
+"""Parse failures, repairs and output tokens with and without structured output.
+
+Usage (from backend/), against any OpenAI-compatible endpoint:
+
+    LLM_API_KEY=... python -m benchmarks.bench_structured --model gpt-4o-mini --samples 200
+    LLM_API_KEY=... python -m benchmarks.bench_structured --base-url http://localhost:11434/v1 \\
+        --model llama3.1 --modes off,json_object
+
+Classifies the same generated feedback once per ``LLM_STRUCTURED_OUTPUT``
+mode and reports, per mode: the share of first replies that failed to parse,
+how many of those the repair retry fixed, the share still failing, completion
+tokens per request and agreement with the generator's labels. Without
+``--model`` it runs against the in-process stub, which only checks the harness.
+"""
+import argparse
+import asyncio
+import logging
+import os
+from pathlib import Path
+
+import numpy as np
+
+from .common import RESULTS_DIR, StubLLMClient, environment_info, write_results
+from .generate_data import generate_batch
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--model")
+    parser.add_argument("--base-url")
+    parser.add_argument("--modes", default="off,json_schema")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "structured.json")
+    return parser.parse_args()
+
+
+async def run_mode(mode: str, args, samples) -> dict:
+    from src.services import metrics
+    from src.services.llm_service import LLMService, TIER_PRIMARY
+
+    os.environ["LLM_STRUCTURED_OUTPUT"] = mode
+    if args.model:
+        os.environ["LLM_MODEL"] = args.model
+    if args.base_url:
+        os.environ["LLM_BASE_URL"] = args.base_url
+    service = LLMService()
+    if not args.model:
+        service.client = StubLLMClient(median_ms=0)
+    metrics.registry.clear()
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+    failed = agreed = 0
+
+    async def classify(row):
+        nonlocal failed, agreed
+        async with semaphore:
+            try:
+                result = await service.analyze_feedback(row["feedback_text"])
+            except Exception:
+                failed += 1
+                return
+            agreed += result["category"] == row["category"]
+
+    await asyncio.gather(*(classify(row) for row in samples))
+    total = len(samples)
+    return {
+        "parse_failure_rate": round(metrics.LLM_PARSE_FAILURES.value(TIER_PRIMARY) / total, 4),
+        "repaired": int(metrics.LLM_REPAIRS.value("repaired")),
+        "final_failure_rate": round(failed / total, 4),
+        "completion_tokens_per_request": round(metrics.LLM_TIER_TOKENS.value(TIER_PRIMARY, "completion") / total, 1),
+        "category_agreement": round(agreed / max(total - failed, 1), 3),
+    }
+
+
+async def run(args) -> dict:
+    from datetime import datetime
+
+    os.environ.setdefault("LLM_API_KEY", "bench-key")
+    samples = generate_batch(np.random.default_rng(11), args.samples, datetime.utcnow())
+    result = {"model": args.model or "stub", "samples": args.samples, "environment": environment_info()}
+    for mode in args.modes.split(","):
+        result[mode] = await run_mode(mode, args, samples)
+        r = result[mode]
+        print(f"{mode:12} parse failures {r['parse_failure_rate']:6.1%}  repaired {r['repaired']:4}  "
+              f"still failing {r['final_failure_rate']:6.1%}  completion tokens {r['completion_tokens_per_request']:6.1f}  "
+              f"agreement {r['category_agreement']:.1%}")
+    return result
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    result = asyncio.run(run(args))
+    write_results(args.output, result["model"], result)
+
+
+if __name__ == "__main__":
+    main()
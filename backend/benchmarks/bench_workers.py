@@ -0,0 +1,206 @@
+"""Measure how throughput scales with the number of gunicorn workers.
+
+Usage (from backend/):
+
+    python -m benchmarks.bench_workers --workers 1,2,4,8
+    python -m benchmarks.bench_workers --workers 1,2 --scenarios feedback --duration 10
+
+For every worker count a real ``gunicorn -c gunicorn.conf.py`` server is
+started against a seeded SQLite database, with the LLM replaced by
+``stub_llm_server``. Load comes from separate client processes over TCP, so
+client and server compete for the same cores: compare runs on one machine,
+and give the server more cores than the client where possible. Requests/s,
+p50/p99 latency and the speed-up over one worker are merged into the results
+file under ``workers-<scenario>``.
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from .common import RESULTS_DIR, environment_info, percentile, write_results
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+SCENARIOS = {
+    # Serialization-bound: 100 rows per response
+    "feedback": ("GET", "/api/dashboard/feedback", {"limit": 100}),
+    # Snapshot aggregation plus the urgent-record lookup
+    "stats": ("GET", "/api/dashboard/stats", {"days_back": 30}),
+    # Validation, stubbed LLM call, insert; SQLite serialises the commits
+    "triage": ("POST", "/triage", None),
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", default=f"1,{os.cpu_count()}", help="Comma-separated worker counts")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--duration", type=float, default=20.0, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3.0, help="Unmeasured seconds per run")
+    parser.add_argument("--clients", type=int, default=max(1, (os.cpu_count() or 2) // 2), help="Client processes")
+    parser.add_argument("--concurrency", type=int, default=16, help="Connections per client process")
+    parser.add_argument("--rows", type=int, default=50000, help="Seeded feedback rows")
+    parser.add_argument("--llm-latency-ms", type=float, default=50.0)
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "workers.json")
+    return parser.parse_args()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(base_url: str, timeout: float = 60.0):
+    import httpx
+
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=2.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.25)
+    raise RuntimeError(f"Server at {base_url} did not become ready")
+
+
+async def drive(base_url: str, scenario: str, concurrency: int, warmup: float, duration: float) -> tuple:
+    import httpx
+
+    method, path, params = SCENARIOS[scenario]
+    latencies = []
+    errors = 0
+    warm_until = time.monotonic() + warmup
+    stop_at = warm_until + duration
+
+    async def worker(client, worker_id: int):
+        nonlocal errors
+        i = 0
+        while time.monotonic() < stop_at:
+            i += 1
+            start = time.perf_counter()
+            if method == "POST":
+                response = await client.post(path, json={"text": f"Checkout fails with a blank page ({worker_id}-{i})"})
+            else:
+                response = await client.get(path, params=params)
+            if time.monotonic() < warm_until:
+                continue
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                errors += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60.0) as client:
+        await asyncio.gather(*(worker(client, i) for i in range(concurrency)))
+    return latencies, errors
+
+
+def run_client(args: tuple) -> tuple:
+    return asyncio.run(drive(*args))
+
+
+def start_server(workers: int, port: int, env: dict) -> subprocess.Popen:
+    env = dict(env, WEB_CONCURRENCY=str(workers), PORT=str(port))
+    return subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "src.main:app"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+
+
+def stop(process: subprocess.Popen):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+
+
+def main():
+    args = parse_args()
+    worker_counts = [int(value) for value in args.workers.split(",")]
+    scenarios = args.scenarios.split(",")
+    workdir = tempfile.mkdtemp(prefix="bench-workers-")
+    database_url = f"sqlite+aiosqlite:///{workdir}/bench.db"
+
+    from .generate_data import ensure_dataset
+
+    async def seed():
+        engine = await ensure_dataset(database_url, args.rows)
+        await engine.dispose()
+
+    asyncio.run(seed())
+
+    llm_port = free_port()
+    llm_server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.stub_llm_server", "--port", str(llm_port),
+         "--latency-ms", str(args.llm_latency_ms)],
+        cwd=BACKEND_DIR
+    )
+    env = dict(
+        os.environ,
+        DATABASE_URL=database_url,
+        LLM_API_KEY="bench-key",
+        LLM_BASE_URL=f"http://127.0.0.1:{llm_port}/v1",
+        RATE_LIMIT_MAX_REQUESTS=str(10 ** 9),
+    )
+    env.pop("SHARED_STATE_DIR", None)
+
+    results = {scenario: {} for scenario in scenarios}
+    try:
+        for workers in worker_counts:
+            port = free_port()
+            base_url = f"http://127.0.0.1:{port}"
+            server = start_server(workers, port, env)
+            try:
+                wait_until_ready(base_url)
+                for scenario in scenarios:
+                    client_args = [(base_url, scenario, args.concurrency, args.warmup, args.duration)] * args.clients
+                    with multiprocessing.Pool(args.clients) as pool:
+                        outputs = pool.map(run_client, client_args)
+                    latencies = [value for output in outputs for value in output[0]]
+                    errors = sum(output[1] for output in outputs)
+                    results[scenario][workers] = {
+                        "requests_per_second": round(len(latencies) / args.duration, 1),
+                        "latency_ms": {
+                            "p50": round(percentile(latencies, 50), 2),
+                            "p99": round(percentile(latencies, 99), 2),
+                        },
+                        "errors": errors,
+                    }
+                    print(f"{scenario:10} {workers:3} workers: "
+                          f"{results[scenario][workers]['requests_per_second']:8.1f} req/s  "
+                          f"p50 {results[scenario][workers]['latency_ms']['p50']:7.2f} ms  "
+                          f"p99 {results[scenario][workers]['latency_ms']['p99']:7.2f} ms  errors {errors}")
+            finally:
+                stop(server)
+    finally:
+        stop(llm_server)
+
+    for scenario, runs in results.items():
+        base = runs.get(worker_counts[0], {}).get("requests_per_second")
+        result = {
+            "runs": {str(workers): run for workers, run in runs.items()},
+            "speedup": {
+                str(workers): round(run["requests_per_second"] / base, 2) if base else None
+                for workers, run in runs.items()
+            },
+            "clients": args.clients,
+            "concurrency": args.concurrency,
+            "rows": args.rows,
+            "environment": environment_info(),
+        }
+        write_results(args.output, f"workers-{scenario}", result)
+        print(f"{scenario:10} speed-up: " + ", ".join(f"{w}w x{s}" for w, s in result["speedup"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Shared helpers for the benchmark scripts: stub LLM, stats, results and regression gates."""
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import resource
+import sys
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+CATEGORIES = ["Bug Report", "Feature Request", "Praise/Positive Feedback", "General Inquiry"]
+
+
+class StubCompletions:
+    """Stands in for ``AsyncOpenAI().chat.completions`` with log-normal latency.
+
+    ``token_ms`` adds generation time per output token, and ``trailing_tokens``
+    an explanation after the JSON, as chatty models write. ``stream=True``
+    yields the reply token by token.
+    """
+
+    def __init__(self, median_ms: float = 300.0, sigma: float = 0.35, seed: int = 0,
+                 token_ms: float = 0.0, trailing_tokens: int = 0):
+        self.median_ms = median_ms
+        self.sigma = sigma
+        self.random = random.Random(seed)
+        self.token_ms = token_ms
+        self.trailing_tokens = trailing_tokens
+        self.calls = 0
+
+    async def create(self, model: str, messages: List[Dict[str, str]], stream: bool = False, **kwargs):
+        self.calls += 1
+        if self.median_ms > 0:
+            await asyncio.sleep(self.median_ms * self.random.lognormvariate(0, self.sigma) / 1000)
+        content = json.dumps({
+            "category": self.random.choice(CATEGORIES),
+            "urgency_score": self.random.randint(1, 5),
+        })
+        # ~4 characters per token
+        tokens = [content[i:i + 4] for i in range(0, len(content), 4)] + [" word"] * self.trailing_tokens
+        if stream:
+            return self._stream(tokens)
+        if self.token_ms > 0:
+            await asyncio.sleep(self.token_ms * len(tokens) / 1000)
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content="".join(tokens)))],
+            usage=SimpleNamespace(prompt_tokens=420, completion_tokens=len(tokens), total_tokens=420 + len(tokens)),
+        )
+
+    async def _stream(self, tokens: List[str]):
+        for token in tokens:
+            if self.token_ms > 0:
+                await asyncio.sleep(self.token_ms / 1000)
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=token))])
+
+
+class StubLLMClient:
+    def __init__(self, median_ms: float = 300.0, sigma: float = 0.35, seed: int = 0,
+                 token_ms: float = 0.0, trailing_tokens: int = 0):
+        self.chat = SimpleNamespace(completions=StubCompletions(median_ms, sigma, seed, token_ms, trailing_tokens))
+        # The readiness check lists models to prove the LLM is reachable
+        self.models = SimpleNamespace(list=self._list_models)
+
+    @staticmethod
+    async def _list_models():
+        return SimpleNamespace(data=[SimpleNamespace(id="stub")])
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (pct in 0-100)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = math.ceil(pct / 100 * len(ordered))
+    return ordered[max(0, min(len(ordered), rank) - 1)]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process (ru_maxrss is KiB on Linux, bytes on macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(peak / divisor, 1)
+
+
+def environment_info() -> Dict[str, Any]:
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+    }
+
+
+def write_results(path: Path, scenario: str, result: Dict[str, Any]):
+    """Merge one scenario's result into a JSON results file."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    data = json.loads(path.read_text()) if path.exists() else {}
+    data[scenario] = result
+    path.write_text(json.dumps(data, indent=2, sort_keys=True) + "\n")
+
+
+def load_baseline(path: Optional[Path], scenario: str) -> Optional[Dict[str, Any]]:
+    if path is None or not path.exists():
+        return None
+    return json.loads(path.read_text()).get(scenario)
+
+
+def find_regressions(
+    result: Dict[str, Any],
+    baseline: Dict[str, Any],
+    gates: Dict[str, str],
+    threshold: float
+) -> List[str]:
+    """Compare metrics against a baseline.
+
+    ``gates`` maps a dotted metric path to ``"higher"`` (bigger is better, e.g.
+    requests/s) or ``"lower"`` (smaller is better, e.g. latency, RSS). A metric
+    regresses when it is worse than the baseline by more than ``threshold``.
+    """
+    def lookup(data: Dict[str, Any], dotted: str) -> Optional[float]:
+        for key in dotted.split("."):
+            if not isinstance(data, dict) or key not in data:
+                return None
+            data = data[key]
+        return data
+
+    regressions = []
+    for metric, better in gates.items():
+        current, previous = lookup(result, metric), lookup(baseline, metric)
+        if current is None or not previous:
+            continue
+        change = (current - previous) / previous
+        if (better == "higher" and change < -threshold) or (better == "lower" and change > threshold):
+            regressions.append(f"{metric}: {previous} -> {current} ({change:+.1%})")
+    return regressions
@@ -0,0 +1,182 @@
+"""Offline evaluation of prompt and model variants on a labelled dataset.
+
+Usage (from backend/):
+
+    python -m benchmarks.eval_triage --variant baseline \\
+        --variant "mini:LLM_MODEL=gpt-4o-mini,LLM_STRUCTURED_OUTPUT=json_schema" \\
+        --variant "dynamic:FEW_SHOT_MODE=dynamic,FEW_SHOT_K=4"
+
+    # CI: against the stub server, which answers with random labels
+    python -m benchmarks.stub_llm_server --latency-ms 20 &
+    LLM_BASE_URL=http://127.0.0.1:8900/v1 python -m benchmarks.eval_triage \
+        --max-parse-failure-rate 0 --max-failure-rate 0
+
+The dataset is JSONL with ``text``, ``category`` and ``urgency_score`` per
+line (``benchmarks/datasets/triage_eval.jsonl`` by default). A variant is a
+name and environment overrides applied while its ``LLMService`` is built, so
+any setting in the README's environment table can be compared. ``--examples``
+adds labelled JSONL rows to the dynamic few-shot index; keep them disjoint
+from the dataset.
+
+Per variant the report has category accuracy (overall and per category),
+urgency MAE, the share of first replies that failed to parse, the share of
+items that still failed, tokens per item, items/s and p50/p95 latency.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .common import RESULTS_DIR, StubLLMClient, environment_info, percentile, write_results
+
+DEFAULT_DATASET = Path(__file__).parent / "datasets" / "triage_eval.jsonl"
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", type=Path, default=DEFAULT_DATASET)
+    parser.add_argument("--variant", action="append", help="name[:ENV=value,...]; repeatable (default: baseline)")
+    parser.add_argument("--examples", type=Path, help="Labelled JSONL added to the few-shot example index")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--stub", action="store_true", help="Use the in-process stub instead of an endpoint")
+    parser.add_argument("--min-accuracy", type=float, help="Exit non-zero if any variant is below this")
+    parser.add_argument("--max-parse-failure-rate", type=float, help="Exit non-zero if any variant is above this")
+    parser.add_argument(
+        "--max-failure-rate", type=float,
+        help="Exit non-zero if any variant has more items that still failed (including transport errors)"
+    )
+    parser.add_argument("--output", type=Path, default=RESULTS_DIR / "eval.json")
+    return parser.parse_args()
+
+
+def load_dataset(path: Path) -> List[Dict]:
+    items = []
+    for number, line in enumerate(path.read_text().splitlines(), 1):
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        missing = {"text", "category", "urgency_score"} - set(item)
+        if missing:
+            raise ValueError(f"{path}:{number} is missing {sorted(missing)}")
+        items.append(item)
+    return items
+
+
+def parse_variant(spec: str) -> Tuple[str, Dict[str, str]]:
+    name, _, overrides = spec.partition(":")
+    env = {}
+    for pair in filter(None, overrides.split(",")):
+        key, _, value = pair.partition("=")
+        env[key.strip()] = value.strip()
+    return name, env
+
+
+def build_service(env: Dict[str, str]):
+    from src.services.llm_service import LLMService
+
+    saved = dict(os.environ)
+    os.environ.update(env)
+    try:
+        return LLMService()
+    finally:
+        os.environ.clear()
+        os.environ.update(saved)
+
+
+async def evaluate(service, items: List[Dict], concurrency: int) -> Dict:
+    from src.services import metrics
+
+    metrics.registry.clear()
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failed = [], 0
+    hits: Dict[str, List[int]] = {}
+    urgency_errors = []
+
+    async def classify(item):
+        nonlocal failed
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                result = await service.analyze_feedback(item["text"])
+            except Exception:
+                failed += 1
+                return
+            finally:
+                latencies.append((time.perf_counter() - start) * 1000)
+        hits.setdefault(item["category"], []).append(int(result["category"] == item["category"]))
+        urgency_errors.append(abs(result["urgency_score"] - item["urgency_score"]))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(classify(item) for item in items))
+    elapsed = time.perf_counter() - start
+
+    total = len(items)
+    answered = [hit for values in hits.values() for hit in values]
+    # Summed over tiers, so cascade escalations and repairs are included
+    tokens = sum(value for _, value in metrics.LLM_TIER_TOKENS.state())
+    parse_failures = sum(value for _, value in metrics.LLM_PARSE_FAILURES.state())
+    return {
+        "items": total,
+        # Failed items count as wrong, so a variant cannot gain accuracy by erroring
+        "category_accuracy": round(sum(answered) / total, 3),
+        "category_accuracy_by_label": {label: round(sum(v) / len(v), 3) for label, v in sorted(hits.items())},
+        "urgency_mae": round(sum(urgency_errors) / max(len(urgency_errors), 1), 3),
+        "parse_failure_rate": round(parse_failures / total, 4),
+        "failure_rate": round(failed / total, 4),
+        "tokens_per_item": round(tokens / total, 1),
+        "items_per_second": round(total / elapsed, 2),
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50), 1),
+            "p95": round(percentile(latencies, 95), 1),
+        },
+    }
+
+
+async def run(args) -> Tuple[Dict, List[str]]:
+    from src.services.few_shot import Example, example_index
+
+    os.environ.setdefault("LLM_API_KEY", "eval-key")
+    items = load_dataset(args.dataset)
+    if args.examples:
+        for item in load_dataset(args.examples):
+            example_index.add(Example(item["text"], item["category"], item["urgency_score"]))
+
+    results, failures = {}, []
+    for spec in args.variant or ["baseline"]:
+        name, env = parse_variant(spec)
+        service = build_service(env)
+        if args.stub:
+            service.client = StubLLMClient(median_ms=20)
+        report = await evaluate(service, items, args.concurrency)
+        results[name] = {"overrides": env, "model": service.model, **report}
+        print(f"{name:16} accuracy {report['category_accuracy']:6.1%}  urgency MAE {report['urgency_mae']:5.2f}  "
+              f"parse failures {report['parse_failure_rate']:6.1%}  failed {report['failure_rate']:6.1%}  "
+              f"{report['tokens_per_item']:7.1f} tokens/item  {report['items_per_second']:6.1f} items/s  "
+              f"p95 {report['latency_ms']['p95']:8.1f} ms")
+        if args.min_accuracy is not None and report["category_accuracy"] < args.min_accuracy:
+            failures.append(f"{name}: accuracy {report['category_accuracy']:.1%} < {args.min_accuracy:.1%}")
+        if args.max_parse_failure_rate is not None and report["parse_failure_rate"] > args.max_parse_failure_rate:
+            failures.append(f"{name}: parse failure rate {report['parse_failure_rate']:.1%} > {args.max_parse_failure_rate:.1%}")
+        if args.max_failure_rate is not None and report["failure_rate"] > args.max_failure_rate:
+            failures.append(f"{name}: failure rate {report['failure_rate']:.1%} > {args.max_failure_rate:.1%}")
+    return results, failures
+
+
+def main():
+    args = parse_args()
+    logging.disable(logging.WARNING)
+    results, failures = asyncio.run(run(args))
+    write_results(args.output, args.dataset.stem, {"variants": results, "environment": environment_info()})
+    for failure in failures:
+        print(f"FAILED {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Bulk-load realistic synthetic ``feedback_records`` rows.
+
+Usage (from backend/):
+
+    python -m benchmarks.generate_data --rows 1000000 \\
+        --database-url sqlite+aiosqlite:///benchmarks/data/feedback_1000000.db
+
+Distributions are skewed the way production traffic is: most rows are bug
+reports, bug reports skew urgent and praise does not, timestamps decay
+exponentially into the past with a daily cycle, and a few client IPs
+submit a large share of the feedback (Zipf). Generation is seeded, so a given
+``--rows``/``--seed`` pair always produces the same table.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import func, insert, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+CATEGORIES = ["Bug Report", "Feature Request", "Praise/Positive Feedback", "General Inquiry"]
+CATEGORY_WEIGHTS = [0.45, 0.25, 0.10, 0.20]
+# Urgency 1..5 probabilities per category
+URGENCY_WEIGHTS = {
+    "Bug Report": [0.05, 0.15, 0.30, 0.35, 0.15],
+    "Feature Request": [0.25, 0.40, 0.25, 0.08, 0.02],
+    "Praise/Positive Feedback": [0.85, 0.12, 0.03, 0.0, 0.0],
+    "General Inquiry": [0.30, 0.40, 0.20, 0.08, 0.02],
+}
+TEXT_FRAGMENTS = {
+    "Bug Report": [
+        "The checkout page crashes when I apply a discount code",
+        "Login with Google fails with a blank screen",
+        "Payment processing is completely broken for card payments",
+        "The export button downloads an empty CSV file",
+        "Notifications arrive twice and sometimes hours late",
+    ],
+    "Feature Request": [
+        "Please add a dark mode option in the settings",
+        "It would be great to filter search results by date",
+        "Could you support exporting reports to PDF",
+        "We need keyboard shortcuts for the editor",
+    ],
+    "Praise/Positive Feedback": [
+        "Amazing update, the new interface is so much faster",
+        "Support resolved my issue in minutes, thank you",
+        "Love the new dashboard charts",
+    ],
+    "General Inquiry": [
+        "How do I change my notification settings",
+        "Is there a student discount for the annual plan",
+        "Where can I find the API documentation",
+    ],
+}
+TEXT_SUFFIXES = [
+    "", " on mobile.", " since yesterday's release.", " for our whole team.",
+    " - this is blocking our work.", " Please advise.", " Thanks!",
+]
+HISTORY_DAYS = 365
+EPOCH = datetime(1970, 1, 1)
+IP_POOL_SIZE = 5000
+
+
+def generate_batch(rng: np.random.Generator, size: int, now: datetime) -> list:
+    categories = rng.choice(len(CATEGORIES), size=size, p=CATEGORY_WEIGHTS)
+    urgencies = np.empty(size, dtype=np.int64)
+    for code, name in enumerate(CATEGORIES):
+        mask = categories == code
+        urgencies[mask] = rng.choice(5, size=int(mask.sum()), p=URGENCY_WEIGHTS[name]) + 1
+
+    # Exponential age (mean 45 days) capped at a year; time of day peaks around 14:00 UTC
+    now_ts = (now - EPOCH).total_seconds()
+    created = now_ts - np.minimum(rng.exponential(45 * 86400, size), HISTORY_DAYS * 86400 - 1)
+    time_of_day = np.clip(rng.normal(14 * 3600, 4 * 3600, size), 0, 86399)
+    created = created - created % 86400 + time_of_day
+    created[created > now_ts] -= 86400
+    processing = rng.lognormal(np.log(900), 0.5, size)
+    ips = np.minimum(rng.zipf(1.3, size), IP_POOL_SIZE)
+    suffixes = rng.integers(0, len(TEXT_SUFFIXES), size)
+    fragments = rng.integers(0, 1000, size)
+
+    rows = []
+    for i in range(size):
+        category = CATEGORIES[categories[i]]
+        pool = TEXT_FRAGMENTS[category]
+        rows.append({
+            "feedback_text": pool[fragments[i] % len(pool)] + TEXT_SUFFIXES[suffixes[i]],
+            "category": category,
+            "urgency_score": int(urgencies[i]),
+            "client_ip": f"10.{ips[i] // 65536 % 256}.{ips[i] // 256 % 256}.{ips[i] % 256}",
+            "processing_time_ms": round(float(processing[i]), 2),
+            "created_at": EPOCH + timedelta(seconds=float(created[i])),
+        })
+    return rows
+
+
+async def count_rows(engine: AsyncEngine) -> int:
+    from src.models.database import FeedbackRecord
+
+    async with engine.connect() as conn:
+        return (await conn.execute(select(func.count(FeedbackRecord.id)))).scalar()
+
+
+async def is_compact(engine: AsyncEngine) -> bool:
+    """False for datasets generated before the schema-version-4 column encodings."""
+    async with engine.connect() as conn:
+        columns = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_columns("feedback_records"))
+    return any(column["name"] == "content_hash" for column in columns)
+
+
+async def generate(engine: AsyncEngine, rows: int, batch_size: int = 10000, seed: int = 42) -> float:
+    """Create the schema and insert ``rows`` records; returns rows per second."""
+    from src.database.connection import Base
+    from src.models.database import FeedbackRecord
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    if engine.dialect.name == "sqlite":
+        # Persistent setting; keeps the bulk load from fsyncing a rollback journal per batch
+        async with engine.connect() as conn:
+            await conn.execute(text("PRAGMA journal_mode=WAL"))
+
+    rng = np.random.default_rng(seed)
+    now = datetime.utcnow()
+    start = time.perf_counter()
+    inserted = 0
+    while inserted < rows:
+        batch = generate_batch(rng, min(batch_size, rows - inserted), now)
+        async with engine.begin() as conn:
+            await conn.execute(insert(FeedbackRecord.__table__), batch)
+        inserted += len(batch)
+        if inserted % (batch_size * 50) == 0 or inserted == rows:
+            print(f"  inserted {inserted:,}/{rows:,} rows")
+
+    async with engine.begin() as conn:
+        await conn.execute(text("ANALYZE"))
+    return inserted / (time.perf_counter() - start)
+
+
+async def ensure_dataset(database_url: str, rows: int, seed: int = 42) -> AsyncEngine:
+    """Return an engine for ``database_url``, generating the data unless it already has ``rows`` rows."""
+    engine = create_async_engine(database_url)
+    try:
+        existing = await count_rows(engine)
+    except Exception:
+        existing = None
+    if existing != rows:
+        if existing:
+            raise SystemExit(f"{database_url} holds {existing} rows, expected {rows}; use a fresh database")
+        print(f"Generating {rows:,} rows into {database_url}")
+        rate = await generate(engine, rows, seed=seed)
+        print(f"  {rate:,.0f} rows/s")
+    elif not await is_compact(engine):
+        raise SystemExit(f"{database_url} uses the pre-compact row layout; delete it to regenerate")
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, required=True)
+    parser.add_argument("--database-url", required=True)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    async def run():
+        engine = await ensure_dataset(args.database_url, args.rows, args.seed)
+        await engine.dispose()
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""OpenAI-compatible stub server for benchmarks that run the API out of process.
+
+Usage (from backend/):
+
+    python -m benchmarks.stub_llm_server --port 8900 --latency-ms 300
+
+Point the API at it with ``LLM_BASE_URL=http://127.0.0.1:8900/v1``. Chat
+completions return a random valid classification after a log-normal delay,
+like ``StubLLMClient`` does in-process.
+"""
+import argparse
+import json
+
+from .common import StubCompletions
+
+
+def create_app(median_ms: float, sigma: float = 0.35):
+    completions = StubCompletions(median_ms, sigma)
+
+    async def send_json(send, payload, status: int = 200):
+        body = json.dumps(payload).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        # Drain the request body
+        more = True
+        while more:
+            message = await receive()
+            more = message.get("more_body", False)
+
+        if scope["path"].endswith("/models"):
+            await send_json(send, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "bench"}]})
+            return
+        if not scope["path"].endswith("/chat/completions"):
+            await send_json(send, {"error": {"message": "not found"}}, status=404)
+            return
+
+        result = await completions.create(model="stub", messages=[])
+        await send_json(send, {
+            "id": f"chatcmpl-{completions.calls}",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": result.choices[0].message.content},
+            }],
+            "usage": vars(result.usage),
+        })
+
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency-ms", type=float, default=300.0)
+    args = parser.parse_args()
+    uvicorn.run(create_app(args.latency_ms), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
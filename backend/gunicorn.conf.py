@@ -0,0 +1,52 @@
+"""Gunicorn settings for running the API on every core.
+
+    gunicorn -c gunicorn.conf.py src.main:app
+
+The app is imported once in the master (``preload_app``) and forked, so
+workers boot quickly and share the imported code's memory pages. The schema
+check, of every shard when ``SQLITE_SHARDS`` is set, runs once in the master
+before forking rather than racing in every worker. Workers share rate limits,
+metrics and request profiles through ``SHARED_STATE_DIR`` (see
+``src/services/shared_state.py``).
+"""
+import asyncio
+import multiprocessing
+import os
+import shutil
+import tempfile
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", multiprocessing.cpu_count()))
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = True
+# Matches the LLM client timeout, so in-flight triage requests can finish on reload
+graceful_timeout = 30
+timeout = 60
+keepalive = 5
+accesslog = None
+
+# Must be set before the app is preloaded, since modules read it at import time
+_owns_state_dir = not os.getenv("SHARED_STATE_DIR")
+if _owns_state_dir:
+    os.environ["SHARED_STATE_DIR"] = tempfile.mkdtemp(prefix="feedback-triage-")
+
+
+def when_ready(server):
+    # Runs in the master after preloading and before the first fork
+    from src.database.connection import engine, init_db
+    from src.database.sharding import init_shards, shards
+
+    async def migrate():
+        await init_db()
+        await init_shards()
+        # Workers must not inherit connections opened on this event loop
+        await engine.dispose()
+        await shards.dispose()
+
+    asyncio.run(migrate())
+    server.log.info(f"Shared worker state in {os.environ['SHARED_STATE_DIR']}")
+
+
+def on_exit(server):
+    if _owns_state_dir:
+        shutil.rmtree(os.environ["SHARED_STATE_DIR"], ignore_errors=True)
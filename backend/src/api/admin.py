@@ -0,0 +1,78 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional, Dict, Any
+import asyncio
+import logging
+import threading
+import time
+
+from ..services import profiling
+from ..services.profiling import memory_profiler, request_profiles, sample_stacks
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+_cpu_profile_lock = asyncio.Lock()
+
+async def require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Hide the admin endpoints unless profiling is enabled, and check the token."""
+    if not profiling.profiling_available():
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not profiling.is_admin_token(x_admin_token):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+@router.post("/admin/profile/cpu", dependencies=[Depends(require_admin)])
+async def profile_cpu(
+    seconds: float = Query(10.0, gt=0, le=120, description="Sampling duration"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="Sampling interval")
+) -> PlainTextResponse:
+    """Sample the event loop thread and return collapsed stacks for a flamegraph."""
+    if _cpu_profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A CPU profile is already running")
+
+    async with _cpu_profile_lock:
+        loop_thread_id = threading.get_ident()
+        logger.info(f"Sampling event loop for {seconds}s every {interval_ms}ms")
+        collapsed = await asyncio.to_thread(
+            sample_stacks, loop_thread_id, seconds, interval_ms / 1000
+        )
+
+    filename = f"cpu-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    return PlainTextResponse(
+        collapsed,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.post("/admin/profile/memory/snapshot", dependencies=[Depends(require_admin)])
+async def memory_snapshot(
+    limit: int = Query(25, ge=1, le=500)
+) -> Dict[str, Any]:
+    """Start tracemalloc if needed and take the baseline snapshot for later diffs."""
+    top = await asyncio.to_thread(memory_profiler.snapshot, limit)
+    return {"tracing": memory_profiler.tracing, "top": top}
+
+@router.get("/admin/profile/memory/diff", dependencies=[Depends(require_admin)])
+async def memory_diff(
+    limit: int = Query(25, ge=1, le=500)
+) -> Dict[str, Any]:
+    """Allocation growth by source line since the last snapshot."""
+    try:
+        growth = await asyncio.to_thread(memory_profiler.diff, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    return {"tracing": memory_profiler.tracing, "growth": growth}
+
+@router.delete("/admin/profile/memory", dependencies=[Depends(require_admin)])
+async def memory_stop() -> Dict[str, Any]:
+    """Stop tracemalloc and drop the baseline."""
+    memory_profiler.stop()
+    return {"tracing": memory_profiler.tracing}
+
+@router.get("/admin/profile/requests/{profile_id}", dependencies=[Depends(require_admin)])
+async def get_request_profile(profile_id: str) -> PlainTextResponse:
+    """Fetch a per-request profile recorded via the X-Profile-Request header."""
+    report = request_profiles.get(profile_id)
+    if report is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(report)
@@ -1,16 +1,33 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Optional, Dict, Any
+from typing import List, Literal, Optional, Dict, Any
+import asyncio
 import logging
 
 from ..services.feedback_service import FeedbackService
-from ..database.connection import get_db
-from ..models.database import FeedbackRecord
+from ..database.connection import get_db, get_session_factory
+from ..database.sharding import shards
+from ..models.database import FeedbackRecord, DICT_FIELDS
+from ..services.llm_service import TIER_PRIMARY
+from ..services.incident_clustering import INCIDENT_CLUSTERING_ENABLED, INCIDENT_WINDOW_HOURS
+from ..services.heavy_hitters import submitter_tracker, HEAVY_HITTERS_ENABLED
+from ..services.llm_usage import usage_report
+from ..services.volume_anomalies import volume_detector, VOLUME_ANOMALY_ENABLED
+from .triage import llm_service
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+def rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    """Map column-only row tuples to the ``FeedbackRecord.to_dict()`` shape.
+    
+    Timestamps stay as datetime objects; orjson encodes them in the same
+    ISO 8601 form ``to_dict()`` produces with ``isoformat()``.
+    """
+    return [dict(zip(DICT_FIELDS, row)) for row in rows]
+
 @router.get("/dashboard/stats")
 async def get_dashboard_stats(
     days_back: int = Query(30, ge=1, le=365, description="Number of days back to analyze"),
@@ -25,6 +42,42 @@ async def get_dashboard_stats(
         logger.error(f"Error getting dashboard stats: {str(e)}")
         raise
 
+async def feedback_page(
+    db: AsyncSession,
+    limit: int,
+    offset: int = 0,
+    category: Optional[str] = None,
+    urgency_min: Optional[int] = None,
+    urgency_max: Optional[int] = None,
+    days_back: Optional[int] = None
+) -> Dict[str, Any]:
+    feedback_service = FeedbackService(db)
+    records = await feedback_service.get_feedback_history(
+        limit=limit,
+        offset=offset,
+        category=category,
+        urgency_min=urgency_min,
+        urgency_max=urgency_max,
+        days_back=days_back,
+        rows=True
+    )
+    
+    # Encode row tuples straight to JSON, skipping ORM loading and jsonable_encoder
+    feedback_list = rows_to_dicts(records)
+    
+    return {
+        "feedback": feedback_list,
+        "count": len(feedback_list),
+        "offset": offset,
+        "limit": limit,
+        "filters": {
+            "category": category,
+            "urgency_min": urgency_min,
+            "urgency_max": urgency_max,
+            "days_back": days_back
+        }
+    }
+
 @router.get("/dashboard/feedback")
 async def get_feedback_history(
     limit: int = Query(50, ge=1, le=1000, description="Number of records to return"),
@@ -34,68 +87,165 @@ async def get_feedback_history(
     urgency_max: Optional[int] = Query(None, ge=1, le=5, description="Maximum urgency score"),
     days_back: Optional[int] = Query(None, ge=1, le=365, description="Filter by days back"),
     db: AsyncSession = Depends(get_db)
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """Get paginated feedback history with optional filters."""
     try:
-        feedback_service = FeedbackService(db)
-        records = await feedback_service.get_feedback_history(
+        return ORJSONResponse(await feedback_page(
+            db,
             limit=limit,
             offset=offset,
             category=category,
             urgency_min=urgency_min,
             urgency_max=urgency_max,
             days_back=days_back
-        )
-        
-        # Convert to dictionaries
-        feedback_list = [record.to_dict() for record in records]
-        
-        return {
-            "feedback": feedback_list,
-            "count": len(feedback_list),
-            "offset": offset,
-            "limit": limit,
-            "filters": {
-                "category": category,
-                "urgency_min": urgency_min,
-                "urgency_max": urgency_max,
-                "days_back": days_back
-            }
-        }
+        ))
     except Exception as e:
         logger.error(f"Error getting feedback history: {str(e)}")
         raise
 
+@router.get("/dashboard/bootstrap")
+async def get_dashboard_bootstrap(
+    days_back: int = Query(30, ge=1, le=365, description="Number of days back to analyze"),
+    limit: int = Query(100, ge=1, le=1000, description="Size of the first history page"),
+    session_factory = Depends(get_session_factory)
+) -> ORJSONResponse:
+    """Everything the dashboard needs on load: stats, the first history page and the categories.
+    
+    Stats and history run concurrently, each on its own pooled connection.
+    """
+    async def stats():
+        async with session_factory() as db:
+            return await FeedbackService(db).get_dashboard_stats(days_back=days_back)
+    
+    async def history():
+        async with session_factory() as db:
+            return await feedback_page(db, limit=limit)
+    
+    try:
+        stats_result, history_result = await asyncio.gather(stats(), history())
+        return ORJSONResponse({
+            "stats": stats_result,
+            "feedback": history_result,
+            "categories": category_metadata()
+        })
+    except Exception as e:
+        logger.error(f"Error getting dashboard bootstrap: {str(e)}")
+        raise
+
 @router.get("/dashboard/search")
 async def search_feedback(
     q: str = Query(..., min_length=1, description="Search term"),
     limit: int = Query(50, ge=1, le=200, description="Number of results to return"),
     db: AsyncSession = Depends(get_db)
-) -> Dict[str, Any]:
+) -> ORJSONResponse:
     """Search feedback by text content."""
     try:
         feedback_service = FeedbackService(db)
         records = await feedback_service.search_feedback(
             search_term=q,
-            limit=limit
+            limit=limit,
+            rows=True
         )
         
-        feedback_list = [record.to_dict() for record in records]
+        feedback_list = rows_to_dicts(records)
         
-        return {
+        return ORJSONResponse({
             "feedback": feedback_list,
             "count": len(feedback_list),
             "search_term": q
-        }
+        })
     except Exception as e:
         logger.error(f"Error searching feedback: {str(e)}")
         raise
 
-@router.get("/dashboard/categories")
-async def get_available_categories(
+@router.get("/dashboard/incidents")
+async def get_incidents(
+    limit: int = Query(20, ge=1, le=100, description="Number of clusters to return"),
+    min_count: int = Query(1, ge=1, description="Minimum reports per cluster"),
     db: AsyncSession = Depends(get_db)
 ) -> Dict[str, Any]:
-    """Get list of available feedback categories for filtering."""
+    """Active clusters of similar urgent bug reports, largest first."""
+    if not INCIDENT_CLUSTERING_ENABLED:
+        raise HTTPException(status_code=404, detail="Incident clustering is disabled")
+    if shards.enabled:
+        raise HTTPException(status_code=404, detail="Incident clustering is not available with sharded storage")
+    try:
+        feedback_service = FeedbackService(db)
+        incidents = await feedback_service.get_active_incidents(limit=limit, min_count=min_count)
+        return {
+            "incidents": incidents,
+            "count": len(incidents),
+            "window_hours": INCIDENT_WINDOW_HOURS
+        }
+    except Exception as e:
+        logger.error(f"Error getting incidents: {str(e)}")
+        raise
+
+@router.get("/dashboard/anomalies")
+async def get_volume_anomalies(
+    limit: int = Query(20, ge=1, le=100, description="Number of spikes to return")
+) -> Dict[str, Any]:
+    """Recent per-minute volume spikes per category and urgency, newest first."""
+    if not VOLUME_ANOMALY_ENABLED:
+        raise HTTPException(status_code=404, detail="Volume anomaly detection is disabled")
+    spikes = volume_detector.recent_spikes(limit=limit)
+    return {
+        "spikes": spikes,
+        "count": len(spikes),
+        "baselines": volume_detector.baselines(),
+        "threshold": volume_detector.threshold,
+        "min_count": volume_detector.min_count
+    }
+
+@router.get("/dashboard/submitters")
+async def get_top_submitters(
+    limit: int = Query(10, ge=1, le=100, description="Number of submitters to return"),
+    by: Literal["requests", "tokens"] = Query("requests", description="Rank by request count or LLM tokens"),
+    window: Literal["current", "previous"] = Query("current", description="Time window")
+) -> Dict[str, Any]:
+    """Approximate top client IPs of a time window, from in-memory sketches."""
+    if not HEAVY_HITTERS_ENABLED:
+        raise HTTPException(status_code=404, detail="Heavy-hitter tracking is disabled")
+    return submitter_tracker.top_submitters(limit=limit, by=by, previous=window == "previous")
+
+@router.get("/dashboard/llm-tiers")
+async def get_llm_tier_stats(
+    days_back: int = Query(30, ge=1, le=365, description="Number of days back to analyze"),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """Which model tier answered, and how often the cascade escalated."""
+    try:
+        feedback_service = FeedbackService(db)
+        tiers = await feedback_service.get_model_tier_stats(days_back=days_back)
+        total = sum(tier["count"] for tier in tiers.values())
+        escalation_rate = None
+        if llm_service.cascade_model and total:
+            escalation_rate = round(tiers.get(TIER_PRIMARY, {}).get("count", 0) / total, 4)
+        
+        return {
+            "cascade_model": llm_service.cascade_model,
+            "primary_model": llm_service.model,
+            "tiers": tiers,
+            "escalation_rate": escalation_rate,
+            "time_period_days": days_back
+        }
+    except Exception as e:
+        logger.error(f"Error getting LLM tier stats: {str(e)}")
+        raise
+
+@router.get("/dashboard/llm-usage")
+async def get_llm_usage(
+    hours: int = Query(24, ge=1, le=24 * 90, description="Number of hours back to report"),
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """Hourly LLM tokens and cost, and headroom against the provider's per-minute quotas."""
+    try:
+        return await usage_report(db, hours=hours)
+    except Exception as e:
+        logger.error(f"Error getting LLM usage: {str(e)}")
+        raise
+
+def category_metadata() -> Dict[str, Any]:
     categories = [
         "Bug Report",
         "Feature Request", 
@@ -114,4 +264,11 @@ async def get_available_categories(
     return {
         "categories": categories,
         "urgency_levels": urgency_levels
-    }
\ No newline at end of file
+    }
+
+@router.get("/dashboard/categories")
+async def get_available_categories(
+    db: AsyncSession = Depends(get_db)
+) -> Dict[str, Any]:
+    """Get list of available feedback categories for filtering."""
+    return category_metadata()
@@ -0,0 +1,127 @@
+"""WebSocket ingestion for producers that stream feedback continuously.
+
+One connection carries many triage requests, so producers skip per-request
+connection handling, middleware and dependency setup. JSON text frames:
+
+- on connect the server sends ``{"type": "credit", "credit": N}``;
+- the client sends ``{"id": <string or integer>, "text": "..."}``;
+- the server answers each message, in completion order, with
+  ``{"type": "result", "id": ..., "status_code": 200, "result": {...}}`` or
+  ``{"type": "error", "id": ..., "status_code": ..., "error": ..., "message": ...}``.
+
+With ``/triage/stream?anomalies=true`` the server also sends
+``{"type": "anomaly", "spike": {...}}`` when the volume anomaly detector
+flags a spike; these replies carry no credit.
+
+Credit-based flow control: each message uses one credit and each reply
+returns it, so at most N requests per connection are in progress or waiting
+to be sent. A client that sends without credit is closed with code 1008; one
+that stops reading replies stops getting credit back, and the server stops
+taking its messages instead of buffering them.
+"""
+import asyncio
+import logging
+import os
+from typing import Any, Dict, Tuple, Union
+
+import orjson
+from fastapi import APIRouter, WebSocket
+from pydantic import ValidationError
+
+from ..database.connection import AsyncSessionLocal
+from ..models.triage import ErrorResponse, TriageRequest
+from ..services.volume_anomalies import volume_detector
+from .triage import triage_text
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+WS_INGEST_CREDITS = int(os.getenv("WS_INGEST_CREDITS", "32"))
+MAX_ID_LENGTH = 255
+# RFC 6455 "policy violation"
+CLOSE_CREDIT_EXCEEDED = 1008
+
+
+def error_reply(message_id: Any, status_code: int, error: str, message: str) -> Dict[str, Any]:
+    return {"type": "error", "id": message_id, **ErrorResponse(error=error, message=message, status_code=status_code).model_dump()}
+
+
+def parse_message(frame: Union[str, bytes]) -> Tuple[Any, Union[TriageRequest, Dict[str, Any]]]:
+    """The message id and request, or the id (None if unknown) and an error reply."""
+    try:
+        data = orjson.loads(frame)
+    except orjson.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return None, error_reply(None, 400, "Validation Error", "Messages must be JSON objects.")
+
+    message_id = data.get("id")
+    valid_id = isinstance(message_id, int) and not isinstance(message_id, bool)
+    valid_id = valid_id or (isinstance(message_id, str) and 0 < len(message_id) <= MAX_ID_LENGTH)
+    if not valid_id:
+        return None, error_reply(None, 400, "Validation Error", "Every message needs an \"id\" (string or integer).")
+
+    try:
+        return message_id, TriageRequest(text=data.get("text"))
+    except ValidationError as e:
+        return message_id, error_reply(message_id, 422, "Validation Error", e.errors()[0]["msg"])
+
+
+@router.websocket("/triage/stream")
+async def triage_stream(websocket: WebSocket):
+    await websocket.accept()
+    client_ip = websocket.client.host if websocket.client else "unknown"
+    replies: asyncio.Queue = asyncio.Queue()
+    tasks = set()
+    # Messages received and not yet answered; never above WS_INGEST_CREDITS
+    outstanding = 0
+
+    async def handle(message_id: Any, request: TriageRequest):
+        async with AsyncSessionLocal() as db:
+            status_code, content = await triage_text(request.text, client_ip, db)
+        if status_code == 200:
+            replies.put_nowait({"type": "result", "id": message_id, "status_code": 200, "result": content})
+        else:
+            replies.put_nowait({"type": "error", "id": message_id, **content})
+
+    async def write():
+        nonlocal outstanding
+        while True:
+            reply = await replies.get()
+            # Returned before sending, so a client answering immediately is never over its credit
+            if reply["type"] != "anomaly":
+                outstanding -= 1
+            await websocket.send_text(orjson.dumps(reply).decode())
+
+    watch_anomalies = websocket.query_params.get("anomalies", "").lower() == "true"
+    if watch_anomalies:
+        volume_detector.subscribe(replies)
+    writer = asyncio.create_task(write())
+    try:
+        await websocket.send_text(orjson.dumps({"type": "credit", "credit": WS_INGEST_CREDITS}).decode())
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            if outstanding >= WS_INGEST_CREDITS:
+                logger.warning(f"Closing triage stream from {client_ip}: sent without credit")
+                await websocket.close(code=CLOSE_CREDIT_EXCEEDED, reason="Credit exceeded")
+                break
+            outstanding += 1
+
+            message_id, parsed = parse_message(message.get("text") or message.get("bytes") or b"")
+            if isinstance(parsed, dict):
+                replies.put_nowait(parsed)
+                continue
+            task = asyncio.create_task(handle(message_id, parsed))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        if watch_anomalies:
+            volume_detector.unsubscribe(replies)
+        # Requests already started are still classified and stored; replies
+        # that can no longer be delivered are dropped
+        await asyncio.gather(*tasks, return_exceptions=True)
+        writer.cancel()
+        await asyncio.gather(writer, return_exceptions=True)
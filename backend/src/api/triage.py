@@ -1,119 +1,201 @@
-from fastapi import APIRouter, HTTPException, Request, Depends
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Request, Depends, Header
+from fastapi.responses import JSONResponse, Response
 from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional, Tuple
+import asyncio
 import logging
 import time
 import os
-from collections import defaultdict, deque
 
 from ..models.triage import TriageRequest, TriageResponse, ErrorResponse
-from ..services.llm_service import LLMService
+from ..services.llm_service import InvalidFeedback, LLMService
 from ..services.feedback_service import FeedbackService
 from ..database.connection import get_db
+from ..services.metrics import TRIAGE_STAGE_DURATION
+from ..services.rate_limiter import create_rate_limiter
+from ..services.heavy_hitters import submitter_tracker, HEAVY_HITTERS_ENABLED
+from ..services.idempotency import (
+    MAX_KEY_LENGTH, IdempotencyConflict, IdempotencyInProgress, IdempotencyUnavailable, StoredResponse,
+    create_idempotency_store, key_digest, new_owner, renew_periodically, request_fingerprint
+)
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 llm_service = LLMService()
 
-# Simple rate limiting: max 10 requests per minute per IP
-rate_limit_requests = defaultdict(lambda: deque())
+# Simple rate limiting: max 10 requests per minute per IP, shared by all workers
+rate_limiter = create_rate_limiter()
 RATE_LIMIT_MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", "10"))
 RATE_LIMIT_WINDOW = int(os.getenv("RATE_LIMIT_WINDOW", "60"))  # seconds
 
-def check_rate_limit(client_ip: str) -> bool:
+async def check_rate_limit(client_ip: str) -> bool:
     """Check if client has exceeded rate limit."""
     # Skip rate limiting in test environment
     if os.getenv("TESTING") == "true":
         return True
-        
-    now = time.time()
-    requests = rate_limit_requests[client_ip]
-    
-    # Remove old requests outside the time window
-    while requests and requests[0] <= now - RATE_LIMIT_WINDOW:
-        requests.popleft()
     
-    # Check if under limit
-    if len(requests) >= RATE_LIMIT_MAX_REQUESTS:
-        return False
-    
-    # Add current request
-    requests.append(now)
-    return True
+    # Sources dominating recent volume get a tighter limit when throttling is configured
+    max_requests = submitter_tracker.rate_limit_for(client_ip, RATE_LIMIT_MAX_REQUESTS)
+    return await rate_limiter.check(client_ip, max_requests, RATE_LIMIT_WINDOW)
 
 def clear_rate_limits():
     """Clear all rate limit data - useful for testing."""
-    rate_limit_requests.clear()
+    rate_limiter.clear()
+
+# Retries carrying the same Idempotency-Key replay the first response
+idempotency_store = create_idempotency_store()
+# Outcomes a retry would reproduce: success and invalid feedback (400 is only
+# used for InvalidFeedback). Rate limits and server errors are retried for real
+REPLAYED_STATUS_CODES = (200, 400)
+
+def error_json(status_code: int, error: str, message: str, headers: Optional[dict] = None) -> JSONResponse:
+    error_response = ErrorResponse(error=error, message=message, status_code=status_code)
+    return JSONResponse(status_code=status_code, content=error_response.model_dump(), headers=headers)
 
 @router.post("/triage", response_model=TriageResponse)
 async def triage_feedback(
     request: TriageRequest, 
     http_request: Request,
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_db),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key", min_length=1, max_length=MAX_KEY_LENGTH)
 ):
-    start_time = time.time()
+    if idempotency_key is None:
+        return await process_triage(request, http_request, db)
+    
+    digest = key_digest(idempotency_key)
+    owner = new_owner()
+    try:
+        stored = await idempotency_store.acquire(digest, request_fingerprint(request.text), owner)
+    except IdempotencyConflict:
+        return error_json(422, "Idempotency Key Reused", "This Idempotency-Key was already used for a different request.")
+    except IdempotencyInProgress:
+        return error_json(
+            409, "Request In Progress", "A request with this Idempotency-Key is still being processed.",
+            headers={"Retry-After": "5"}
+        )
+    except IdempotencyUnavailable:
+        return error_json(
+            503, "Service Unavailable", "Idempotency keys cannot be checked right now. Please retry shortly.",
+            headers={"Retry-After": "1"}
+        )
+    if stored is not None:
+        return Response(
+            content=stored.body,
+            status_code=stored.status_code,
+            media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+    
+    response = None
+    renewal = None
+    if idempotency_store.leased:
+        # The shared store's claim is a lease; keep it while the request runs
+        renewal = asyncio.create_task(renew_periodically(idempotency_store, digest, owner))
+    try:
+        response = await process_triage(request, http_request, db)
+    finally:
+        if renewal is not None:
+            renewal.cancel()
+        if response is not None and response.status_code in REPLAYED_STATUS_CODES:
+            await idempotency_store.complete(digest, owner, StoredResponse(response.status_code, bytes(response.body)))
+        else:
+            await idempotency_store.release(digest, owner)
+    return response
+
+async def process_triage(request: TriageRequest, http_request: Request, db: AsyncSession) -> JSONResponse:
+    client_ip = http_request.client.host if http_request.client else "unknown"
+    status_code, content = await triage_text(request.text, client_ip, db)
+    headers = {"Retry-After": "60"} if status_code == 429 else None
+    return JSONResponse(status_code=status_code, content=content, headers=headers)
+
+async def triage_text(text: str, client_ip: str, db: AsyncSession) -> Tuple[int, dict]:
+    """Classify and store one feedback text; returns the status code and JSON body.
+    
+    Shared by ``POST /triage`` and the WebSocket stream.
+    """
+    start_time = time.perf_counter()
     
     try:
         # Rate limiting check
-        client_ip = http_request.client.host if http_request.client else "unknown"
-        if not check_rate_limit(client_ip):
+        with TRIAGE_STAGE_DURATION.time("rate_limit"):
+            allowed = await check_rate_limit(client_ip)
+        if not allowed:
             error_response = ErrorResponse(
                 error="Rate Limit Exceeded",
                 message="Too many requests. Please wait before trying again.",
                 status_code=429
             )
-            return JSONResponse(
-                status_code=429,
-                content=error_response.model_dump(),
-                headers={"Retry-After": "60"}
-            )
+            return 429, error_response.model_dump()
         
-        # Additional input validation
-        if not request.text or not request.text.strip():
-            raise ValueError("Feedback text cannot be empty or whitespace only")
-        
-        # Remove excessive whitespace
-        cleaned_text = " ".join(request.text.strip().split())
+        with TRIAGE_STAGE_DURATION.time("validation"):
+            # Additional input validation
+            if not text or not text.strip():
+                raise InvalidFeedback("Feedback text cannot be empty or whitespace only")
+            
+            # Remove excessive whitespace
+            cleaned_text = " ".join(text.strip().split())
         
         logger.info(f"Processing feedback triage for text: {cleaned_text[:50]}...")
         
-        # Analyze feedback with LLM
+        # Analyze feedback with LLM (llm and parse stages are timed inside LLMService)
         result = await llm_service.analyze_feedback(cleaned_text)
         
-        # Calculate processing time
-        processing_time_ms = (time.time() - start_time) * 1000
+        # The stored value cannot include its own insert, which is timed separately below
+        analysis_time_ms = (time.perf_counter() - start_time) * 1000
         
         # Store in database
-        feedback_service = FeedbackService(db)
-        await feedback_service.create_feedback_record(
-            feedback_text=cleaned_text,
-            category=result["category"],
-            urgency_score=result["urgency_score"],
-            client_ip=client_ip,
-            processing_time_ms=processing_time_ms
-        )
+        db_start = time.perf_counter()
+        with TRIAGE_STAGE_DURATION.time("db_commit"):
+            feedback_service = FeedbackService(db)
+            await feedback_service.create_feedback_record(
+                feedback_text=cleaned_text,
+                category=result["category"],
+                urgency_score=result["urgency_score"],
+                client_ip=client_ip,
+                processing_time_ms=analysis_time_ms,
+                model_tier=result.get("model_tier"),
+                llm_prompt_tokens=result.get("llm_prompt_tokens"),
+                llm_completion_tokens=result.get("llm_completion_tokens"),
+                llm_cost_usd=result.get("llm_cost_usd"),
+                llm_latency_ms=result.get("llm_latency_ms"),
+                llm_usage_estimated=result.get("llm_usage_estimated", False)
+            )
+        db_time_ms = (time.perf_counter() - db_start) * 1000
+        processing_time_ms = (time.perf_counter() - start_time) * 1000
+        if HEAVY_HITTERS_ENABLED:
+            submitter_tracker.record(client_ip, result["category"], result.get("llm_tokens", 0))
         
-        response = TriageResponse(
-            feedback_text=cleaned_text,
-            category=result["category"],
-            urgency_score=result["urgency_score"]
-        )
+        # Serialize here rather than via response_model so the stage can be timed
+        with TRIAGE_STAGE_DURATION.time("serialization"):
+            response = TriageResponse(
+                feedback_text=cleaned_text,
+                category=result["category"],
+                urgency_score=result["urgency_score"]
+            )
+            content = response.model_dump(mode="json")
         
-        logger.info(f"Triage completed: {result['category']}, urgency: {result['urgency_score']}, time: {processing_time_ms:.2f}ms")
-        return response
+        logger.info(f"Triage completed: {result['category']}, urgency: {result['urgency_score']}, time: {processing_time_ms:.2f}ms (insert {db_time_ms:.2f}ms)")
+        return 200, content
         
-    except ValueError as e:
+    except InvalidFeedback as e:
         logger.warning(f"Validation error: {str(e)}")
         error_response = ErrorResponse(
             error="Validation Error",
             message=str(e),
             status_code=400
         )
-        return JSONResponse(
-            status_code=400,
-            content=error_response.model_dump()
+        return 400, error_response.model_dump()
+        
+    except ValueError as e:
+        # The LLM's reply was still invalid after the repair request; not the client's fault
+        logger.error(f"Invalid LLM reply: {str(e)}")
+        error_response = ErrorResponse(
+            error="Invalid LLM Response",
+            message="The classifier returned an invalid reply. Please try again later.",
+            status_code=502
         )
+        return 502, error_response.model_dump()
         
     except Exception as e:
         logger.error(f"Internal server error: {str(e)}")
@@ -122,7 +204,4 @@ async def triage_feedback(
             message="An error occurred while processing the feedback. Please try again later.",
             status_code=500
         )
-        return JSONResponse(
-            status_code=500,
-            content=error_response.model_dump()
-        )
\ No newline at end of file
+        return 500, error_response.model_dump()
@@ -1,17 +1,51 @@
 import os
+import time
+import logging
+from typing import Optional
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, Table, Column, Integer, select, delete, insert, inspect
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..services.metrics import DB_POOL_WAIT
+from .migrations import MIGRATIONS, SCHEMA_VERSION
+
+logger = logging.getLogger(__name__)
 
 # Database configuration
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./feedback_triage.db")
 
+def instrument_pool(pool):
+    """Record pool checkout wait time (including connects) in ``db_pool_wait_seconds``.
+    
+    The pool's class is swapped for a subclass so the timing survives
+    ``pool.recreate()``, which instantiates ``type(pool)``.
+    """
+    base = type(pool)
+    
+    class TimedPool(base):
+        def _do_get(self):
+            start = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                DB_POOL_WAIT.observe(time.perf_counter() - start)
+    
+    TimedPool.__name__ = f"Timed{base.__name__}"
+    pool.__class__ = TimedPool
+
+def create_engine(url: str):
+    """Async engine for ``url`` with pool wait timing."""
+    new_engine = create_async_engine(
+        url,
+        echo=os.getenv("SQL_DEBUG", "false").lower() == "true",
+        connect_args={"check_same_thread": False} if "sqlite" in url else {}
+    )
+    instrument_pool(new_engine.sync_engine.pool)
+    return new_engine
+
 # Create async engine
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=os.getenv("SQL_DEBUG", "false").lower() == "true",
-    connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
-)
+engine = create_engine(DATABASE_URL)
 
 # Create async session factory
 AsyncSessionLocal = sessionmaker(
@@ -24,6 +58,13 @@ AsyncSessionLocal = sessionmaker(
 class Base(DeclarativeBase):
     metadata = MetaData()
 
+# Single-row table holding the schema version the database was built or migrated to
+schema_version_table = Table(
+    "schema_version",
+    Base.metadata,
+    Column("version", Integer, nullable=False)
+)
+
 # Dependency to get database session
 async def get_db():
     async with AsyncSessionLocal() as session:
@@ -32,7 +73,46 @@ async def get_db():
         finally:
             await session.close()
 
+def get_session_factory():
+    """Dependency for endpoints that run queries concurrently, one session each."""
+    return AsyncSessionLocal
+
+async def get_schema_version(bind=None) -> Optional[int]:
+    """Read the stamped schema version; None if the database is not versioned yet."""
+    try:
+        async with (bind or engine).connect() as conn:
+            result = await conn.execute(select(schema_version_table.c.version))
+            return result.scalar()
+    except SQLAlchemyError:
+        return None
+
 # Initialize database
-async def init_db():
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+async def init_db(bind=None):
+    """Bring the schema of ``bind`` (default: the main database) up to ``SCHEMA_VERSION``.
+    
+    An up-to-date database costs a single ``SELECT`` instead of running
+    ``create_all``'s per-table reflection on every boot.
+    """
+    bind = bind or engine
+    version = await get_schema_version(bind)
+    if version == SCHEMA_VERSION:
+        return
+    if version is not None and version > SCHEMA_VERSION:
+        logger.warning(f"Database schema version {version} is newer than this build ({SCHEMA_VERSION})")
+        return
+    
+    async with bind.begin() as conn:
+        if version is None:
+            has_records = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).has_table("feedback_records")
+            )
+            # Tables created before versioning get every migration; new databases none
+            version = 0 if has_records else SCHEMA_VERSION
+        
+        for step in range(version + 1, SCHEMA_VERSION + 1):
+            logger.info(f"Migrating database schema to version {step}")
+            await MIGRATIONS[step](conn)
+        
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(schema_version_table))
+        await conn.execute(insert(schema_version_table).values(version=SCHEMA_VERSION))
\ No newline at end of file
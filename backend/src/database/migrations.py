@@ -0,0 +1,176 @@
+"""Schema migrations applied by ``init_db`` to databases at an older version.
+
+Fresh databases are built with ``create_all`` and stamped with the current
+version, so a step only has to upgrade an existing database from the
+previous version. ``create_all`` runs after the steps and creates missing
+tables, but not new indexes or columns on existing tables; steps that add
+those must create them explicitly.
+"""
+import logging
+
+from sqlalchemy import MetaData, Table, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+logger = logging.getLogger(__name__)
+
+COPY_BATCH_SIZE = 10000
+
+
+async def _has_column(conn: AsyncConnection, table: str, column: str) -> bool:
+    # Unversioned tables may come from a newer create_all (e.g. benchmark datasets)
+    columns = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_columns(table))
+    return any(existing["name"] == column for existing in columns)
+
+
+async def _has_table(conn: AsyncConnection, table: str) -> bool:
+    return await conn.run_sync(lambda sync_conn: inspect(sync_conn).has_table(table))
+
+
+async def _drop_urgency_index(conn: AsyncConnection):
+    # Full scans of this index replaced created_at range searches in stats queries
+    await conn.execute(text("DROP INDEX IF EXISTS ix_feedback_records_urgency_score"))
+
+
+async def _add_model_tier(conn: AsyncConnection):
+    if await _has_column(conn, "feedback_records", "model_tier"):
+        return
+    await conn.execute(text("ALTER TABLE feedback_records ADD COLUMN model_tier VARCHAR(16)"))
+
+
+def _create_retriage_tables(sync_conn):
+    from ..models.database import RetriageDisagreement, RetriageRun
+
+    for table in (RetriageRun.__table__, RetriageDisagreement.__table__):
+        table.create(sync_conn, checkfirst=True)
+
+
+async def _add_retriage_tables(conn: AsyncConnection):
+    await conn.run_sync(_create_retriage_tables)
+
+
+def _copy_to_compact_table(sync_conn):
+    from ..models.database import FeedbackRecord
+    from ..models.types import CATEGORY_CODES, content_hash
+
+    dialect = sync_conn.dialect.name
+    unknown = {
+        category: count
+        for category, count in sync_conn.execute(
+            text("SELECT category, COUNT(*) FROM feedback_records GROUP BY category")
+        ).all()
+        if category not in CATEGORY_CODES
+    }
+    if unknown:
+        # Codes cannot hold other names; relabel these rows, then start again
+        raise ValueError(f"feedback_records has categories without a code (records per category): {unknown}")
+    sync_conn.execute(text("ALTER TABLE feedback_records RENAME TO feedback_records_old"))
+    # Index, constraint and sequence names are global, so free them for the new table
+    for index in inspect(sync_conn).get_indexes("feedback_records_old"):
+        sync_conn.execute(text(f"DROP INDEX {index['name']}"))
+    if dialect == "postgresql":
+        sync_conn.execute(text(
+            "ALTER TABLE feedback_records_old RENAME CONSTRAINT feedback_records_pkey TO feedback_records_old_pkey"
+        ))
+        sync_conn.execute(text("ALTER SEQUENCE feedback_records_id_seq RENAME TO feedback_records_old_id_seq"))
+    FeedbackRecord.__table__.create(sync_conn)
+
+    old = Table("feedback_records_old", MetaData(), autoload_with=sync_conn)
+    new_columns = set(FeedbackRecord.__table__.c.keys())
+    copied = 0
+    last_id = 0
+    while True:
+        rows = sync_conn.execute(
+            select(old).where(old.c.id > last_id).order_by(old.c.id).limit(COPY_BATCH_SIZE)
+        ).mappings().all()
+        if not rows:
+            break
+        batch = []
+        for row in rows:
+            values = {key: value for key, value in row.items() if key in new_columns}
+            values["content_hash"] = content_hash(values["feedback_text"])
+            batch.append(values)
+        sync_conn.execute(FeedbackRecord.__table__.insert(), batch)
+        copied += len(batch)
+        last_id = rows[-1]["id"]
+
+    sync_conn.execute(text("DROP TABLE feedback_records_old"))
+    if dialect == "postgresql":
+        max_id = sync_conn.execute(select(func.max(FeedbackRecord.id))).scalar()
+        if max_id:
+            sync_conn.execute(text(f"SELECT setval(pg_get_serial_sequence('feedback_records', 'id'), {max_id})"))
+    logger.info(f"Copied {copied} records to the compact feedback_records table")
+
+
+async def _compact_feedback_records(conn: AsyncConnection):
+    # Category and IP columns change type, which SQLite cannot ALTER: rebuild the
+    # table. SQLite keeps the freed pages in the file until VACUUM.
+    if await _has_column(conn, "feedback_records", "content_hash"):
+        return
+    await conn.run_sync(_copy_to_compact_table)
+
+
+async def _add_llm_usage(conn: AsyncConnection):
+    # create_all adds the llm_usage_hourly table; existing records have no usage
+    for column, column_type in (
+        ("llm_prompt_tokens", "INTEGER"),
+        ("llm_completion_tokens", "INTEGER"),
+        ("llm_cost_usd", "FLOAT"),
+        ("llm_latency_ms", "FLOAT"),
+    ):
+        if not await _has_column(conn, "feedback_records", column):
+            await conn.execute(text(f"ALTER TABLE feedback_records ADD COLUMN {column} {column_type}"))
+
+
+async def _add_estimated_usage(conn: AsyncConnection):
+    # Earlier usage is not marked as estimated. create_all adds llm_usage_hourly
+    # to databases older than version 5 after the steps
+    for table, column, column_type in (
+        ("feedback_records", "llm_usage_estimated", "BOOLEAN NOT NULL DEFAULT FALSE"),
+        ("llm_usage_hourly", "estimated_requests", "INTEGER NOT NULL DEFAULT 0"),
+        ("llm_usage_hourly", "estimated_tokens", "BIGINT NOT NULL DEFAULT 0"),
+    ):
+        if await _has_table(conn, table) and not await _has_column(conn, table, column):
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}"))
+
+
+async def _pad_short_text_hosts(conn: AsyncConnection):
+    # Text hosts of 3 or 15 bytes were stored in 4 or 16 bytes, which now read
+    # as packed addresses. Values that are not printable text are real
+    # 255.x.x.x or ff00::/8 addresses and stay as they are.
+    from ..models.types import _TEXT_HOST_PREFIX
+
+    if not await _has_table(conn, "feedback_records"):
+        return
+    rows = (await conn.execute(
+        text(
+            "SELECT id, client_ip FROM feedback_records "
+            "WHERE length(client_ip) IN (4, 16) AND substr(client_ip, 1, 1) = :prefix"
+        ),
+        {"prefix": _TEXT_HOST_PREFIX},
+    )).all()
+    padded = []
+    for row_id, value in rows:
+        value = bytes(value)
+        try:
+            if not value[1:].decode().isprintable():
+                continue
+        except UnicodeDecodeError:
+            continue
+        padded.append({"id": row_id, "client_ip": _TEXT_HOST_PREFIX + value})
+    if padded:
+        await conn.execute(text("UPDATE feedback_records SET client_ip = :client_ip WHERE id = :id"), padded)
+        logger.info(f"Re-encoded {len(padded)} text client hosts")
+
+
+# Target version -> upgrade step from the version before it
+MIGRATIONS = {
+    1: _drop_urgency_index,
+    2: _add_model_tier,
+    3: _add_retriage_tables,
+    4: _compact_feedback_records,
+    5: _add_llm_usage,
+    6: _add_estimated_usage,
+    7: _pad_short_text_hosts,
+}
+
+SCHEMA_VERSION = max(MIGRATIONS)
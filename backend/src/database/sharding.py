@@ -0,0 +1,123 @@
+"""Optional sharded SQLite storage for feedback records.
+
+SQLite allows one writer per database file, so on the default deployment
+every insert queues behind the same write lock. With ``SQLITE_SHARDS`` set
+above 1, records are spread over that many files: shard 0 is
+``DATABASE_URL`` and shard ``i`` the same path with ``.shard<i>`` before the
+extension. Each shard has its own engine and pool, and inserts to different
+shards commit in parallel.
+
+Inserts go to the shards in turn. Ids are assigned inside the insert as the
+next value above the shard's largest id that is congruent to the shard index
+modulo the shard count. Ids stay unique across shards and workers, and
+``id % SQLITE_SHARDS`` names the shard of any record stored while sharded.
+Queries that read records run on every shard concurrently and merge the
+results.
+
+Every shard carries the full schema. ``feedback_records`` and
+``llm_usage_hourly`` hold each shard's own records and their usage, and
+re-triage keeps a checkpoint per shard in that shard's ``retriage_runs`` and
+``retriage_disagreements``. The remaining tables are only used on shard 0.
+"""
+import asyncio
+import itertools
+import logging
+import os
+from typing import Any, Awaitable, Callable, List
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from .connection import DATABASE_URL, create_engine, engine, init_db
+
+logger = logging.getLogger(__name__)
+
+SQLITE_SHARDS = int(os.getenv("SQLITE_SHARDS", "1"))
+
+
+def shard_url(url: str, index: int) -> str:
+    """``sqlite+aiosqlite:///./feedback.db`` -> ``sqlite+aiosqlite:///./feedback.shard<index>.db``."""
+    base, dot, extension = url.rpartition(".")
+    if not dot or "/" in extension:
+        return f"{url}.shard{index}"
+    return f"{base}.shard{index}.{extension}"
+
+
+class ShardSet:
+    """Engines and session factories of the shards, shard 0 first."""
+
+    def __init__(self, engines: List[Any]):
+        self.engines = engines
+        self.session_factories = [
+            sessionmaker(shard_engine, class_=AsyncSession, expire_on_commit=False)
+            for shard_engine in engines
+        ]
+        self._placement = itertools.count()
+        # Largest id across shards at startup; empty shards start above it
+        self.id_floor = 0
+
+    @property
+    def enabled(self) -> bool:
+        return len(self.engines) > 1
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def next_shard(self) -> int:
+        return next(self._placement) % len(self.engines)
+
+    def next_id(self, shard: int):
+        """Id expression for an insert on ``shard``, evaluated under the shard's write lock."""
+        from ..models.database import FeedbackRecord
+
+        count = len(self.engines)
+        largest = func.coalesce(func.max(FeedbackRecord.id), self.id_floor)
+        return select((largest // count + 1) * count + shard).scalar_subquery()
+
+    async def init(self):
+        """Bring every shard's schema up to date and find the id floor.
+
+        Under gunicorn the master runs this before forking, so a worker's call
+        only reads each shard's schema version and the largest ids.
+        """
+        from ..models.database import FeedbackRecord
+
+        for shard_engine in self.engines[1:]:
+            await init_db(shard_engine)
+
+        async def largest_id(db):
+            return (await db.execute(select(func.max(FeedbackRecord.id)))).scalar() or 0
+
+        self.id_floor = max(await self.scatter(largest_id))
+        logger.info(f"Feedback records sharded over {len(self.engines)} SQLite files")
+
+    async def scatter(self, query: Callable[[AsyncSession], Awaitable[Any]]) -> List[Any]:
+        """Run ``query`` on every shard concurrently, each with its own session; results in shard order."""
+        async def run(session_factory):
+            async with session_factory() as db:
+                return await query(db)
+
+        return await asyncio.gather(*(run(session_factory) for session_factory in self.session_factories))
+
+    async def dispose(self):
+        for shard_engine in self.engines:
+            await shard_engine.dispose()
+
+
+def _configured_shards() -> ShardSet:
+    if SQLITE_SHARDS <= 1:
+        return ShardSet([engine])
+    if not DATABASE_URL.startswith("sqlite") or DATABASE_URL.endswith(("://", ":memory:")):
+        logger.warning("SQLITE_SHARDS needs a file-backed SQLite DATABASE_URL; storing records unsharded")
+        return ShardSet([engine])
+    return ShardSet([engine] + [create_engine(shard_url(DATABASE_URL, index)) for index in range(1, SQLITE_SHARDS)])
+
+
+shards = _configured_shards()
+
+
+async def init_shards():
+    """Prepare the extra shards at startup; nothing to do when storage is unsharded."""
+    if shards.enabled:
+        await shards.init()
@@ -1,12 +1,27 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, JSONResponse
 from dotenv import load_dotenv
+import asyncio
 import logging
 import os
 
 from .api.triage import router as triage_router
 from .api.dashboard import router as dashboard_router
-from .database.connection import init_db
+from .api.admin import router as admin_router
+from .api.stream import router as stream_router
+from .api.triage import llm_service
+from .database.connection import init_db, AsyncSessionLocal
+from .database.sharding import init_shards, shards
+from .services.analytics_service import analytics_snapshot, ANALYTICS_SNAPSHOT_ENABLED
+from .services.metrics import MetricsMiddleware, render_metrics, write_worker_metrics, flush_metrics_periodically
+from .services.shared_state import multiprocess_mode
+from .services.profiling import PROFILING_ENABLED, RequestProfilerMiddleware
+from .services.health_service import ReadinessService
+from .services.incident_clustering import incident_index, INCIDENT_CLUSTERING_ENABLED
+from .services.heavy_hitters import submitter_tracker, flush_submitters_periodically, HEAVY_HITTERS_ENABLED
+from .services.admission import AdmissionControlMiddleware, loop_lag_monitor, ADMISSION_CONTROL_ENABLED
+from .services.few_shot import example_index
 
 load_dotenv()
 
@@ -33,6 +48,10 @@ allowed_origins = [
 if os.getenv("ENVIRONMENT") == "production":
     allowed_origins = ["*"]
 
+# Innermost of the middleware, so shed 503s still carry CORS headers and are measured
+if ADMISSION_CONTROL_ENABLED:
+    app.add_middleware(AdmissionControlMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=allowed_origins,
@@ -41,15 +60,88 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize database on startup
+# Only installed when profiling is enabled, so it costs nothing otherwise
+if PROFILING_ENABLED:
+    app.add_middleware(RequestProfilerMiddleware)
+
+# Outermost, so latency includes CORS handling
+app.add_middleware(MetricsMiddleware)
+
+readiness_service = ReadinessService(llm_service)
+# Strong references so background startup tasks are not garbage collected mid-run
+background_tasks = set()
+
+def run_in_background(coro):
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
+    return task
+
+async def load_analytics_snapshot():
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await analytics_snapshot.load(session)
+        logger.info(f"Analytics snapshot loaded: {rows} rows, {analytics_snapshot.nbytes / 1e6:.1f} MB")
+    except Exception as e:
+        analytics_snapshot.reset()
+        logger.warning(f"Analytics snapshot unavailable, using SQL aggregations: {str(e)}")
+
+async def load_incident_index():
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await incident_index.catch_up(session)
+        logger.info(f"Incident index loaded: {rows} urgent reports in {len(incident_index)} clusters")
+    except Exception as e:
+        incident_index.reset()
+        logger.warning(f"Incident index unavailable until first request: {str(e)}")
+
+async def load_example_index():
+    try:
+        async with AsyncSessionLocal() as session:
+            rows = await example_index.seed(session)
+        logger.info(f"Few-shot example index loaded: {rows} stored examples")
+    except Exception as e:
+        logger.warning(f"Few-shot examples limited to the built-in ones: {str(e)}")
+
+# Initialize database on startup; everything slower runs in the background
 @app.on_event("startup")
 async def startup_event():
     logger.info("Initializing database...")
     await init_db()
+    await init_shards()
     logger.info("Database initialized successfully")
+    if not llm_service.api_key:
+        # /ready reports the LLM check as failed until the key is set
+        logger.error("LLM_API_KEY is not set; triage requests will fail")
+    
+    run_in_background(readiness_service.warm_up())
+    if ADMISSION_CONTROL_ENABLED:
+        run_in_background(loop_lag_monitor.run())
+    # Both load from a single database; sharded storage answers from SQL on every shard
+    if ANALYTICS_SNAPSHOT_ENABLED and not shards.enabled:
+        # Dashboard queries use SQL until the load finishes
+        run_in_background(load_analytics_snapshot())
+    if INCIDENT_CLUSTERING_ENABLED and not shards.enabled:
+        run_in_background(load_incident_index())
+    if llm_service.few_shot_mode == "dynamic":
+        run_in_background(load_example_index())
+    if multiprocess_mode():
+        run_in_background(flush_metrics_periodically())
+        if HEAVY_HITTERS_ENABLED:
+            run_in_background(flush_submitters_periodically())
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    if multiprocess_mode():
+        # Keep this worker's final counts in the server-wide totals
+        write_worker_metrics()
+        if HEAVY_HITTERS_ENABLED:
+            submitter_tracker.write_state()
 
 app.include_router(triage_router)
+app.include_router(stream_router)
 app.include_router(dashboard_router, prefix="/api")
+app.include_router(admin_router, prefix="/api")
 
 @app.get("/")
 async def root():
@@ -57,7 +149,19 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy", "database": "connected"}
+    """Liveness: the process is up and serving. Dependencies are checked by /ready."""
+    return {"status": "healthy"}
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness: 200 only when the database and the LLM API are reachable."""
+    result = await readiness_service.readiness()
+    return JSONResponse(status_code=200 if result["status"] == "ready" else 503, content=result)
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus text exposition of request, stage, LLM and DB pool metrics (all workers)."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     import uvicorn
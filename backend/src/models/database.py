@@ -1,19 +1,59 @@
-from sqlalchemy import Column, Integer, String, DateTime, Float, Text, Index
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, SmallInteger, BigInteger, Boolean, String, DateTime, Float, Text, Index, ForeignKey
+from sqlalchemy.sql import false, func
 from datetime import datetime
 from typing import Optional
 
 from ..database.connection import Base
+from .types import CategoryCode, PackedIP, content_hash
+
+# Keys of FeedbackRecord.to_dict(), shared with the column-only fast path
+DICT_FIELDS = (
+    "id",
+    "feedback_text",
+    "category",
+    "urgency_score",
+    "client_ip",
+    "processing_time_ms",
+    "model_tier",
+    "llm_prompt_tokens",
+    "llm_completion_tokens",
+    "llm_cost_usd",
+    "llm_latency_ms",
+    "llm_usage_estimated",
+    "created_at",
+    "updated_at",
+)
+
+def _content_hash_default(context):
+    return content_hash(context.get_current_parameters()["feedback_text"])
 
 class FeedbackRecord(Base):
     __tablename__ = "feedback_records"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # The primary key and the category prefix of idx_category_* need no index of their own
+    id = Column(Integer, primary_key=True)
     feedback_text = Column(Text, nullable=False)
-    category = Column(String(50), nullable=False, index=True)
-    urgency_score = Column(Integer, nullable=False, index=True)
-    client_ip = Column(String(45), nullable=True, index=True)  # IPv6 compatible
+    # Stored as codes and packed bytes (see models/types.py); read back as strings
+    category = Column(CategoryCode, nullable=False)
+    # No single-column index: it lured the SQLite planner into full index scans
+    # for time-window stats; idx_created_urgency serves those queries instead.
+    urgency_score = Column(SmallInteger, nullable=False)
+    client_ip = Column(PackedIP, nullable=True, index=True)  # IPv6 compatible
+    # Equality lookups on feedback_text go through this index instead of the text
+    content_hash = Column(BigInteger, nullable=False, default=_content_hash_default, index=True)
+    # Validation, LLM and parsing; the insert itself is the db_commit stage of triage_stage_duration_seconds
     processing_time_ms = Column(Float, nullable=True)
+    # LLM cascade tier that produced the classification ("cheap" or "primary")
+    model_tier = Column(String(16), nullable=True)
+    # LLM usage summed over every call made for this record (cascade tiers and repairs)
+    llm_prompt_tokens = Column(Integer, nullable=True)
+    llm_completion_tokens = Column(Integer, nullable=True)
+    llm_cost_usd = Column(Float, nullable=True)
+    # Upstream LLM time, the part of processing_time_ms spent waiting on the provider
+    llm_latency_ms = Column(Float, nullable=True)
+    # A streamed reply was cut short before the provider reported usage, so the
+    # tokens above are estimated from characters (reasoning tokens are missing)
+    llm_usage_estimated = Column(Boolean, nullable=False, default=False, server_default=false())
     created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -24,6 +64,16 @@ class FeedbackRecord(Base):
         Index('idx_category_created', 'category', 'created_at'),
     )
     
+    @classmethod
+    def matching_text(cls, feedback_text: str):
+        """Condition matching records with exactly this text, using the content hash index."""
+        return (cls.content_hash == content_hash(feedback_text)) & (cls.feedback_text == feedback_text)
+    
+    @classmethod
+    def dict_columns(cls):
+        """Columns selected by the row-tuple fast path, in ``DICT_FIELDS`` order."""
+        return [getattr(cls, field) for field in DICT_FIELDS]
+    
     def to_dict(self):
         return {
             "id": self.id,
@@ -32,6 +82,94 @@ class FeedbackRecord(Base):
             "urgency_score": self.urgency_score,
             "client_ip": self.client_ip,
             "processing_time_ms": self.processing_time_ms,
+            "model_tier": self.model_tier,
+            "llm_prompt_tokens": self.llm_prompt_tokens,
+            "llm_completion_tokens": self.llm_completion_tokens,
+            "llm_cost_usd": self.llm_cost_usd,
+            "llm_latency_ms": self.llm_latency_ms,
+            "llm_usage_estimated": self.llm_usage_estimated,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None
-        }
\ No newline at end of file
+        }
+
+class LLMUsageHourly(Base):
+    """LLM usage of stored triage requests per UTC hour, updated with each insert."""
+    __tablename__ = "llm_usage_hourly"
+    
+    hour = Column(DateTime, primary_key=True)
+    requests = Column(Integer, nullable=False, default=0)
+    prompt_tokens = Column(BigInteger, nullable=False, default=0)
+    completion_tokens = Column(BigInteger, nullable=False, default=0)
+    cost_usd = Column(Float, nullable=False, default=0.0)
+    llm_latency_ms = Column(Float, nullable=False, default=0.0)
+    # Requests, and their prompt plus completion tokens, with estimated usage
+    estimated_requests = Column(Integer, nullable=False, default=0)
+    estimated_tokens = Column(BigInteger, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            "hour": self.hour.isoformat(),
+            "requests": self.requests,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+            "estimated_requests": self.estimated_requests,
+            "estimated_tokens": self.estimated_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+            "avg_llm_latency_ms": round(self.llm_latency_ms / self.requests, 2) if self.requests else None
+        }
+
+class RetriageRun(Base):
+    """Progress checkpoint of a re-triage backfill, committed with each batch."""
+    __tablename__ = "retriage_runs"
+    
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
+    model = Column(String(100), nullable=False)
+    shadow = Column(Integer, nullable=False, default=0)
+    status = Column(String(20), nullable=False, default="running")
+    # Keyset cursor: every record with id <= last_id has been processed
+    last_id = Column(Integer, nullable=False, default=0)
+    processed = Column(Integer, nullable=False, default=0)
+    changed = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    estimated_tokens = Column(Integer, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "model": self.model,
+            "shadow": bool(self.shadow),
+            "status": self.status,
+            "last_id": self.last_id,
+            "processed": self.processed,
+            "changed": self.changed,
+            "failed": self.failed,
+            "estimated_tokens": self.estimated_tokens,
+            "started_at": self.started_at.isoformat() if self.started_at else None,
+            "updated_at": self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+class RetriageDisagreement(Base):
+    """A record whose new label differs from the stored one, found in shadow mode."""
+    __tablename__ = "retriage_disagreements"
+    
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("retriage_runs.id"), nullable=False, index=True)
+    record_id = Column(Integer, nullable=False)
+    old_category = Column(String(50), nullable=False)
+    new_category = Column(String(50), nullable=False)
+    old_urgency_score = Column(Integer, nullable=False)
+    new_urgency_score = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def to_dict(self):
+        return {
+            "record_id": self.record_id,
+            "old_category": self.old_category,
+            "new_category": self.new_category,
+            "old_urgency_score": self.old_urgency_score,
+            "new_urgency_score": self.new_urgency_score
+        }
@@ -0,0 +1,113 @@
+"""Compact column encodings for ``feedback_records``.
+
+Each type stores a small fixed-width value and converts it back to the
+original string when read, so ORM attributes, query filters and ``to_dict()``
+keep working with category names and IP address strings.
+"""
+import hashlib
+import socket
+from typing import Optional
+
+from sqlalchemy import LargeBinary, SmallInteger
+from sqlalchemy.types import TypeDecorator
+
+from .triage import FeedbackCategory
+
+# Stored codes; append new categories, never renumber existing ones
+CATEGORY_CODES = {
+    FeedbackCategory.BUG_REPORT.value: 1,
+    FeedbackCategory.FEATURE_REQUEST.value: 2,
+    FeedbackCategory.PRAISE_POSITIVE.value: 3,
+    FeedbackCategory.GENERAL_INQUIRY.value: 4,
+}
+CATEGORY_NAMES = {code: name for name, code in CATEGORY_CODES.items()}
+
+# Prefix of client hosts that are not IP addresses (e.g. "unknown"). The length
+# tells them apart from packed addresses, so a host that would be stored in 4
+# or 16 bytes gets the prefix twice. UTF-8 text never contains a 0xff byte.
+_TEXT_HOST_PREFIX = b"\xff"
+_PACKED_IP_LENGTHS = (4, 16)
+
+
+class CategoryCode(TypeDecorator):
+    """Feedback category stored as a small integer code.
+
+    Writing a name without a code raises ValueError. In comparisons (e.g. a
+    dashboard filter) it binds as a code no row has, so it matches nothing.
+    """
+
+    impl = SmallInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[int]:
+        if value is None:
+            return None
+        code = CATEGORY_CODES.get(value)
+        if code is None:
+            raise ValueError(f"Unknown feedback category: {value!r}")
+        return code
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[str]:
+        if value is None:
+            return None
+        # Codes appended by a newer release still read
+        return CATEGORY_NAMES.get(value, f"Unknown ({value})")
+
+    def coerce_compared_value(self, op, value):
+        return CategoryFilterCode()
+
+
+class CategoryFilterCode(CategoryCode):
+    """Category code bound in comparisons; unknown names match no row."""
+
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[int]:
+        if value is None:
+            return None
+        return CATEGORY_CODES.get(value, 0)
+
+
+def pack_ip(host: Optional[str]) -> Optional[bytes]:
+    """Packed address (4 bytes for IPv4, 16 for IPv6); other hosts keep their text."""
+    if host is None:
+        return None
+    # inet_pton is several times faster than ipaddress.ip_address
+    for family in (socket.AF_INET, socket.AF_INET6):
+        try:
+            return socket.inet_pton(family, host)
+        except OSError:
+            pass
+    value = _TEXT_HOST_PREFIX + host.encode()
+    if len(value) in _PACKED_IP_LENGTHS:
+        value = _TEXT_HOST_PREFIX + value
+    return value
+
+
+def unpack_ip(value: Optional[bytes]) -> Optional[str]:
+    if value is None:
+        return None
+    value = bytes(value)
+    if len(value) not in _PACKED_IP_LENGTHS:
+        return value.lstrip(_TEXT_HOST_PREFIX).decode()
+    return socket.inet_ntop(socket.AF_INET if len(value) == 4 else socket.AF_INET6, value)
+
+
+class PackedIP(TypeDecorator):
+    """Client IP address stored as 4 or 16 bytes instead of up to 45 characters."""
+
+    impl = LargeBinary(16)
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        return pack_ip(value)
+
+    def process_result_value(self, value: Optional[bytes], dialect) -> Optional[str]:
+        return unpack_ip(value)
+
+
+def content_hash(text: str) -> int:
+    """64-bit hash of the feedback text, as a signed integer for BIGINT columns."""
+    digest = hashlib.blake2b(text.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
@@ -0,0 +1,378 @@
+"""In-memory columnar snapshot of feedback records for dashboard analytics.
+
+Only the columns the dashboard aggregates over are kept, as typed NumPy arrays:
+
+    id                  int32     4 bytes
+    created_at          uint32    4 bytes (epoch seconds, UTC)
+    category code       uint8     1 byte
+    urgency_score       uint8     1 byte
+    processing_time_ms  float32   4 bytes (NaN when unknown)
+
+That is 14 bytes per row (about 140 MB at 10M rows, plus up to 2x slack from
+geometric growth), compared to SQL scans over wide rows carrying the
+``feedback_text`` column. Rows are kept sorted by ``created_at`` so time
+windows resolve to a slice via binary search instead of a full-column mask.
+Category and urgency of loaded rows are re-read when a re-triage job has
+relabelled them in place.
+"""
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.database import FeedbackRecord
+from ..models.triage import FeedbackCategory
+from .retriage_service import relabelled_ranges
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_SNAPSHOT_ENABLED = os.getenv("ANALYTICS_SNAPSHOT_ENABLED", "true").lower() == "true"
+LOAD_CHUNK_SIZE = int(os.getenv("ANALYTICS_LOAD_CHUNK_SIZE", "50000"))
+
+_EPOCH = datetime(1970, 1, 1)
+_DAY_SECONDS = 86400
+_URGENT_MIN_SCORE = 4
+_URGENT_LIMIT = 5
+
+
+def to_epoch_seconds(value: Optional[datetime]) -> int:
+    """Convert a DB timestamp to epoch seconds; naive values are treated as UTC."""
+    if value is None:
+        return int(datetime.now(timezone.utc).timestamp())
+    if value.tzinfo is not None:
+        return int(value.timestamp())
+    return int((value - _EPOCH).total_seconds())
+
+
+def _newest_matches(
+    predicate: Callable[[int, int], np.ndarray],
+    start: int,
+    end: int,
+    limit: int,
+    block: int = 65536
+) -> np.ndarray:
+    """Indices of the last ``limit`` rows in [start, end) matching ``predicate``, newest first.
+
+    Scans backwards in blocks so that recent matches are found without
+    materialising a mask over the whole column.
+    """
+    found = []
+    while end > start and len(found) < limit:
+        block_start = max(end - block, start)
+        matches = np.flatnonzero(predicate(block_start, end))[::-1] + block_start
+        found.extend(matches[:limit - len(found)])
+        end = block_start
+    return np.array(found, dtype=np.intp)
+
+
+class AnalyticsSnapshot:
+    """Append-only columnar copy of the analytics columns of ``feedback_records``."""
+
+    def __init__(self, initial_capacity: int = 1024):
+        self._category_names: List[str] = [c.value for c in FeedbackCategory]
+        self._category_codes: Dict[str, int] = {
+            name: code for code, name in enumerate(self._category_names)
+        }
+        self._size = 0
+        self._max_id = 0
+        self._loaded = False
+        # Re-triage run id -> last id whose labels are reflected here
+        self._relabelled: Dict[int, int] = {}
+        self._allocate(initial_capacity)
+
+    def _allocate(self, capacity: int):
+        self._ids = np.zeros(capacity, dtype=np.int32)
+        self._created = np.zeros(capacity, dtype=np.uint32)
+        self._category = np.zeros(capacity, dtype=np.uint8)
+        self._urgency = np.zeros(capacity, dtype=np.uint8)
+        self._processing = np.zeros(capacity, dtype=np.float32)
+
+    def _columns(self) -> Tuple[np.ndarray, ...]:
+        return (self._ids, self._created, self._category, self._urgency, self._processing)
+
+    def _ensure_capacity(self, needed: int):
+        capacity = len(self._ids)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        old = self._columns()
+        self._allocate(new_capacity)
+        for new, prev in zip(self._columns(), old):
+            new[:self._size] = prev[:self._size]
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes currently allocated for the column arrays."""
+        return sum(column.nbytes for column in self._columns())
+
+    def __len__(self) -> int:
+        return self._size
+
+    def category_code(self, category: str) -> int:
+        code = self._category_codes.get(category)
+        if code is None:
+            if len(self._category_names) >= 255:
+                raise ValueError("Too many distinct categories for uint8 codes")
+            code = len(self._category_names)
+            self._category_names.append(category)
+            self._category_codes[category] = code
+        return code
+
+    def reset(self):
+        """Drop all rows and mark the snapshot as not loaded (SQL fallback)."""
+        self._size = 0
+        self._max_id = 0
+        self._loaded = False
+        self._relabelled = {}
+        self._allocate(1024)
+
+    def append(
+        self,
+        record_id: int,
+        created_at: Optional[datetime],
+        category: str,
+        urgency_score: int,
+        processing_time_ms: Optional[float] = None
+    ):
+        """Add one row, keeping the arrays ordered by ``created_at``."""
+        created = to_epoch_seconds(created_at)
+        n = self._size
+        self._ensure_capacity(n + 1)
+
+        # Commits can land slightly out of timestamp order; shift the short tail.
+        pos = n
+        if n and self._created[n - 1] > created:
+            pos = int(np.searchsorted(self._created[:n], np.uint32(created), side="right"))
+            for column in self._columns():
+                column[pos + 1:n + 1] = column[pos:n]
+
+        self._ids[pos] = record_id
+        self._created[pos] = created
+        self._category[pos] = self.category_code(category)
+        self._urgency[pos] = urgency_score
+        self._processing[pos] = np.nan if processing_time_ms is None else processing_time_ms
+        self._size = n + 1
+        self._max_id = max(self._max_id, record_id)
+
+    def append_record(self, record: FeedbackRecord):
+        self.append(
+            record.id,
+            record.created_at,
+            record.category,
+            record.urgency_score,
+            record.processing_time_ms
+        )
+
+    def _extend(self, rows: List[Tuple]):
+        """Bulk-append rows of (id, created_at, category, urgency, processing_time_ms)."""
+        count = len(rows)
+        n = self._size
+        self._ensure_capacity(n + count)
+        ids, created, category, urgency, processing = zip(*rows)
+        self._ids[n:n + count] = ids
+        self._created[n:n + count] = [to_epoch_seconds(value) for value in created]
+        self._category[n:n + count] = [self.category_code(value) for value in category]
+        self._urgency[n:n + count] = urgency
+        self._processing[n:n + count] = [np.nan if value is None else value for value in processing]
+        self._size = n + count
+        self._max_id = max(self._max_id, max(ids))
+
+    def _sort_by_created(self):
+        n = self._size
+        order = np.argsort(self._created[:n], kind="stable")
+        for column in self._columns():
+            column[:n] = column[:n][order]
+
+    async def load(self, db: AsyncSession, chunk_size: int = LOAD_CHUNK_SIZE) -> int:
+        """Load every row with an id above the current maximum, in keyset-ordered chunks.
+        
+        Once loaded, calling this again catches up on rows inserted by other
+        worker processes; they are appended in place instead of re-sorting.
+        Ids are committed in order on SQLite. On PostgreSQL a row that commits
+        after a higher id has already been loaded is not picked up until restart.
+        """
+        catching_up = self._loaded
+        if catching_up:
+            await self.apply_relabels(db, chunk_size)
+        else:
+            # Rows read from here on carry the labels of every committed chunk
+            await relabelled_ranges(db, self._relabelled)
+        loaded_rows = 0
+        while True:
+            query = select(
+                FeedbackRecord.id,
+                FeedbackRecord.created_at,
+                FeedbackRecord.category,
+                FeedbackRecord.urgency_score,
+                FeedbackRecord.processing_time_ms
+            ).where(
+                FeedbackRecord.id > self._max_id
+            ).order_by(FeedbackRecord.id).limit(chunk_size)
+            result = await db.execute(query)
+            rows = result.all()
+            if not rows:
+                break
+            if catching_up:
+                # Concurrent catch-ups in one worker may fetch the same rows
+                for row in rows:
+                    if row[0] > self._max_id:
+                        self.append(*row)
+            else:
+                self._extend(rows)
+            loaded_rows += len(rows)
+
+        if loaded_rows and not catching_up:
+            self._sort_by_created()
+        self._loaded = True
+        return loaded_rows
+
+    async def apply_relabels(self, db: AsyncSession, chunk_size: int = LOAD_CHUNK_SIZE) -> int:
+        """Re-read category and urgency of loaded rows relabelled by a re-triage job since the last call."""
+        updated = 0
+        for after, through in await relabelled_ranges(db, self._relabelled):
+            # Rows above the maximum are loaded with their new labels anyway
+            through = min(through, self._max_id)
+            while after < through:
+                query = select(
+                    FeedbackRecord.id,
+                    FeedbackRecord.category,
+                    FeedbackRecord.urgency_score
+                ).where(
+                    FeedbackRecord.id > after,
+                    FeedbackRecord.id <= through
+                ).order_by(FeedbackRecord.id).limit(chunk_size)
+                rows = (await db.execute(query)).all()
+                if not rows:
+                    break
+                self._relabel(rows)
+                updated += len(rows)
+                after = rows[-1][0]
+        return updated
+
+    def _relabel(self, rows: List[Tuple]):
+        """Overwrite category and urgency from rows of (id, category, urgency) in id order."""
+        ids, categories, urgency = zip(*rows)
+        ids = np.array(ids, dtype=np.int32)
+        codes = np.array([self.category_code(value) for value in categories], dtype=np.uint8)
+        n = self._size
+        # Rows are ordered by created_at, so locate them by id with one pass over the column
+        positions = np.flatnonzero(np.isin(self._ids[:n], ids))
+        source = np.searchsorted(ids, self._ids[positions])
+        self._category[positions] = codes[source]
+        self._urgency[positions] = np.array(urgency, dtype=np.uint8)[source]
+
+    def _window(self, cutoff: datetime) -> slice:
+        """Slice of rows created at or after ``cutoff``."""
+        n = self._size
+        # Search with a uint32 key; a Python int would upcast (copy) the whole column.
+        key = np.uint32(max(to_epoch_seconds(cutoff), 0))
+        start = int(np.searchsorted(self._created[:n], key, side="left"))
+        return slice(start, n)
+
+    def dashboard_stats(self, days_back: int = 30) -> Tuple[Dict[str, Any], List[int]]:
+        """Compute dashboard statistics; returns the stats and the ids of the most urgent rows."""
+        now = datetime.utcnow()
+        window = self._window(now - timedelta(days=days_back))
+        created = self._created[window]
+        urgency = self._urgency[window]
+
+        # Per-code equality counts over uint8 columns avoid bincount's int64 upcast.
+        categories = self._category[window]
+        category_distribution = {}
+        for code, name in enumerate(self._category_names):
+            count = int(np.count_nonzero(categories == code))
+            if count:
+                category_distribution[name] = count
+        urgency_distribution = {}
+        for score in range(1, 6):
+            count = int(np.count_nonzero(urgency == score))
+            if count:
+                urgency_distribution[score] = count
+
+        processing = self._processing[window]
+        known = processing == processing  # NaN marks an unknown processing time
+        known_count = int(np.count_nonzero(known))
+        avg_processing_time = (
+            float(np.sum(processing, where=known, dtype=np.float64)) / known_count
+            if known_count else 0
+        )
+
+        trend_window = self._window(now - timedelta(days=7))
+        days = self._created[trend_window] // _DAY_SECONDS
+        first_day = int(days[0]) if len(days) else 0
+        daily_trend = [
+            {"date": (_EPOCH + timedelta(days=first_day + offset)).date().isoformat(), "count": int(count)}
+            for offset, count in enumerate(np.bincount(days - first_day)) if count
+        ]
+
+        # Rows are ordered by created_at, so the newest urgent rows are the last matches.
+        urgent_ids = []
+        for score in range(5, _URGENT_MIN_SCORE - 1, -1):
+            remaining = _URGENT_LIMIT - len(urgent_ids)
+            if remaining <= 0:
+                break
+            matches = _newest_matches(
+                lambda lo, hi: self._urgency[lo:hi] == score,
+                window.start, window.stop, remaining
+            )
+            urgent_ids.extend(int(i) for i in self._ids[matches])
+
+        stats = {
+            "total_feedback": int(len(created)),
+            "category_distribution": category_distribution,
+            "urgency_distribution": urgency_distribution,
+            "avg_processing_time_ms": round(avg_processing_time, 2),
+            "daily_trend": daily_trend,
+            "time_period_days": days_back
+        }
+        return stats, urgent_ids
+
+    def filter_ids(
+        self,
+        limit: int = 100,
+        offset: int = 0,
+        category: Optional[str] = None,
+        urgency_min: Optional[int] = None,
+        urgency_max: Optional[int] = None,
+        days_back: Optional[int] = None
+    ) -> List[int]:
+        """Ids of matching rows, newest first, for one page of history."""
+        if days_back is not None:
+            window = self._window(datetime.utcnow() - timedelta(days=days_back))
+        else:
+            window = slice(0, self._size)
+
+        conditions = []
+        if category:
+            code = self._category_codes.get(category)
+            if code is None:
+                return []
+            conditions.append(lambda lo, hi: self._category[lo:hi] == code)
+        if urgency_min is not None:
+            conditions.append(lambda lo, hi: self._urgency[lo:hi] >= urgency_min)
+        if urgency_max is not None:
+            conditions.append(lambda lo, hi: self._urgency[lo:hi] <= urgency_max)
+
+        if not conditions:
+            page = self._ids[window][::-1][offset:offset + limit]
+            return [int(i) for i in page]
+
+        def predicate(lo: int, hi: int) -> np.ndarray:
+            mask = conditions[0](lo, hi)
+            for condition in conditions[1:]:
+                mask &= condition(lo, hi)
+            return mask
+
+        matches = _newest_matches(predicate, window.start, window.stop, offset + limit)
+        return [int(i) for i in self._ids[matches[offset:]]]
+
+
+analytics_snapshot = AnalyticsSnapshot()
@@ -1,10 +1,19 @@
 from typing import List, Dict, Any, Optional
+from collections import Counter
+import heapq
+import itertools
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func, desc, and_
 from sqlalchemy.sql import text
 from datetime import datetime, timedelta
 
+from ..database.sharding import shards
 from ..models.database import FeedbackRecord
+from .analytics_service import analytics_snapshot
+from .llm_usage import add_to_rollup
+from .incident_clustering import incident_index, INCIDENT_CLUSTERING_ENABLED
+from .shared_state import multiprocess_mode
+from .volume_anomalies import volume_detector, VOLUME_ANOMALY_ENABLED
 
 class FeedbackService:
     def __init__(self, db: AsyncSession):
@@ -16,21 +25,106 @@ class FeedbackService:
         category: str,
         urgency_score: int,
         client_ip: Optional[str] = None,
-        processing_time_ms: Optional[float] = None
+        processing_time_ms: Optional[float] = None,
+        model_tier: Optional[str] = None,
+        llm_prompt_tokens: Optional[int] = None,
+        llm_completion_tokens: Optional[int] = None,
+        llm_cost_usd: Optional[float] = None,
+        llm_latency_ms: Optional[float] = None,
+        llm_usage_estimated: bool = False
     ) -> FeedbackRecord:
-        """Create a new feedback record in the database."""
+        """Create a new feedback record, adding its LLM usage to the hourly rollup.
+        
+        With sharded storage the record goes to the next shard in turn, on a
+        session of its own, and its rollup to that shard's table.
+        """
         record = FeedbackRecord(
             feedback_text=feedback_text,
             category=category,
             urgency_score=urgency_score,
             client_ip=client_ip,
-            processing_time_ms=processing_time_ms
+            processing_time_ms=processing_time_ms,
+            model_tier=model_tier,
+            llm_prompt_tokens=llm_prompt_tokens,
+            llm_completion_tokens=llm_completion_tokens,
+            llm_cost_usd=llm_cost_usd,
+            llm_latency_ms=llm_latency_ms,
+            llm_usage_estimated=llm_usage_estimated
         )
-        self.db.add(record)
-        await self.db.commit()
-        await self.db.refresh(record)
+        if shards.enabled:
+            shard = shards.next_shard()
+            record.id = shards.next_id(shard)
+            async with shards.session_factories[shard]() as db:
+                await self._store(db, record)
+        else:
+            await self._store(self.db, record)
+        # With several workers every snapshot catches up from the database instead
+        if analytics_snapshot.loaded and not multiprocess_mode():
+            analytics_snapshot.append_record(record)
+        if INCIDENT_CLUSTERING_ENABLED and incident_index.loaded and not multiprocess_mode():
+            incident_index.add_record(record)
+        # Per worker, so it also runs with several workers
+        if VOLUME_ANOMALY_ENABLED:
+            volume_detector.record(record.category, record.urgency_score)
         return record
     
+    async def _store(self, db: AsyncSession, record: FeedbackRecord):
+        db.add(record)
+        if record.llm_prompt_tokens is not None:
+            await add_to_rollup(
+                db,
+                record.llm_prompt_tokens,
+                record.llm_completion_tokens or 0,
+                record.llm_cost_usd or 0.0,
+                record.llm_latency_ms or 0.0,
+                estimated=record.llm_usage_estimated
+            )
+        await db.commit()
+        await db.refresh(record)
+    
+    async def _use_snapshot(self) -> bool:
+        """Whether to answer from the analytics snapshot, catching up on other workers' inserts first."""
+        if not analytics_snapshot.loaded:
+            return False
+        if multiprocess_mode():
+            await analytics_snapshot.load(self.db)
+        else:
+            # Re-triage jobs run in their own process
+            await analytics_snapshot.apply_relabels(self.db)
+        return True
+    
+    def _select(self, rows: bool):
+        """Select full ORM records, or only the ``to_dict`` columns as row tuples."""
+        if rows:
+            return select(*FeedbackRecord.dict_columns())
+        return select(FeedbackRecord)
+    
+    async def _fetch(self, query, rows: bool, db: Optional[AsyncSession] = None) -> List[Any]:
+        result = await (db or self.db).execute(query)
+        return result.all() if rows else result.scalars().all()
+    
+    async def _fetch_newest(self, query, rows: bool, limit: int, offset: int = 0) -> List[Any]:
+        """Run ``query`` (newest first) with ``limit``/``offset``, over every shard when sharded.
+        
+        Each shard returns its first ``offset + limit`` records and the sorted
+        lists are merged, so deep pages cost every shard the whole prefix.
+        """
+        if not shards.enabled:
+            return await self._fetch(query.limit(limit).offset(offset), rows)
+        per_shard = await shards.scatter(lambda db: self._fetch(query.limit(offset + limit), rows, db))
+        merged = heapq.merge(*per_shard, key=lambda record: record.created_at, reverse=True)
+        return list(itertools.islice(merged, offset, offset + limit))
+    
+    async def _get_records_by_ids(self, ids: List[int], rows: bool = False) -> List[Any]:
+        """Fetch records by primary key, preserving the order of ``ids``."""
+        if not ids:
+            return []
+        records = await self._fetch(
+            self._select(rows).where(FeedbackRecord.id.in_(ids)), rows
+        )
+        records_by_id = {record.id: record for record in records}
+        return [records_by_id[record_id] for record_id in ids if record_id in records_by_id]
+    
     async def get_feedback_history(
         self,
         limit: int = 100,
@@ -38,10 +132,26 @@ class FeedbackService:
         category: Optional[str] = None,
         urgency_min: Optional[int] = None,
         urgency_max: Optional[int] = None,
-        days_back: Optional[int] = None
-    ) -> List[FeedbackRecord]:
-        """Get paginated feedback history with optional filters."""
-        query = select(FeedbackRecord).order_by(desc(FeedbackRecord.created_at))
+        days_back: Optional[int] = None,
+        rows: bool = False
+    ) -> List[Any]:
+        """Get paginated feedback history with optional filters.
+        
+        With ``rows=True`` only the ``to_dict`` columns are selected and plain
+        row tuples are returned instead of ORM instances.
+        """
+        if await self._use_snapshot():
+            ids = analytics_snapshot.filter_ids(
+                limit=limit,
+                offset=offset,
+                category=category,
+                urgency_min=urgency_min,
+                urgency_max=urgency_max,
+                days_back=days_back
+            )
+            return await self._get_records_by_ids(ids, rows=rows)
+        
+        query = self._select(rows).order_by(desc(FeedbackRecord.created_at))
         
         # Apply filters
         conditions = []
@@ -58,19 +168,51 @@ class FeedbackService:
         if conditions:
             query = query.where(and_(*conditions))
         
-        query = query.limit(limit).offset(offset)
-        result = await self.db.execute(query)
-        return result.scalars().all()
+        return await self._fetch_newest(query, rows, limit, offset)
     
     async def get_dashboard_stats(self, days_back: int = 30) -> Dict[str, Any]:
         """Get comprehensive dashboard statistics."""
+        if await self._use_snapshot():
+            stats, urgent_ids = analytics_snapshot.dashboard_stats(days_back=days_back)
+            urgent_records = await self._get_records_by_ids(urgent_ids)
+            stats["urgent_feedback"] = [record.to_dict() for record in urgent_records]
+            return stats
+        
+        if shards.enabled:
+            parts = await shards.scatter(lambda db: self._stats_parts(db, days_back))
+        else:
+            parts = [await self._stats_parts(self.db, days_back)]
+        
+        # Counts add up across shards; the average is weighted by each shard's timed records
+        timed = sum(part["timed_count"] for part in parts)
+        time_sum = sum(part["avg_processing_time"] * part["timed_count"] for part in parts)
+        avg_processing_time = time_sum / timed if timed else 0
+        daily_counts = sum((Counter(part["daily_trend"]) for part in parts), Counter())
+        urgent_records = heapq.nlargest(
+            5,
+            itertools.chain.from_iterable(part["urgent"] for part in parts),
+            key=lambda record: (record.urgency_score, record.created_at)
+        )
+        
+        return {
+            "total_feedback": sum(part["total"] for part in parts),
+            "category_distribution": dict(sum((Counter(part["categories"]) for part in parts), Counter())),
+            "urgency_distribution": dict(sum((Counter(part["urgencies"]) for part in parts), Counter())),
+            "avg_processing_time_ms": round(avg_processing_time, 2),
+            "daily_trend": [{"date": date, "count": daily_counts[date]} for date in sorted(daily_counts)],
+            "urgent_feedback": [record.to_dict() for record in urgent_records],
+            "time_period_days": days_back
+        }
+    
+    async def _stats_parts(self, db: AsyncSession, days_back: int) -> Dict[str, Any]:
+        """SQL aggregations of one database, in a form that merges across shards."""
         cutoff_date = datetime.utcnow() - timedelta(days=days_back)
         
         # Total feedback count
         total_query = select(func.count(FeedbackRecord.id)).where(
             FeedbackRecord.created_at >= cutoff_date
         )
-        total_result = await self.db.execute(total_query)
+        total_result = await db.execute(total_query)
         total_feedback = total_result.scalar()
         
         # Category distribution
@@ -81,7 +223,7 @@ class FeedbackService:
             FeedbackRecord.created_at >= cutoff_date
         ).group_by(FeedbackRecord.category)
         
-        category_result = await self.db.execute(category_query)
+        category_result = await db.execute(category_query)
         category_distribution = {row.category: row.count for row in category_result}
         
         # Urgency distribution
@@ -92,18 +234,21 @@ class FeedbackService:
             FeedbackRecord.created_at >= cutoff_date
         ).group_by(FeedbackRecord.urgency_score)
         
-        urgency_result = await self.db.execute(urgency_query)
+        urgency_result = await db.execute(urgency_query)
         urgency_distribution = {row.urgency_score: row.count for row in urgency_result}
         
-        # Average processing time
-        avg_time_query = select(func.avg(FeedbackRecord.processing_time_ms)).where(
+        # Average processing time, and how many records it covers
+        avg_time_query = select(
+            func.avg(FeedbackRecord.processing_time_ms),
+            func.count(FeedbackRecord.processing_time_ms)
+        ).where(
             and_(
                 FeedbackRecord.created_at >= cutoff_date,
                 FeedbackRecord.processing_time_ms.isnot(None)
             )
         )
-        avg_time_result = await self.db.execute(avg_time_query)
-        avg_processing_time = avg_time_result.scalar() or 0
+        avg_time_result = await db.execute(avg_time_query)
+        avg_processing_time, timed_count = avg_time_result.one()
         
         # Daily feedback trend (last 7 days)
         daily_trend_query = select(
@@ -113,11 +258,8 @@ class FeedbackService:
             FeedbackRecord.created_at >= datetime.utcnow() - timedelta(days=7)
         ).group_by(func.date(FeedbackRecord.created_at)).order_by('date')
         
-        daily_trend_result = await self.db.execute(daily_trend_query)
-        daily_trend = [
-            {"date": str(row.date), "count": row.count} 
-            for row in daily_trend_result
-        ]
+        daily_trend_result = await db.execute(daily_trend_query)
+        daily_trend = {str(row.date): row.count for row in daily_trend_result}
         
         # Most urgent recent feedback
         urgent_query = select(FeedbackRecord).where(
@@ -127,28 +269,62 @@ class FeedbackService:
             )
         ).order_by(desc(FeedbackRecord.urgency_score), desc(FeedbackRecord.created_at)).limit(5)
         
-        urgent_result = await self.db.execute(urgent_query)
-        urgent_feedback = [record.to_dict() for record in urgent_result.scalars()]
+        urgent_result = await db.execute(urgent_query)
         
         return {
-            "total_feedback": total_feedback,
-            "category_distribution": category_distribution,
-            "urgency_distribution": urgency_distribution,
-            "avg_processing_time_ms": round(avg_processing_time, 2),
+            "total": total_feedback,
+            "categories": category_distribution,
+            "urgencies": urgency_distribution,
+            "avg_processing_time": avg_processing_time or 0,
+            "timed_count": timed_count,
             "daily_trend": daily_trend,
-            "urgent_feedback": urgent_feedback,
-            "time_period_days": days_back
+            "urgent": urgent_result.scalars().all()
         }
     
     async def search_feedback(
         self,
         search_term: str,
-        limit: int = 50
-    ) -> List[FeedbackRecord]:
+        limit: int = 50,
+        rows: bool = False
+    ) -> List[Any]:
         """Search feedback by text content."""
-        query = select(FeedbackRecord).where(
+        query = self._select(rows).where(
             FeedbackRecord.feedback_text.ilike(f"%{search_term}%")
-        ).order_by(desc(FeedbackRecord.created_at)).limit(limit)
+        ).order_by(desc(FeedbackRecord.created_at))
         
-        result = await self.db.execute(query)
-        return result.scalars().all()
\ No newline at end of file
+        return await self._fetch_newest(query, rows, limit)
+    
+    async def get_active_incidents(self, limit: int = 20, min_count: int = 1) -> List[Dict[str, Any]]:
+        """Active incident clusters, after indexing any records this process has not seen."""
+        await incident_index.catch_up(self.db)
+        return incident_index.active_clusters(limit=limit, min_count=min_count)
+    
+    async def get_model_tier_stats(self, days_back: int = 30) -> Dict[str, Dict[str, Any]]:
+        """Records and average processing time per LLM cascade tier."""
+        cutoff_date = datetime.utcnow() - timedelta(days=days_back)
+        query = select(
+            FeedbackRecord.model_tier,
+            func.count(FeedbackRecord.id),
+            func.avg(FeedbackRecord.processing_time_ms),
+            func.count(FeedbackRecord.processing_time_ms)
+        ).where(
+            and_(FeedbackRecord.created_at >= cutoff_date, FeedbackRecord.model_tier.isnot(None))
+        ).group_by(FeedbackRecord.model_tier)
+        
+        if shards.enabled:
+            per_shard = await shards.scatter(lambda db: self._fetch(query, rows=True, db=db))
+        else:
+            per_shard = [await self._fetch(query, rows=True)]
+        
+        counts, time_sums, timed = Counter(), Counter(), Counter()
+        for tier, count, avg_time, timed_count in itertools.chain.from_iterable(per_shard):
+            counts[tier] += count
+            time_sums[tier] += (avg_time or 0) * timed_count
+            timed[tier] += timed_count
+        return {
+            tier: {
+                "count": count,
+                "avg_processing_time_ms": round(time_sums[tier] / timed[tier], 2) if timed[tier] else None
+            }
+            for tier, count in counts.items()
+        }
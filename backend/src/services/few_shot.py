@@ -0,0 +1,168 @@
+"""Few-shot examples for the triage prompt, fixed or picked per input.
+
+In ``static`` mode every prompt carries the same six examples. In ``dynamic``
+mode the ``FEW_SHOT_K`` labelled examples most similar to the input are
+chosen from an in-memory index, seeded with the six built-in examples and
+recent short records from ``feedback_records``.
+
+Similarity is TF-IDF over the word unigrams and bigrams used for incident
+clustering, scored through an inverted index: only the posting lists of the
+input's terms are read, and terms found in more than half of the examples
+are skipped as stop words.
+"""
+import logging
+import math
+import os
+from collections import defaultdict
+from typing import Dict, List, NamedTuple, Optional, Set
+
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .text_features import shingles
+
+logger = logging.getLogger(__name__)
+
+FEW_SHOT_MODE = os.getenv("FEW_SHOT_MODE", "static").lower()
+FEW_SHOT_K = int(os.getenv("FEW_SHOT_K", "3"))
+# Records loaded per category when seeding the index
+FEW_SHOT_SEED_PER_CATEGORY = int(os.getenv("FEW_SHOT_SEED_PER_CATEGORY", "500"))
+# Longer records would cost more prompt tokens than the examples they replace
+MAX_EXAMPLE_CHARS = 240
+MAX_DOCUMENT_FREQUENCY = 0.5
+
+SEED_CATEGORIES = ("Bug Report", "Feature Request", "Praise/Positive Feedback", "General Inquiry")
+
+
+class Example(NamedTuple):
+    text: str
+    category: str
+    urgency_score: int
+
+
+DEFAULT_EXAMPLES = (
+    Example("The login page crashes every time I try to sign in with my Google account. This is blocking me from accessing my work files.", "Bug Report", 4),
+    Example("Would love to see a dark mode option in the settings. It would make using the app at night much easier.", "Feature Request", 2),
+    Example("Amazing update! The new interface is so much cleaner and faster. Great job team!", "Praise/Positive Feedback", 1),
+    Example("How do I change my notification settings? I can't find the option anywhere in the menu.", "General Inquiry", 2),
+    Example("URGENT: Payment processing is completely broken! Customers can't complete purchases and we're losing revenue!", "Bug Report", 5),
+    Example("The search function could be improved with filters for date, category, and price range.", "Feature Request", 3),
+)
+
+
+class ExampleIndex:
+    """Labelled examples with an inverted index from term to example positions."""
+
+    def __init__(self, examples=DEFAULT_EXAMPLES):
+        self.examples: List[Example] = []
+        self._postings: Dict[str, List[int]] = defaultdict(list)
+        self._norms: List[float] = []
+        # numpy copies for scoring, rebuilt after additions touch them
+        self._posting_arrays: Dict[str, np.ndarray] = {}
+        self._norm_array = np.ones(0)
+        self._texts: Set[str] = set()
+        for example in examples:
+            self.add(example)
+
+    def __len__(self) -> int:
+        return len(self.examples)
+
+    def add(self, example: Example) -> bool:
+        """Index an example; duplicates and texts without words are skipped."""
+        if example.text in self._texts:
+            return False
+        terms = shingles(example.text)
+        if not terms:
+            return False
+        position = len(self.examples)
+        self.examples.append(example)
+        self._texts.add(example.text)
+        # Length normalisation; IDF is applied at query time so it tracks additions
+        self._norms.append(math.sqrt(len(terms)))
+        for term in terms:
+            self._postings[term].append(position)
+            self._posting_arrays.pop(term, None)
+        return True
+
+    def _posting_array(self, term: str) -> Optional[np.ndarray]:
+        array = self._posting_arrays.get(term)
+        if array is None:
+            postings = self._postings.get(term)
+            if not postings:
+                return None
+            array = self._posting_arrays[term] = np.array(postings, dtype=np.int64)
+        return array
+
+    def nearest(self, text: str, k: int = FEW_SHOT_K) -> List[Example]:
+        """The k most similar examples, least similar first, padded with built-in ones."""
+        total = len(self.examples)
+        if len(self._norm_array) != total:
+            self._norm_array = np.array(self._norms)
+        scores = np.zeros(total)
+        for term in shingles(text):
+            postings = self._posting_array(term)
+            if postings is None or len(postings) > total * MAX_DOCUMENT_FREQUENCY:
+                continue
+            # Positions within one posting list are unique, so fancy-index += is exact
+            scores[postings] += math.log(1 + total / len(postings))
+        scores /= self._norm_array
+
+        count = min(k + 1, total)
+        best = np.argpartition(-scores, count - 1)[:count]
+        best = best[np.argsort(-scores[best])]
+        # An input already in the store (e.g. during a re-triage) must not see its own label
+        chosen = [
+            self.examples[position] for position in best
+            if scores[position] > 0 and self.examples[position].text != text
+        ][:k]
+        for example in DEFAULT_EXAMPLES:
+            if len(chosen) >= k:
+                break
+            if example not in chosen:
+                chosen.append(example)
+        return chosen[::-1]
+
+    async def seed(self, session: AsyncSession, per_category: int = FEW_SHOT_SEED_PER_CATEGORY) -> int:
+        """Add the most recent short records of each category; returns how many were added."""
+        # Imported here so the prompt builder does not pull in the ORM models
+        from ..models.database import FeedbackRecord
+
+        added = 0
+        for category in SEED_CATEGORIES:
+            rows = (await session.execute(
+                select(FeedbackRecord.feedback_text, FeedbackRecord.urgency_score)
+                .where(FeedbackRecord.category == category)
+                .order_by(FeedbackRecord.id.desc())
+                .limit(per_category * 2)
+            )).all()
+            kept = 0
+            for feedback_text, urgency_score in rows:
+                if kept >= per_category:
+                    break
+                if len(feedback_text) <= MAX_EXAMPLE_CHARS and self.add(Example(feedback_text, category, urgency_score)):
+                    kept += 1
+            added += kept
+        return added
+
+    def reset(self):
+        self.__init__()
+
+
+def format_examples(examples) -> str:
+    return "\n\n".join(
+        f'Example {number}:\nFeedback: "{example.text}"\n'
+        f'Analysis: {{"category": "{example.category}", "urgency_score": {example.urgency_score}}}'
+        for number, example in enumerate(examples, 1)
+    )
+
+
+example_index = ExampleIndex()
+STATIC_EXAMPLES = format_examples(DEFAULT_EXAMPLES)
+
+
+def examples_for(feedback_text: str, mode: Optional[str] = None, k: int = FEW_SHOT_K) -> str:
+    """The examples block of the prompt for this input."""
+    if (mode or FEW_SHOT_MODE) != "dynamic":
+        return STATIC_EXAMPLES
+    return format_examples(example_index.nearest(feedback_text, k))
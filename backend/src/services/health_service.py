@@ -0,0 +1,95 @@
+import asyncio
+import os
+import time
+import logging
+from typing import Dict, Any, Optional
+
+from sqlalchemy import text
+
+from ..database.connection import engine
+from ..database.sharding import shards
+from .analytics_service import analytics_snapshot, ANALYTICS_SNAPSHOT_ENABLED
+
+# Readiness settings
+READY_DB_TIMEOUT = float(os.getenv("READY_DB_TIMEOUT", "2"))
+READY_LLM_TIMEOUT = float(os.getenv("READY_LLM_TIMEOUT", "5"))
+# The LLM probe is a billable API call, so its result is reused for this long
+READY_LLM_CACHE_SECONDS = float(os.getenv("READY_LLM_CACHE_SECONDS", "30"))
+DB_WARM_CONNECTIONS = int(os.getenv("DB_WARM_CONNECTIONS", "5"))
+
+
+def database_engines():
+    """The main engine, or every shard's when storage is sharded."""
+    return shards.engines if shards.enabled else [engine]
+
+
+class ReadinessService:
+    """Checks the dependencies a request needs, for the /ready probe and startup warm-up."""
+    
+    def __init__(self, llm_service):
+        self.llm_service = llm_service
+        self.logger = logging.getLogger(__name__)
+        self._llm_result: Optional[Dict[str, Any]] = None
+        self._llm_checked_at = 0.0
+    
+    async def check_database(self) -> Dict[str, Any]:
+        async def ping(database_engine):
+            async with database_engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout=READY_DB_TIMEOUT)
+        
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(*(ping(database_engine) for database_engine in database_engines()))
+        except Exception as e:
+            return {"ok": False, "error": f"{type(e).__name__}: {str(e)}"}
+        return {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+    
+    async def check_llm(self, force: bool = False) -> Dict[str, Any]:
+        now = time.monotonic()
+        if not force and self._llm_result is not None and now - self._llm_checked_at < READY_LLM_CACHE_SECONDS:
+            return self._llm_result
+        
+        start = time.perf_counter()
+        try:
+            await self.llm_service.check_connection(timeout=READY_LLM_TIMEOUT)
+            result = {"ok": True, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+        except Exception as e:
+            result = {"ok": False, "error": f"{type(e).__name__}: {str(e)}"}
+        self._llm_result = result
+        self._llm_checked_at = now
+        return result
+    
+    def snapshot_state(self) -> str:
+        if not ANALYTICS_SNAPSHOT_ENABLED or shards.enabled:
+            return "disabled"
+        return "loaded" if analytics_snapshot.loaded else "loading"
+    
+    async def readiness(self) -> Dict[str, Any]:
+        database, llm = await asyncio.gather(self.check_database(), self.check_llm())
+        return {
+            "status": "ready" if database["ok"] and llm["ok"] else "not_ready",
+            "checks": {"database": database, "llm": llm},
+            # Informational: the dashboard falls back to SQL until the snapshot is loaded
+            "analytics_snapshot": self.snapshot_state()
+        }
+    
+    async def warm_up(self):
+        """Open pooled DB connections and the LLM HTTP connection before traffic arrives."""
+        async def touch_database(database_engine):
+            async with database_engine.connect() as conn:
+                await conn.execute(text("SELECT 1"))
+        
+        try:
+            await asyncio.gather(*(
+                touch_database(database_engine)
+                for database_engine in database_engines()
+                for _ in range(DB_WARM_CONNECTIONS)
+            ))
+        except Exception as e:
+            self.logger.warning(f"Database warm-up failed: {str(e)}")
+        
+        llm = await self.check_llm(force=True)
+        if llm["ok"]:
+            self.logger.info(f"LLM connection warmed in {llm['latency_ms']} ms")
+        else:
+            self.logger.warning(f"LLM warm-up failed: {llm['error']}")
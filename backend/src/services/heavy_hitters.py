@@ -0,0 +1,334 @@
+"""Approximate top submitters by triage volume and LLM spend.
+
+Each ``/triage`` updates constant-size sketches for the current time window
+instead of anyone running ``GROUP BY client_ip`` over the whole table:
+
+- two Space-Saving summaries keep the ``HEAVY_HITTER_CAPACITY`` client IPs with
+  the most requests and the most LLM tokens. Any IP with more than 1/capacity
+  of the window's total is guaranteed to be kept, and each kept count is an
+  overestimate by at most its recorded error;
+- Count-Min sketches give requests per (IP, category) and tokens per IP for
+  any address, so each top entry also shows its category mix and spend.
+
+Windows are tumbling (aligned to ``HEAVY_HITTER_WINDOW_SECONDS``); the
+previous window is kept for comparison. With ``HEAVY_HITTER_THROTTLE_SHARE``
+set, an IP whose guaranteed share of either window reaches it gets a rate limit
+divided by ``HEAVY_HITTER_THROTTLE_FACTOR``.
+"""
+import asyncio
+import hashlib
+import heapq
+import json
+import logging
+import os
+import struct
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.triage import FeedbackCategory
+from .metrics import METRICS_FLUSH_INTERVAL
+from .shared_state import shared_path
+
+logger = logging.getLogger(__name__)
+
+HEAVY_HITTERS_ENABLED = os.getenv("HEAVY_HITTERS_ENABLED", "true").lower() == "true"
+HEAVY_HITTER_CAPACITY = int(os.getenv("HEAVY_HITTER_CAPACITY", "256"))
+HEAVY_HITTER_WINDOW_SECONDS = int(os.getenv("HEAVY_HITTER_WINDOW_SECONDS", "3600"))
+# 0 disables automatic throttling
+HEAVY_HITTER_THROTTLE_SHARE = float(os.getenv("HEAVY_HITTER_THROTTLE_SHARE", "0"))
+HEAVY_HITTER_THROTTLE_FACTOR = int(os.getenv("HEAVY_HITTER_THROTTLE_FACTOR", "4"))
+# Shares of tiny windows say nothing about abuse
+HEAVY_HITTER_THROTTLE_MIN_REQUESTS = int(os.getenv("HEAVY_HITTER_THROTTLE_MIN_REQUESTS", "100"))
+
+# e/width of the window total is the Count-Min error bound (~0.13% here),
+# exceeded with probability e^-depth (~2%)
+SKETCH_WIDTH = 2048
+SKETCH_DEPTH = 4
+
+CATEGORIES = [category.value for category in FeedbackCategory]
+
+
+class SpaceSaving:
+    """Space-Saving summary (Metwally et al.) of the heaviest keys by weight."""
+
+    def __init__(self, capacity: int = HEAVY_HITTER_CAPACITY):
+        self.capacity = capacity
+        self._counts: Dict[str, float] = {}
+        self._errors: Dict[str, float] = {}
+        # Lazy min-heap of (count, key); entries whose count is stale are skipped
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def _push(self, key: str):
+        heapq.heappush(self._heap, (self._counts[key], key))
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(count, key) for key, count in self._counts.items()]
+            heapq.heapify(self._heap)
+
+    def _pop_min(self) -> Tuple[str, float]:
+        while True:
+            count, key = heapq.heappop(self._heap)
+            if self._counts.get(key) == count:
+                return key, count
+
+    def add(self, key: str, weight: float = 1):
+        if key in self._counts:
+            self._counts[key] += weight
+        elif len(self._counts) < self.capacity:
+            self._counts[key] = weight
+            self._errors[key] = 0
+        else:
+            # The new key inherits the evicted minimum as its possible overcount
+            evicted, floor = self._pop_min()
+            del self._counts[evicted], self._errors[evicted]
+            self._counts[key] = floor + weight
+            self._errors[key] = floor
+        self._push(key)
+
+    def min_count(self) -> float:
+        """Upper bound on the weight of any key not in the summary."""
+        if len(self._counts) < self.capacity:
+            return 0
+        return min(self._counts.values())
+
+    def estimate(self, key: str) -> Tuple[float, float]:
+        """(upper bound, maximum overcount) of a key's weight."""
+        if key in self._counts:
+            return self._counts[key], self._errors[key]
+        floor = self.min_count()
+        return floor, floor
+
+    def top(self, k: int) -> List[Tuple[str, float, float]]:
+        return sorted(
+            ((key, count, self._errors[key]) for key, count in self._counts.items()),
+            key=lambda entry: entry[1],
+            reverse=True
+        )[:k]
+
+    def state(self) -> Dict[str, List[float]]:
+        return {key: [count, self._errors[key]] for key, count in self._counts.items()}
+
+    def merge(self, state: Dict[str, List[float]], capacity: int):
+        """Add another summary's ``state()`` (Agarwal et al. mergeable summaries)."""
+        other_floor = min((count for count, _ in state.values()), default=0) if len(state) >= capacity else 0
+        own_floor = self.min_count()
+        merged = {}
+        for key in set(self._counts) | set(state):
+            count, error = self._counts.get(key, own_floor), self._errors.get(key, own_floor)
+            other_count, other_error = state.get(key, (other_floor, other_floor))
+            merged[key] = (count + other_count, error + other_error)
+        kept = sorted(merged.items(), key=lambda item: item[1][0], reverse=True)[:self.capacity]
+        self._counts = {key: count for key, (count, _) in kept}
+        self._errors = {key: error for key, (_, error) in kept}
+        self._heap = [(count, key) for key, count in self._counts.items()]
+        heapq.heapify(self._heap)
+
+
+class CountMinSketch:
+    """Count-Min sketch: per-key totals that never underestimate."""
+
+    def __init__(self, width: int = SKETCH_WIDTH, depth: int = SKETCH_DEPTH):
+        self.width = width
+        self.depth = depth
+        # Plain lists: a handful of scalar updates is several times faster than numpy indexing
+        self.table = [[0] * width for _ in range(depth)]
+        self._unpack = struct.Struct(f"<{depth}I").unpack
+
+    def _columns(self, key: str) -> Tuple[int, ...]:
+        digest = hashlib.blake2b(key.encode(), digest_size=4 * self.depth).digest()
+        return tuple(value % self.width for value in self._unpack(digest))
+
+    def add(self, key: str, amount: float = 1):
+        for row, column in zip(self.table, self._columns(key)):
+            row[column] += amount
+
+    def estimate(self, key: str) -> float:
+        return min(row[column] for row, column in zip(self.table, self._columns(key)))
+
+    def merge(self, table: List[List[float]]):
+        for row, other in zip(self.table, table):
+            for column, value in enumerate(other):
+                if value:
+                    row[column] += value
+
+
+class SubmitterWindow:
+    """Sketches of one tumbling window."""
+
+    def __init__(self, start: int, capacity: int = HEAVY_HITTER_CAPACITY):
+        self.start = start
+        self.capacity = capacity
+        self.requests = 0
+        self.tokens = 0
+        self.top_requests = SpaceSaving(capacity)
+        self.top_tokens = SpaceSaving(capacity)
+        self.category_requests = CountMinSketch()
+        self.ip_tokens = CountMinSketch()
+
+    def record(self, client_ip: str, category: str, tokens: int):
+        self.requests += 1
+        self.top_requests.add(client_ip)
+        self.category_requests.add(f"{client_ip}\x00{category}")
+        if tokens:
+            self.tokens += tokens
+            self.top_tokens.add(client_ip, tokens)
+            self.ip_tokens.add(client_ip, tokens)
+
+    def guaranteed_share(self, client_ip: str) -> float:
+        """Lower bound on the IP's share of the window's requests."""
+        if not self.requests:
+            return 0.0
+        count, error = self.top_requests.estimate(client_ip)
+        return (count - error) / self.requests
+
+    def submitter(self, client_ip: str) -> Dict[str, Any]:
+        mix = {
+            category: int(self.category_requests.estimate(f"{client_ip}\x00{category}"))
+            for category in CATEGORIES
+        }
+        requests, requests_error = self.top_requests.estimate(client_ip)
+        tokens, tokens_error = self.top_tokens.estimate(client_ip)
+        return {
+            "client_ip": client_ip,
+            # Space-Saving bounds where available; the Count-Min estimate is never tighter
+            "requests": int(min(requests, sum(mix.values()))),
+            "requests_error": int(requests_error),
+            "tokens": int(min(tokens, self.ip_tokens.estimate(client_ip))),
+            "tokens_error": int(tokens_error),
+            "share": round(requests / self.requests, 4) if self.requests else 0.0,
+            "category_mix": {category: count for category, count in mix.items() if count},
+        }
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            "start": self.start,
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "top_requests": self.top_requests.state(),
+            "top_tokens": self.top_tokens.state(),
+            "category_requests": self.category_requests.table,
+            "ip_tokens": self.ip_tokens.table,
+        }
+
+    def merge(self, state: Dict[str, Any]):
+        self.requests += state["requests"]
+        self.tokens += state["tokens"]
+        self.top_requests.merge(state["top_requests"], self.capacity)
+        self.top_tokens.merge(state["top_tokens"], self.capacity)
+        self.category_requests.merge(state["category_requests"])
+        self.ip_tokens.merge(state["ip_tokens"])
+
+
+class SubmitterTracker:
+    def __init__(
+        self,
+        window_seconds: int = HEAVY_HITTER_WINDOW_SECONDS,
+        capacity: int = HEAVY_HITTER_CAPACITY,
+        throttle_share: float = HEAVY_HITTER_THROTTLE_SHARE
+    ):
+        self.window_seconds = window_seconds
+        self.capacity = capacity
+        self.throttle_share = throttle_share
+        self._current = SubmitterWindow(0, capacity)
+        self._previous = SubmitterWindow(-window_seconds, capacity)
+
+    def _window_start(self, now: Optional[float] = None) -> int:
+        now = time.time() if now is None else now
+        return int(now // self.window_seconds * self.window_seconds)
+
+    def _rotate(self, now: Optional[float] = None):
+        start = self._window_start(now)
+        if start == self._current.start:
+            return
+        if start - self._current.start == self.window_seconds:
+            self._previous = self._current
+        else:
+            self._previous = SubmitterWindow(start - self.window_seconds, self.capacity)
+        self._current = SubmitterWindow(start, self.capacity)
+
+    def reset(self):
+        self._current = SubmitterWindow(0, self.capacity)
+        self._previous = SubmitterWindow(-self.window_seconds, self.capacity)
+
+    def record(self, client_ip: str, category: str, tokens: int = 0, now: Optional[float] = None):
+        self._rotate(now)
+        self._current.record(client_ip, category, tokens)
+
+    def window(self, previous: bool = False, now: Optional[float] = None) -> SubmitterWindow:
+        self._rotate(now)
+        return self._previous if previous else self._current
+
+    def is_heavy(self, client_ip: str, now: Optional[float] = None) -> bool:
+        """Whether the IP is guaranteed to exceed the throttle share of the current or previous window."""
+        if self.throttle_share <= 0:
+            return False
+        self._rotate(now)
+        return any(
+            window.requests >= HEAVY_HITTER_THROTTLE_MIN_REQUESTS
+            and window.guaranteed_share(client_ip) >= self.throttle_share
+            for window in (self._current, self._previous)
+        )
+
+    def rate_limit_for(self, client_ip: str, max_requests: int) -> int:
+        if self.is_heavy(client_ip):
+            return max(1, max_requests // HEAVY_HITTER_THROTTLE_FACTOR)
+        return max_requests
+
+    def top_submitters(self, limit: int = 10, by: str = "requests", previous: bool = False) -> Dict[str, Any]:
+        """Top submitters of a window, merged over all workers when state is shared."""
+        window = self._merged_window(self.window(previous))
+        summary = window.top_tokens if by == "tokens" else window.top_requests
+        submitters = [window.submitter(client_ip) for client_ip, _, _ in summary.top(limit)]
+        for submitter in submitters:
+            submitter["throttled"] = self.is_heavy(submitter["client_ip"])
+        return {
+            "window_start": window.start,
+            "window_seconds": self.window_seconds,
+            "total_requests": window.requests,
+            "total_tokens": window.tokens,
+            "submitters": submitters,
+        }
+
+    def _merged_window(self, window: SubmitterWindow) -> SubmitterWindow:
+        own_path = shared_path("submitters", f"{os.getpid()}.json")
+        if own_path is None:
+            return window
+        merged = SubmitterWindow(window.start, self.capacity)
+        merged.merge(window.state())
+        for path in own_path.parent.glob("*.json"):
+            if path == own_path:
+                continue
+            try:
+                states = json.loads(path.read_text())
+            except (OSError, ValueError):
+                continue
+            # Files of exited workers age out with their windows
+            for state in states:
+                if state["start"] == window.start:
+                    merged.merge(state)
+        return merged
+
+    def write_state(self):
+        """Atomically write this worker's windows to the shared directory."""
+        path = shared_path("submitters", f"{os.getpid()}.json")
+        if path is None:
+            return
+        self._rotate()
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps([self._current.state(), self._previous.state()]))
+        os.replace(temp, path)
+
+
+submitter_tracker = SubmitterTracker()
+
+
+async def flush_submitters_periodically(interval: float = METRICS_FLUSH_INTERVAL):
+    """Background task keeping this worker's sketches at most ``interval`` seconds stale."""
+    while True:
+        try:
+            submitter_tracker.write_state()
+        except OSError as e:
+            logger.warning(f"Could not write submitter sketches: {str(e)}")
+        await asyncio.sleep(interval)
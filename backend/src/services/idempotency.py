@@ -0,0 +1,283 @@
+"""Idempotency-Key handling for ``/triage``, in memory or shared across workers.
+
+A client that retries with the same ``Idempotency-Key`` gets the first
+attempt's response instead of paying for another LLM call and inserting
+another record. A retry that arrives while the first attempt is still running
+waits for it. Keys are kept as 16-byte digests next to a hash of the request,
+so a key reused for a different request is rejected rather than replayed.
+
+Each attempt claims its key with a random owner token and only completes or
+releases a claim it still owns. With several workers a claim is a lease that
+its owner renews while the request runs. A claim whose worker died is taken
+over once the lease runs out, and the old owner can no longer overwrite or
+delete the new owner's row. If the shared file stays locked, claiming a key
+fails with ``IdempotencyUnavailable``. Completing, releasing or renewing a
+claim is then skipped, and the claim expires with its lease.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Tuple
+
+from .shared_state import shared_path
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL_SECONDS = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+# How long a retry waits for an attempt still in progress before getting a 409
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "60"))
+IDEMPOTENCY_MAX_KEYS = int(os.getenv("IDEMPOTENCY_MAX_KEYS", "100000"))
+MAX_KEY_LENGTH = 255
+
+# Claims of a worker that died mid-request are taken over after this long;
+# live owners renew theirs every third of it
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "30"))
+# SQLite busy timeout of the shared file; a claim that waits longer gets a 503
+IDEMPOTENCY_LOCK_TIMEOUT = float(os.getenv("IDEMPOTENCY_LOCK_TIMEOUT", "5"))
+_POLL_INTERVAL = 0.05
+_PRUNE_EVERY = 1000
+
+
+class IdempotencyConflict(Exception):
+    """The key was already used for a different request."""
+
+
+class IdempotencyInProgress(Exception):
+    """The first attempt is still running after the wait timeout."""
+
+
+class IdempotencyUnavailable(Exception):
+    """The shared store stayed locked past the SQLite busy timeout."""
+
+
+class StoredResponse(NamedTuple):
+    status_code: int
+    body: bytes
+
+
+def key_digest(key: str) -> bytes:
+    return hashlib.blake2b(key.encode(), digest_size=16).digest()
+
+
+def new_owner() -> bytes:
+    """Token identifying one attempt's claim on a key."""
+    return os.urandom(8)
+
+
+def request_fingerprint(*parts: str) -> int:
+    digest = hashlib.blake2b("\x00".join(parts).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+class InMemoryIdempotencyStore:
+    """Completed responses in expiry order, plus futures for attempts in progress."""
+
+    # Claims live as long as this process, so there is no lease to renew
+    leased = False
+
+    def __init__(self, ttl: float = IDEMPOTENCY_TTL_SECONDS, max_keys: int = IDEMPOTENCY_MAX_KEYS):
+        self.ttl = ttl
+        self.max_keys = max_keys
+        # digest -> (fingerprint, expires_at, response); every entry has the same
+        # TTL, so insertion order is expiry order
+        self._completed: "OrderedDict[bytes, Tuple[int, float, StoredResponse]]" = OrderedDict()
+        self._pending: Dict[bytes, Tuple[int, asyncio.Future, bytes]] = {}
+
+    def _expire(self, now: float):
+        while self._completed:
+            digest, (_, expires_at, _) = next(iter(self._completed.items()))
+            if expires_at > now:
+                break
+            del self._completed[digest]
+
+    async def acquire(
+        self, digest: bytes, fingerprint: int, owner: bytes, wait: float = IDEMPOTENCY_WAIT_SECONDS
+    ) -> Optional[StoredResponse]:
+        """The stored response for the key, or None when ``owner`` now holds it and must complete or release it."""
+        deadline = time.monotonic() + wait
+        while True:
+            self._expire(time.time())
+            completed = self._completed.get(digest)
+            if completed is not None:
+                if completed[0] != fingerprint:
+                    raise IdempotencyConflict()
+                return completed[2]
+
+            pending = self._pending.get(digest)
+            if pending is None:
+                self._pending[digest] = (fingerprint, asyncio.get_running_loop().create_future(), owner)
+                return None
+            if pending[0] != fingerprint:
+                raise IdempotencyConflict()
+            try:
+                # Shielded so a timed-out waiter does not cancel the owner's future
+                await asyncio.wait_for(asyncio.shield(pending[1]), deadline - time.monotonic())
+            except asyncio.TimeoutError:
+                raise IdempotencyInProgress()
+
+    def _pop_claim(self, digest: bytes, owner: bytes) -> Optional[Tuple[int, asyncio.Future, bytes]]:
+        pending = self._pending.get(digest)
+        if pending is None or pending[2] != owner:
+            return None
+        return self._pending.pop(digest)
+
+    async def complete(self, digest: bytes, owner: bytes, response: StoredResponse):
+        claim = self._pop_claim(digest, owner)
+        if claim is None:
+            return
+        fingerprint, future, _ = claim
+        self._completed[digest] = (fingerprint, time.time() + self.ttl, response)
+        while len(self._completed) > self.max_keys:
+            self._completed.popitem(last=False)
+        future.set_result(None)
+
+    async def release(self, digest: bytes, owner: bytes):
+        """Give up the key without a response; a waiting retry runs the request itself."""
+        claim = self._pop_claim(digest, owner)
+        if claim is not None:
+            claim[1].set_result(None)
+
+    async def renew(self, digest: bytes, owner: bytes):
+        pass
+
+    def clear(self):
+        self._completed.clear()
+
+
+class SQLiteIdempotencyStore:
+    """The same store in a SQLite file every worker opens; waiters poll for the result.
+
+    Every statement runs in a thread, so a worker waiting for the file's write
+    lock does not stall its event loop.
+    """
+
+    leased = True
+
+    def __init__(self, path: Path, ttl: float = IDEMPOTENCY_TTL_SECONDS, lease: float = IDEMPOTENCY_LEASE_SECONDS):
+        self.path = path
+        self.ttl = ttl
+        self.lease = lease
+        self._local = threading.local()
+        self._acquires = 0
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        # status is NULL while the first attempt runs; expires_at is then its lease
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS idempotency_keys ("
+            "key BLOB PRIMARY KEY, fingerprint INTEGER NOT NULL, status INTEGER, body BLOB, "
+            "expires_at REAL NOT NULL, owner BLOB) WITHOUT ROWID"
+        )
+        # Files from before owner tokens, when SHARED_STATE_DIR is kept across restarts
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(idempotency_keys)")}
+        if "owner" not in columns:
+            conn.execute("ALTER TABLE idempotency_keys ADD COLUMN owner BLOB")
+
+    def _connection(self) -> sqlite3.Connection:
+        # One connection per thread and process, as for the shared rate limiter
+        if getattr(self._local, "pid", None) != os.getpid():
+            self._local.conn = sqlite3.connect(self.path, timeout=IDEMPOTENCY_LOCK_TIMEOUT, isolation_level=None)
+            self._local.conn.execute("PRAGMA synchronous=OFF")
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def _try_acquire(self, digest: bytes, fingerprint: int, owner: bytes) -> Tuple[bool, Optional[StoredResponse]]:
+        """(settled, response): settled is False while another attempt holds the key."""
+        now = time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            self._acquires += 1
+            if self._acquires % _PRUNE_EVERY == 0:
+                conn.execute("DELETE FROM idempotency_keys WHERE expires_at <= ?", (now,))
+            else:
+                conn.execute("DELETE FROM idempotency_keys WHERE key = ? AND expires_at <= ?", (digest, now))
+            row = conn.execute(
+                "SELECT fingerprint, status, body FROM idempotency_keys WHERE key = ?", (digest,)
+            ).fetchone()
+            if row is None:
+                conn.execute(
+                    "INSERT INTO idempotency_keys (key, fingerprint, expires_at, owner) VALUES (?, ?, ?, ?)",
+                    (digest, fingerprint, now + self.lease, owner)
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        if row is None:
+            return True, None
+        if row[0] != fingerprint:
+            raise IdempotencyConflict()
+        if row[1] is None:
+            return False, None
+        return True, StoredResponse(row[1], row[2])
+
+    async def acquire(
+        self, digest: bytes, fingerprint: int, owner: bytes, wait: float = IDEMPOTENCY_WAIT_SECONDS
+    ) -> Optional[StoredResponse]:
+        deadline = time.monotonic() + wait
+        while True:
+            try:
+                settled, response = await asyncio.to_thread(self._try_acquire, digest, fingerprint, owner)
+            except sqlite3.OperationalError as e:
+                logger.warning(f"Idempotency key not claimed: {str(e)}")
+                raise IdempotencyUnavailable() from e
+            if settled:
+                return response
+            if time.monotonic() >= deadline:
+                raise IdempotencyInProgress()
+            await asyncio.sleep(_POLL_INTERVAL)
+
+    def _execute(self, statement: str, parameters: tuple):
+        try:
+            self._connection().execute(statement, parameters)
+        except sqlite3.OperationalError as e:
+            # The request itself is done; an unrenewed claim expires with its lease
+            logger.warning(f"Idempotency key update skipped: {str(e)}")
+
+    # Each statement only touches a claim its caller still owns
+
+    async def complete(self, digest: bytes, owner: bytes, response: StoredResponse):
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE idempotency_keys SET status = ?, body = ?, expires_at = ? "
+            "WHERE key = ? AND owner = ? AND status IS NULL",
+            (response.status_code, response.body, time.time() + self.ttl, digest, owner)
+        )
+
+    async def release(self, digest: bytes, owner: bytes):
+        await asyncio.to_thread(
+            self._execute,
+            "DELETE FROM idempotency_keys WHERE key = ? AND owner = ? AND status IS NULL",
+            (digest, owner)
+        )
+
+    async def renew(self, digest: bytes, owner: bytes):
+        await asyncio.to_thread(
+            self._execute,
+            "UPDATE idempotency_keys SET expires_at = ? WHERE key = ? AND owner = ? AND status IS NULL",
+            (time.time() + self.lease, digest, owner)
+        )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM idempotency_keys")
+
+
+async def renew_periodically(store, digest: bytes, owner: bytes):
+    """Keep ``owner``'s lease alive until cancelled."""
+    while True:
+        await asyncio.sleep(store.lease / 3)
+        await store.renew(digest, owner)
+
+
+def create_idempotency_store():
+    """Shared store when running multi-process, otherwise the in-memory one."""
+    path = shared_path("idempotency.db")
+    if path is None:
+        return InMemoryIdempotencyStore()
+    return SQLiteIdempotencyStore(path)
@@ -0,0 +1,267 @@
+"""Incremental clustering of urgent bug reports into incidents.
+
+During an outage many near-identical urgent reports arrive. Each one is
+reduced to a MinHash signature over its word unigrams and bigrams, and
+locality-sensitive hashing (``LSH_BANDS`` bands of ``LSH_ROWS`` values) finds
+clusters whose signatures collide in at least one band. The report joins the
+candidate with the highest estimated Jaccard similarity above
+``INCIDENT_SIMILARITY``, or starts a new cluster. Assignment touches only the
+colliding buckets, so it stays well under a millisecond regardless of how
+many reports are indexed.
+
+Clusters live in a sliding window: a cluster with no new report for
+``INCIDENT_WINDOW_HOURS`` is dropped together with its bucket entries. Adding
+reports expires clusters at most once per ``EXPIRE_INTERVAL`` of report time,
+so memory stays bounded even when nobody reads the incident list. When a
+re-triage job relabels records inside the window, the window is rebuilt.
+"""
+import logging
+import os
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import and_, or_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.database import FeedbackRecord
+from .retriage_service import relabelled_ranges
+from .text_features import shingles
+
+logger = logging.getLogger(__name__)
+
+INCIDENT_CLUSTERING_ENABLED = os.getenv("INCIDENT_CLUSTERING_ENABLED", "true").lower() == "true"
+INCIDENT_WINDOW_HOURS = float(os.getenv("INCIDENT_WINDOW_HOURS", "6"))
+INCIDENT_SIMILARITY = float(os.getenv("INCIDENT_SIMILARITY", "0.4"))
+INCIDENT_MIN_URGENCY = int(os.getenv("INCIDENT_MIN_URGENCY", "4"))
+INCIDENT_CATEGORIES = ("Bug Report",)
+
+# 12 bands x 3 rows: pairs with Jaccard 0.5 collide in some band ~80% of the
+# time, 0.7 >99%, 0.3 ~28%
+LSH_BANDS = 12
+LSH_ROWS = 3
+NUM_HASHES = LSH_BANDS * LSH_ROWS
+# Member signatures indexed per cluster, so reworded reports still find it
+MAX_INDEXED_SIGNATURES = 16
+MAX_SAMPLE_IDS = 5
+EXPIRE_INTERVAL = timedelta(minutes=1)
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20240101)
+_HASH_A = _rng.integers(1, _MERSENNE_PRIME, NUM_HASHES, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _MERSENNE_PRIME, NUM_HASHES, dtype=np.uint64)
+
+
+def minhash(text: str) -> Optional[np.ndarray]:
+    """MinHash signature of the text's shingles, or None for text without words."""
+    tokens = shingles(text)
+    if not tokens:
+        return None
+    # crc32 is stable across processes, unlike hash() on str
+    values = np.fromiter((zlib.crc32(token.encode()) for token in tokens), dtype=np.uint64, count=len(tokens))
+    # Universal hashing (a*x + b) mod p; products of 32-bit x and a < 2^61 wrap
+    # mod 2^64, which still mixes well enough for MinHash
+    hashed = (values[:, None] * _HASH_A + _HASH_B) % np.uint64(_MERSENNE_PRIME)
+    return hashed.min(axis=0)
+
+
+def band_keys(signature: np.ndarray) -> List[Tuple[int, bytes]]:
+    return [
+        (band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+        for band in range(LSH_BANDS)
+    ]
+
+
+class IncidentCluster:
+    __slots__ = (
+        "id", "signatures", "representative_id", "representative_text", "count",
+        "first_seen", "last_seen", "max_urgency", "sample_ids", "indexed_keys",
+    )
+
+    def __init__(self, cluster_id: int, signature: np.ndarray, record_id: int, text: str, created_at: datetime, urgency: int):
+        self.id = cluster_id
+        # Representative first, then up to MAX_INDEXED_SIGNATURES - 1 members
+        self.signatures = np.empty((0, NUM_HASHES), dtype=np.uint64)
+        self.representative_id = record_id
+        self.representative_text = text
+        self.count = 0
+        self.first_seen = created_at
+        self.last_seen = created_at
+        self.max_urgency = urgency
+        self.sample_ids = deque(maxlen=MAX_SAMPLE_IDS)
+        self.indexed_keys: List[Tuple[int, bytes]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "cluster_id": self.id,
+            "count": self.count,
+            "first_seen": self.first_seen.isoformat(),
+            "last_seen": self.last_seen.isoformat(),
+            "max_urgency": self.max_urgency,
+            "representative_id": self.representative_id,
+            "representative_text": self.representative_text,
+            "recent_ids": list(reversed(self.sample_ids)),
+        }
+
+
+class IncidentIndex:
+    """LSH index of active incident clusters."""
+
+    def __init__(
+        self,
+        window: timedelta = timedelta(hours=INCIDENT_WINDOW_HOURS),
+        similarity: float = INCIDENT_SIMILARITY,
+        min_urgency: int = INCIDENT_MIN_URGENCY
+    ):
+        self.window = window
+        self.similarity = similarity
+        self.min_urgency = min_urgency
+        self._clusters: Dict[int, IncidentCluster] = {}
+        self._buckets: Dict[Tuple[int, bytes], Set[int]] = {}
+        self._next_id = 1
+        self._max_id = 0
+        self._next_expiry = datetime.min
+        self._loaded = False
+        # Re-triage run id -> last id whose labels are reflected here
+        self._relabelled: Dict[int, int] = {}
+
+    @property
+    def loaded(self) -> bool:
+        """True once the window has been read from the database."""
+        return self._loaded
+
+    def __len__(self) -> int:
+        return len(self._clusters)
+
+    def _clear(self):
+        self._clusters.clear()
+        self._buckets.clear()
+        self._max_id = 0
+        self._next_expiry = datetime.min
+
+    def reset(self):
+        self._clear()
+        self._relabelled = {}
+        self._loaded = False
+
+    def eligible(self, category: str, urgency_score: int) -> bool:
+        return category in INCIDENT_CATEGORIES and urgency_score >= self.min_urgency
+
+    def _index(self, cluster: IncidentCluster, signature: np.ndarray):
+        if len(cluster.signatures) >= MAX_INDEXED_SIGNATURES:
+            return
+        cluster.signatures = np.vstack([cluster.signatures, signature])
+        for key in band_keys(signature):
+            members = self._buckets.setdefault(key, set())
+            if cluster.id not in members:
+                members.add(cluster.id)
+                cluster.indexed_keys.append(key)
+
+    def _drop(self, cluster: IncidentCluster):
+        for key in cluster.indexed_keys:
+            members = self._buckets.get(key)
+            if members is not None:
+                members.discard(cluster.id)
+                if not members:
+                    del self._buckets[key]
+        del self._clusters[cluster.id]
+
+    def expire(self, now: Optional[datetime] = None):
+        """Drop clusters whose last report is older than the window."""
+        cutoff = (now or datetime.utcnow()) - self.window
+        for cluster in [c for c in self._clusters.values() if c.last_seen < cutoff]:
+            self._drop(cluster)
+
+    def add(
+        self,
+        record_id: int,
+        text: str,
+        created_at: Optional[datetime],
+        category: str,
+        urgency_score: int
+    ) -> Optional[int]:
+        """Assign an eligible record to a cluster; returns the cluster id (None if not eligible)."""
+        self._max_id = max(self._max_id, record_id)
+        if not self.eligible(category, urgency_score):
+            return None
+        signature = minhash(text)
+        if signature is None:
+            return None
+        created_at = created_at.replace(tzinfo=None) if created_at else datetime.utcnow()
+        if created_at >= self._next_expiry:
+            # Clusters this old could not take the report anyway
+            self.expire(created_at)
+            self._next_expiry = created_at + EXPIRE_INTERVAL
+
+        candidates = set()
+        for key in band_keys(signature):
+            candidates.update(self._buckets.get(key, ()))
+
+        best, best_similarity = None, self.similarity
+        for cluster_id in candidates:
+            cluster = self._clusters[cluster_id]
+            if created_at - cluster.last_seen > self.window:
+                continue
+            # Estimated Jaccard similarity to the closest indexed member
+            similarity = float((cluster.signatures == signature).sum(axis=1).max()) / NUM_HASHES
+            if similarity >= best_similarity:
+                best, best_similarity = cluster, similarity
+
+        if best is None:
+            best = IncidentCluster(self._next_id, signature, record_id, text, created_at, urgency_score)
+            self._clusters[best.id] = best
+            self._next_id += 1
+        best.count += 1
+        best.first_seen = min(best.first_seen, created_at)
+        best.last_seen = max(best.last_seen, created_at)
+        best.max_urgency = max(best.max_urgency, urgency_score)
+        best.sample_ids.append(record_id)
+        self._index(best, signature)
+        return best.id
+
+    def add_record(self, record: FeedbackRecord) -> Optional[int]:
+        return self.add(record.id, record.feedback_text, record.created_at, record.category, record.urgency_score)
+
+    async def catch_up(self, db: AsyncSession) -> int:
+        """Index eligible records inside the window with ids above the last one seen."""
+        cutoff = datetime.utcnow() - self.window
+        ranges = await relabelled_ranges(db, self._relabelled)
+        if self._loaded and ranges:
+            relabelled = select(FeedbackRecord.id).where(
+                or_(*(and_(FeedbackRecord.id > after, FeedbackRecord.id <= through) for after, through in ranges)),
+                FeedbackRecord.created_at >= cutoff
+            ).limit(1)
+            if (await db.execute(relabelled)).first() is not None:
+                # Labels changed inside the window; index it again
+                self._clear()
+        query = select(
+            FeedbackRecord.id,
+            FeedbackRecord.feedback_text,
+            FeedbackRecord.created_at,
+            FeedbackRecord.category,
+            FeedbackRecord.urgency_score
+        ).where(and_(
+            FeedbackRecord.id > self._max_id,
+            FeedbackRecord.created_at >= cutoff,
+            FeedbackRecord.category.in_(INCIDENT_CATEGORIES),
+            FeedbackRecord.urgency_score >= self.min_urgency
+        )).order_by(FeedbackRecord.id)
+        rows = (await db.execute(query)).all()
+        for row in rows:
+            # Concurrent catch-ups may fetch the same rows
+            if row[0] > self._max_id:
+                self.add(*row)
+        self._loaded = True
+        return len(rows)
+
+    def active_clusters(self, limit: int = 20, min_count: int = 1) -> List[Dict[str, Any]]:
+        """Active clusters, largest first, then most recent."""
+        self.expire()
+        clusters = [c for c in self._clusters.values() if c.count >= min_count]
+        clusters.sort(key=lambda c: (c.count, c.last_seen), reverse=True)
+        return [cluster.to_dict() for cluster in clusters[:limit]]
+
+
+incident_index = IncidentIndex()
@@ -0,0 +1,119 @@
+"""Priority scheduling of LLM calls when concurrency is saturated.
+
+At most ``LLM_MAX_CONCURRENCY`` completions run at once. When all slots are
+busy, waiting requests are served by a cheap pre-priority computed from the
+feedback text, so an outage report is not stuck behind a queue of praise.
+
+Aging uses a virtual deadline: a request of class ``c`` enqueued at ``t`` is
+ranked by ``t + c * LLM_PRIORITY_AGING_SECONDS``. A low-priority request can
+be overtaken only by requests that arrive less than its class offset after
+it, so it never waits behind more than that much newer traffic. The ranking
+never changes after enqueue, so a plain heap works.
+"""
+import asyncio
+import heapq
+import itertools
+import os
+import re
+import time
+from contextlib import asynccontextmanager
+from typing import List, Tuple
+
+from .metrics import LLM_QUEUE_WAIT, LLM_QUEUE_DEPTH
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+LLM_PRIORITY_AGING_SECONDS = float(os.getenv("LLM_PRIORITY_AGING_SECONDS", "5"))
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+PRIORITY_NAMES = ("high", "normal", "low")
+
+_URGENT_PATTERN = re.compile(
+    r"\b(urgent|asap|emergency|critical|outage|down|broken|crash\w*|fail\w*|"
+    r"can'?t|cannot|unable|error|blocked|blocking|lost|losing|data loss|"
+    r"security|breach|hacked|payment\w*|charged|refund)\b",
+    re.IGNORECASE
+)
+_LOW_PATTERN = re.compile(
+    r"\b(thanks?|thank you|love|great|amazing|awesome|excellent|nice|"
+    r"wish|would be nice|suggest\w*|idea)\b",
+    re.IGNORECASE
+)
+
+
+def pre_priority(feedback_text: str) -> int:
+    """Guess the priority class from keywords, before the LLM has classified it."""
+    if _URGENT_PATTERN.search(feedback_text) or feedback_text.count("!") >= 3:
+        return PRIORITY_HIGH
+    if _LOW_PATTERN.search(feedback_text):
+        return PRIORITY_LOW
+    return PRIORITY_NORMAL
+
+
+class PriorityScheduler:
+    """Concurrency limiter that admits waiters by aged priority instead of FIFO."""
+    
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        aging_seconds: float = LLM_PRIORITY_AGING_SECONDS
+    ):
+        self.max_concurrency = max_concurrency
+        self.aging_seconds = aging_seconds
+        self._active = 0
+        self._waiters: List[Tuple[float, int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+    
+    @property
+    def active(self) -> int:
+        return self._active
+    
+    def __len__(self) -> int:
+        """Requests waiting for a slot."""
+        return sum(1 for *_, future in self._waiters if not future.done())
+    
+    async def acquire(self, priority: int = PRIORITY_NORMAL):
+        name = PRIORITY_NAMES[priority]
+        # Drop waiters that were cancelled while queued
+        while self._waiters and self._waiters[0][-1].done():
+            heapq.heappop(self._waiters)
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            LLM_QUEUE_WAIT.observe(0.0, name)
+            return
+        
+        enqueued = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        rank = enqueued + priority * self.aging_seconds
+        heapq.heappush(self._waiters, (rank, next(self._sequence), priority, future))
+        LLM_QUEUE_DEPTH.inc(name)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # The slot was handed over just as we were cancelled; pass it on
+                self.release()
+            else:
+                LLM_QUEUE_DEPTH.dec(name)
+            raise
+        LLM_QUEUE_WAIT.observe(time.monotonic() - enqueued, name)
+    
+    def release(self):
+        """Hand the slot to the best-ranked live waiter, or free it."""
+        while self._waiters:
+            *_, priority, future = heapq.heappop(self._waiters)
+            if future.done():
+                continue
+            LLM_QUEUE_DEPTH.dec(PRIORITY_NAMES[priority])
+            future.set_result(None)
+            return
+        self._active -= 1
+    
+    @asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release()
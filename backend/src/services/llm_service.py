@@ -1,34 +1,32 @@
 import json
+import math
 import os
 import logging
-from typing import Dict, Any
-from openai import AsyncOpenAI
+import time
+from types import SimpleNamespace
+from typing import Dict, Any, Optional
 import asyncio
 
-class LLMService:
-    def __init__(self):
-        self.api_key = os.getenv("LLM_API_KEY")
-        self.model = os.getenv("LLM_MODEL", "o4-mini-2025-04-16")
-        self.base_url = os.getenv("LLM_BASE_URL")
-        self.logger = logging.getLogger(__name__)
-        
-        if not self.api_key:
-            raise ValueError("LLM_API_KEY environment variable is required")
-        
-        self.logger.info(f"LLM Service initialized with model: {self.model}")
-        
-        if self.base_url:
-            self.client = AsyncOpenAI(
-                api_key=self.api_key,
-                base_url=self.base_url
-            )
-        else:
-            self.client = AsyncOpenAI(
-                api_key=self.api_key
-            )
-    
-    def _create_prompt(self, feedback_text: str) -> str:
-        prompt = f"""You are a feedback analysis agent. Your task is to analyze user feedback and classify it into one of four categories, then assign an urgency score.
+from .metrics import (
+    TRIAGE_STAGE_DURATION,
+    LLM_UPSTREAM_RESPONSES,
+    LLM_TIER_REQUESTS,
+    LLM_TIER_DURATION,
+    LLM_TIER_TOKENS,
+    LLM_TIER_COST,
+    LLM_PARSE_FAILURES,
+    LLM_REPAIRS,
+    LLM_TIME_TO_FIRST_TOKEN,
+    LLM_TIME_TO_VERDICT,
+)
+from .llm_scheduler import PriorityScheduler, pre_priority
+from .few_shot import FEW_SHOT_K, FEW_SHOT_MODE, examples_for
+
+# Which model answered: the cascade's cheap model, or LLM_MODEL (alone or escalated to)
+TIER_CHEAP = "cheap"
+TIER_PRIMARY = "primary"
+
+_PROMPT_INSTRUCTIONS = """You are a feedback analysis agent. Your task is to analyze user feedback and classify it into one of four categories, then assign an urgency score.
 
 Categories:
 - "Bug Report": Identifies a technical issue or something that is broken
@@ -43,73 +41,474 @@ Urgency Scale (1-5):
 - 4: High
 - 5: Critical
 
-Here are some examples to guide your analysis:
+Respond with ONLY a JSON object in this exact format:
+{response_format}
 
-Example 1:
-Feedback: "The login page crashes every time I try to sign in with my Google account. This is blocking me from accessing my work files."
-Analysis: {{"category": "Bug Report", "urgency_score": 4}}
+Use the examples below to guide your analysis."""
+PROMPT_INSTRUCTIONS = _PROMPT_INSTRUCTIONS.format(
+    response_format='{"category": "category_name", "urgency_score": number}'
+)
+PROMPT_INSTRUCTIONS_WITH_CONFIDENCE = _PROMPT_INSTRUCTIONS.format(
+    response_format=(
+        '{"category": "category_name", "urgency_score": number, "confidence": number}\n'
+        'where confidence is your probability (0.0 to 1.0) that both fields are correct'
+    )
+)
 
-Example 2:
-Feedback: "Would love to see a dark mode option in the settings. It would make using the app at night much easier."
-Analysis: {{"category": "Feature Request", "urgency_score": 2}}
+VALID_CATEGORIES = ["Bug Report", "Feature Request", "Praise/Positive Feedback", "General Inquiry"]
 
-Example 3:
-Feedback: "Amazing update! The new interface is so much cleaner and faster. Great job team!"
-Analysis: {{"category": "Praise/Positive Feedback", "urgency_score": 1}}
+# "json_schema" constrains replies to CLASSIFICATION_SCHEMA; "json_object" only
+# to valid JSON, for providers without schema support
+STRUCTURED_OUTPUT_MODES = ("off", "json_schema", "json_object")
 
-Example 4:
-Feedback: "How do I change my notification settings? I can't find the option anywhere in the menu."
-Analysis: {{"category": "General Inquiry", "urgency_score": 2}}
 
-Example 5:
-Feedback: "URGENT: Payment processing is completely broken! Customers can't complete purchases and we're losing revenue!"
-Analysis: {{"category": "Bug Report", "urgency_score": 5}}
+def classification_schema(with_confidence: bool = False) -> Dict[str, Any]:
+    properties = {
+        "category": {"type": "string", "enum": VALID_CATEGORIES},
+        "urgency_score": {"type": "integer", "enum": [1, 2, 3, 4, 5]},
+    }
+    if with_confidence:
+        properties["confidence"] = {"type": "number"}
+    # Strict mode needs every property required and no others allowed
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
 
-Example 6:
-Feedback: "The search function could be improved with filters for date, category, and price range."
-Analysis: {{"category": "Feature Request", "urgency_score": 3}}
 
-Now analyze the following feedback and respond with ONLY a JSON object in this exact format:
-{{"category": "category_name", "urgency_score": number}}
+def new_spend() -> Dict[str, Any]:
+    """Per-request LLM usage, returned with the classification and stored with its record."""
+    return {
+        "llm_tokens": 0,
+        "llm_prompt_tokens": 0,
+        "llm_completion_tokens": 0,
+        "llm_cost_usd": 0.0,
+        "llm_latency_ms": 0.0,
+        # True when any call's usage was estimated instead of reported
+        "llm_usage_estimated": False,
+    }
+
+
+class JSONObjectScanner:
+    """Find complete top-level JSON objects in text that arrives in pieces.
+    
+    Braces inside strings are ignored, as is anything between objects, so
+    prose around the reply does not confuse the scan.
+    """
+    
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._depth = 0
+        self._start = 0
+        self._in_string = False
+        self._escaped = False
+    
+    def feed(self, piece: str) -> Optional[str]:
+        """Append ``piece``; the next complete object, or None.
+        
+        Call again with ``""`` to look for a further object in text already fed.
+        """
+        self.text += piece
+        text = self.text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._depth == 0:
+                if char == "{":
+                    self._depth, self._start = 1, i
+            elif self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+            elif char == '"':
+                self._in_string = True
+            elif char == "{":
+                self._depth += 1
+            elif char == "}":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._pos = i + 1
+                    return text[self._start:i + 1]
+        self._pos = len(text)
+        return None
+
+
+def _is_verdict(candidate: str) -> bool:
+    try:
+        value = json.loads(candidate)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(value, dict) and "category" in value and "urgency_score" in value
+
+
+class InvalidFeedback(ValueError):
+    """The submitted feedback text itself is invalid (as opposed to the LLM's reply)."""
+
+
+class LLMService:
+    def __init__(self):
+        self.api_key = os.getenv("LLM_API_KEY")
+        self.model = os.getenv("LLM_MODEL", "o4-mini-2025-04-16")
+        self.base_url = os.getenv("LLM_BASE_URL")
+        self.logger = logging.getLogger(__name__)
+        self._client = None
+        self.scheduler = PriorityScheduler()
+        # "static" sends the six built-in examples; "dynamic" the most similar stored ones
+        self.few_shot_mode = os.getenv("FEW_SHOT_MODE", FEW_SHOT_MODE).lower()
+        self.few_shot_k = int(os.getenv("FEW_SHOT_K", str(FEW_SHOT_K)))
+        
+        # Model cascade: when set, this model answers first and LLM_MODEL only
+        # sees feedback it is not confident about
+        self.cascade_model = os.getenv("LLM_CASCADE_MODEL")
+        self.cascade_threshold = float(os.getenv("LLM_CASCADE_THRESHOLD", "0.8"))
+        # "self_report" asks for a confidence field; "logprobs" uses token probabilities
+        self.cascade_confidence = os.getenv("LLM_CASCADE_CONFIDENCE", "self_report")
+        self.cascade_timeout = float(os.getenv("LLM_CASCADE_TIMEOUT", "10"))
+        self.structured_output = os.getenv("LLM_STRUCTURED_OUTPUT", "off").lower()
+        if self.structured_output not in STRUCTURED_OUTPUT_MODES:
+            raise ValueError(f"LLM_STRUCTURED_OUTPUT must be one of {STRUCTURED_OUTPUT_MODES}")
+        # A constrained reply is ~20 tokens; reasoning (o1/o4) models are not capped
+        self.structured_max_tokens = int(os.getenv("LLM_STRUCTURED_MAX_TOKENS", "32"))
+        # Stream completions and stop reading once the classification object is complete
+        self.streaming = os.getenv("LLM_STREAMING", "false").lower() == "true"
+        # Blended USD price per 1K tokens, for the per-tier cost counter
+        self.tier_prices = {
+            TIER_CHEAP: float(os.getenv("LLM_CASCADE_COST_PER_1K_TOKENS", "0")),
+            TIER_PRIMARY: float(os.getenv("LLM_COST_PER_1K_TOKENS", "0")),
+        }
+        
+        self.logger.info(f"LLM Service initialized with model: {self.model}")
+        if self.cascade_model:
+            self.logger.info(f"LLM cascade enabled: {self.cascade_model} first, threshold {self.cascade_threshold}")
+    
+    @property
+    def client(self):
+        """The OpenAI client, created on first use.
+        
+        The SDK takes about half a second to import, so it is only loaded once
+        a request (or the startup warm-up) actually needs it.
+        """
+        if self._client is None:
+            if not self.api_key:
+                # Not a ValueError: that is reported to the client as invalid input
+                raise RuntimeError("LLM_API_KEY environment variable is required")
+            
+            from openai import AsyncOpenAI
+            
+            if self.base_url:
+                self._client = AsyncOpenAI(
+                    api_key=self.api_key,
+                    base_url=self.base_url
+                )
+            else:
+                self._client = AsyncOpenAI(
+                    api_key=self.api_key
+                )
+        return self._client
+    
+    @client.setter
+    def client(self, value):
+        self._client = value
+    
+    async def check_connection(self, timeout: float = 5.0):
+        """Make a cheap authenticated request, opening a pooled HTTP connection."""
+        await asyncio.wait_for(self.client.models.list(), timeout=timeout)
+    
+    def _create_prompt(self, feedback_text: str, with_confidence: bool = False) -> str:
+        # Instructions and response format come first and never change, so
+        # providers with prompt caching can reuse that prefix across requests
+        instructions = PROMPT_INSTRUCTIONS_WITH_CONFIDENCE if with_confidence else PROMPT_INSTRUCTIONS
+        return f"""{instructions}
+
+{examples_for(feedback_text, self.few_shot_mode, self.few_shot_k)}
 
 Feedback to analyze: "{feedback_text}"
 
 Response:"""
-        return prompt
     
     async def analyze_feedback(self, feedback_text: str) -> Dict[str, Any]:
         # Input validation
         if not feedback_text or not feedback_text.strip():
-            raise ValueError("Feedback text cannot be empty")
+            raise InvalidFeedback("Feedback text cannot be empty")
         
         if len(feedback_text) > 1000:
-            raise ValueError("Feedback text exceeds maximum length of 1000 characters")
+            raise InvalidFeedback("Feedback text exceeds maximum length of 1000 characters")
         
-        prompt = self._create_prompt(feedback_text.strip())
+        feedback_text = feedback_text.strip()
+        prompt = self._create_prompt(feedback_text)
+        # Usage across every call made, including an escalated cheap attempt and repairs
+        spend = new_spend()
         
         try:
-            # Different models may require different parameters
-            if self.model.startswith("o1-") or self.model.startswith("o4-"):
-                # For o1/o4 models, use simplified parameters
-                response = await asyncio.wait_for(
-                    self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[{"role": "user", "content": prompt}]
-                    ),
-                    timeout=30.0
-                )
-            else:
-                # For other models (GPT-3.5, GPT-4, etc.)
-                response = await asyncio.wait_for(
-                    self.client.chat.completions.create(
-                        model=self.model,
-                        messages=[{"role": "user", "content": prompt}],
-                        max_tokens=100,
-                        temperature=0.3
-                    ),
-                    timeout=30.0
-                )
+            # Urgent-looking feedback goes first when every slot is busy
+            async with self.scheduler.slot(pre_priority(feedback_text)):
+                if self.cascade_model:
+                    result = await self._try_cheap_tier(feedback_text, spend)
+                    if result is not None:
+                        result.update(spend)
+                        return result
+                result = await self._ask_tier(TIER_PRIMARY, self.model, prompt, spend=spend, repair_text=feedback_text)
             
+            LLM_TIER_REQUESTS.inc(TIER_PRIMARY, "answered")
+            result["model_tier"] = TIER_PRIMARY
+            result.update(spend)
+            return result
+                
+        except asyncio.TimeoutError:
+            self.logger.error("LLM API request timed out")
+            raise Exception("LLM API request timed out")
+        except ValueError:
+            # Re-raise ValueError exceptions (validation errors) as-is
+            raise
+        except Exception as e:
+            self.logger.error(f"LLM API error: {str(e)}")
+            raise Exception(f"LLM API error: {str(e)}")
+    
+    async def _try_cheap_tier(self, feedback_text: str, spend: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """Classify with the cascade model; None when the answer should be escalated."""
+        use_logprobs = self.cascade_confidence == "logprobs"
+        prompt = self._create_prompt(feedback_text, with_confidence=not use_logprobs)
+        try:
+            result, response = await self._ask_tier(
+                TIER_CHEAP, self.cascade_model, prompt, timeout=self.cascade_timeout, logprobs=use_logprobs,
+                with_confidence=not use_logprobs, with_response=True, spend=spend
+            )
+        except Exception as e:
+            # A failed or malformed cheap answer is escalated rather than surfaced
+            LLM_TIER_REQUESTS.inc(TIER_CHEAP, "error")
+            self.logger.warning(f"Cascade model failed, escalating: {str(e)}")
+            return None
+        
+        reported = result.pop("confidence", None)
+        confidence = self._logprob_confidence(response) if use_logprobs else reported
+        if not isinstance(confidence, (int, float)) or confidence < self.cascade_threshold:
+            LLM_TIER_REQUESTS.inc(TIER_CHEAP, "escalated")
+            return None
+        
+        LLM_TIER_REQUESTS.inc(TIER_CHEAP, "answered")
+        result["model_tier"] = TIER_CHEAP
+        return result
+    
+    async def _ask_tier(
+        self,
+        tier: str,
+        model: str,
+        prompt: str,
+        timeout: float = 30.0,
+        logprobs: bool = False,
+        with_confidence: bool = False,
+        with_response: bool = False,
+        spend: Optional[Dict[str, Any]] = None,
+        repair_text: Optional[str] = None
+    ):
+        """Complete and parse one prompt, recording per-tier latency, tokens and cost.
+        
+        Tokens, cost and latency are also added to ``spend`` when given. With
+        ``repair_text`` (the feedback being classified), an invalid reply gets
+        one short repair request instead of failing.
+        """
+        response_format = self._response_format(with_confidence)
+        response = await self._timed_complete(
+            tier, spend, prompt, model=model, timeout=timeout, logprobs=logprobs, response_format=response_format
+        )
+        self._record_usage(tier, response, spend)
+        
+        try:
+            result = self._parse_response(response)
+        except ValueError as e:
+            LLM_PARSE_FAILURES.inc(tier)
+            if repair_text is None:
+                raise
+            result, response = await self._repair(tier, model, repair_text, response, str(e), response_format, spend)
+        return (result, response) if with_response else result
+    
+    async def _repair(self, tier: str, model: str, feedback_text: str, invalid, error: str, response_format, spend):
+        """Ask once more with only the invalid reply and the allowed values, not the full prompt."""
+        message = getattr(invalid.choices[0], "message", None) if invalid.choices else None
+        reply = (getattr(message, "content", None) or "")[:300]
+        prompt = f"""Your previous reply to a feedback classification request was invalid: {error}
+
+Previous reply: {reply}
+
+The category must be one of {json.dumps(VALID_CATEGORIES)} and urgency_score an integer from 1 to 5.
+Respond with ONLY a JSON object in this exact format:
+{{"category": "category_name", "urgency_score": number}}
+
+Feedback: "{feedback_text}"
+
+Response:"""
+        try:
+            response = await self._timed_complete(tier, spend, prompt, model=model, response_format=response_format)
+            self._record_usage(tier, response, spend)
+            result = self._parse_response(response)
+        except Exception:
+            LLM_REPAIRS.inc("failed")
+            raise
+        LLM_REPAIRS.inc("repaired")
+        self.logger.info(f"Repaired invalid LLM reply: {error}")
+        return result, response
+    
+    async def _timed_complete(self, tier: str, spend: Optional[Dict[str, Any]], prompt: str, **kwargs):
+        """``_complete`` with its upstream latency recorded per tier and added to ``spend``."""
+        start = time.perf_counter()
+        try:
+            return await self._complete(prompt, tier=tier, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            LLM_TIER_DURATION.observe(elapsed, tier)
+            if spend is not None:
+                spend["llm_latency_ms"] += elapsed * 1000
+    
+    def _record_usage(self, tier: str, response, spend: Optional[Dict[str, Any]]):
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        completion_tokens = getattr(usage, "completion_tokens", None)
+        if isinstance(prompt_tokens, int) and isinstance(completion_tokens, int):
+            LLM_TIER_TOKENS.inc(tier, "prompt", amount=prompt_tokens)
+            LLM_TIER_TOKENS.inc(tier, "completion", amount=completion_tokens)
+            cost = (prompt_tokens + completion_tokens) / 1000 * self.tier_prices[tier]
+            LLM_TIER_COST.inc(tier, amount=cost)
+            if spend is not None:
+                spend["llm_tokens"] += prompt_tokens + completion_tokens
+                spend["llm_prompt_tokens"] += prompt_tokens
+                spend["llm_completion_tokens"] += completion_tokens
+                spend["llm_cost_usd"] += cost
+                if getattr(usage, "estimated", False) is True:
+                    spend["llm_usage_estimated"] = True
+    
+    def _response_format(self, with_confidence: bool = False) -> Optional[Dict[str, Any]]:
+        if self.structured_output == "json_schema":
+            return {
+                "type": "json_schema",
+                "json_schema": {
+                    "name": "feedback_classification",
+                    "strict": True,
+                    "schema": classification_schema(with_confidence),
+                },
+            }
+        if self.structured_output == "json_object":
+            return {"type": "json_object"}
+        return None
+    
+    @staticmethod
+    def _logprob_confidence(response) -> Optional[float]:
+        """Probability of the least certain output token, or None without logprobs.
+        
+        JSON punctuation and keys are near-certain, so the minimum is decided by
+        the category and urgency tokens.
+        """
+        logprobs = getattr(response.choices[0], "logprobs", None)
+        if isinstance(logprobs, dict):
+            content = logprobs.get("content")
+        else:
+            content = getattr(logprobs, "content", None)
+        if not content:
+            return None
+        values = [item["logprob"] if isinstance(item, dict) else item.logprob for item in content]
+        return math.exp(min(values))
+    
+    async def _complete(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        timeout: float = 30.0,
+        logprobs: bool = False,
+        response_format: Optional[Dict[str, Any]] = None,
+        tier: str = TIER_PRIMARY
+    ):
+        """Call the chat completions API, recording latency and upstream status."""
+        model = model or self.model
+        params = {"model": model, "messages": [{"role": "user", "content": prompt}]}
+        # Different models may require different parameters; o1/o4 models take neither
+        if not (model.startswith("o1-") or model.startswith("o4-")):
+            params["max_tokens"] = self.structured_max_tokens if response_format is not None else 100
+            params["temperature"] = 0.3
+        # Neither is a named parameter (json_schema is not) in the pinned SDK
+        # version, so they are sent as extra fields
+        extra_body = {}
+        if logprobs:
+            extra_body["logprobs"] = True
+        if response_format is not None:
+            extra_body["response_format"] = response_format
+        if extra_body:
+            params["extra_body"] = extra_body
+        try:
+            with TRIAGE_STAGE_DURATION.time("llm"):
+                # Logprobs are per token and only needed in full, so that call is not streamed
+                if self.streaming and not logprobs:
+                    response = await asyncio.wait_for(self._stream_completion(params, tier), timeout=timeout)
+                else:
+                    response = await asyncio.wait_for(self.client.chat.completions.create(**params), timeout=timeout)
+        except asyncio.TimeoutError:
+            LLM_UPSTREAM_RESPONSES.inc("timeout")
+            raise
+        except Exception as e:
+            # openai.APIStatusError carries the upstream status; checked by
+            # attribute so the SDK is not imported just for the except clause
+            status_code = getattr(e, "status_code", None)
+            LLM_UPSTREAM_RESPONSES.inc(str(status_code) if status_code else "error")
+            raise
+        
+        LLM_UPSTREAM_RESPONSES.inc("200")
+        return response
+    
+    async def _stream_completion(self, params: Dict[str, Any], tier: str):
+        """Stream a completion, returning as soon as a classification object is complete.
+        
+        The connection is then closed, so the provider stops generating the
+        trailing explanation. The result looks like a non-streamed completion.
+        Usage is requested, but only sent in the stream's last chunk, so when
+        the stream is cut short the tokens are estimated at ~4 characters per
+        token and the usage is marked ``estimated``.
+        """
+        start = time.perf_counter()
+        # Not a named parameter in the pinned SDK version either
+        extra_body = {**params.get("extra_body", {}), "stream_options": {"include_usage": True}}
+        stream = await self.client.chat.completions.create(stream=True, **{**params, "extra_body": extra_body})
+        scanner = JSONObjectScanner()
+        verdict, usage, first_token = None, None, True
+        try:
+            async for chunk in stream:
+                usage = getattr(chunk, "usage", None) or usage
+                if not chunk.choices:
+                    continue
+                piece = chunk.choices[0].delta.content
+                if not piece:
+                    continue
+                if first_token:
+                    LLM_TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start, tier)
+                    first_token = False
+                candidate = scanner.feed(piece)
+                while candidate is not None and not _is_verdict(candidate):
+                    candidate = scanner.feed("")
+                if candidate is not None:
+                    verdict = candidate
+                    LLM_TIME_TO_VERDICT.observe(time.perf_counter() - start, tier)
+                    break
+        finally:
+            # The SDK's stream has no close(); closing the HTTP response ends it
+            response = getattr(stream, "response", None)
+            if response is not None:
+                await response.aclose()
+        
+        # Without a verdict, the whole reply goes to parsing (and repair)
+        content = verdict if verdict is not None else scanner.text
+        if usage is None:
+            prompt = params["messages"][0]["content"]
+            usage = SimpleNamespace(
+                prompt_tokens=len(prompt) // 4, completion_tokens=len(scanner.text) // 4, estimated=True
+            )
+        message = SimpleNamespace(content=content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, logprobs=None)], usage=usage)
+    
+    def _parse_response(self, response) -> Dict[str, Any]:
+        """Extract and validate the classification from a completion."""
+        with TRIAGE_STAGE_DURATION.time("parse"):
             # Check if response has content
             if not response.choices or not response.choices[0].message.content:
                 raise ValueError("Empty response from LLM")
@@ -133,9 +532,8 @@ Response:"""
                     raise ValueError("Missing 'urgency_score' field in LLM response")
                 
                 # Validate category
-                valid_categories = ["Bug Report", "Feature Request", "Praise/Positive Feedback", "General Inquiry"]
-                if result.get("category") not in valid_categories:
-                    raise ValueError(f"Invalid category: {result.get('category')}. Must be one of: {valid_categories}")
+                if result.get("category") not in VALID_CATEGORIES:
+                    raise ValueError(f"Invalid category: {result.get('category')}. Must be one of: {VALID_CATEGORIES}")
                 
                 # Validate urgency score
                 urgency = result.get("urgency_score")
@@ -146,16 +544,6 @@ Response:"""
                 
             except json.JSONDecodeError as e:
                 raise ValueError(f"Invalid JSON response from LLM: {content}")
-                
-        except asyncio.TimeoutError:
-            self.logger.error("LLM API request timed out")
-            raise Exception("LLM API request timed out")
-        except ValueError:
-            # Re-raise ValueError exceptions (validation errors) as-is
-            raise
-        except Exception as e:
-            self.logger.error(f"LLM API error: {str(e)}")
-            raise Exception(f"LLM API error: {str(e)}")
     
     def _extract_json_from_response(self, content: str) -> str:
         """Extract JSON object from LLM response, handling cases where there might be extra text."""
@@ -0,0 +1,166 @@
+"""LLM usage rollups for capacity planning.
+
+Every stored triage request adds its tokens, cost and upstream latency to its
+UTC hour's row in ``llm_usage_hourly``, in the same transaction as the
+record, so reports read a few rows instead of aggregating feedback_records.
+Usage estimated from characters (a stream closed before the provider reported
+it) is counted, and also reported separately as ``estimated_*``.
+Headroom compares the last minute of usage with the provider's tokens- and
+requests-per-minute quotas (``LLM_TPM_QUOTA`` / ``LLM_RPM_QUOTA``, 0 when
+unknown). Only stored requests are counted; re-triage backfills and failed
+requests use quota too. With sharded storage each shard keeps rollups of its
+own records and reports sum them.
+"""
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, bindparam, case, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.sharding import shards
+from ..models.database import FeedbackRecord, LLMUsageHourly
+
+LLM_TPM_QUOTA = int(os.getenv("LLM_TPM_QUOTA", "0"))
+LLM_RPM_QUOTA = int(os.getenv("LLM_RPM_QUOTA", "0"))
+
+
+def hour_start(moment: datetime) -> datetime:
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+
+ROLLUP_COLUMNS = (
+    "requests", "prompt_tokens", "completion_tokens", "cost_usd", "llm_latency_ms",
+    "estimated_requests", "estimated_tokens",
+)
+
+
+def _rollup_upsert(dialect):
+    table = LLMUsageHourly.__table__
+    statement = dialect.insert(table).values({column: bindparam(column) for column in ("hour",) + ROLLUP_COLUMNS})
+    # A single upsert, so concurrent workers add to the same row instead of racing to create it
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.hour],
+        set_={column: table.c[column] + statement.excluded[column] for column in ROLLUP_COLUMNS}
+    )
+
+
+# Built once: compiling the upsert cost more than executing it
+_UPSERTS = {"postgresql": _rollup_upsert(postgresql), "sqlite": _rollup_upsert(sqlite)}
+
+
+async def add_to_rollup(
+    db: AsyncSession,
+    prompt_tokens: int,
+    completion_tokens: int,
+    cost_usd: float,
+    llm_latency_ms: float,
+    now: Optional[datetime] = None,
+    estimated: bool = False
+):
+    """Add one request to its hour's row; committed with the caller's transaction."""
+    statement = _UPSERTS["postgresql" if db.bind.dialect.name == "postgresql" else "sqlite"]
+    await db.execute(statement, {
+        "hour": hour_start(now or datetime.utcnow()),
+        "requests": 1,
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "cost_usd": cost_usd,
+        "llm_latency_ms": llm_latency_ms,
+        "estimated_requests": int(estimated),
+        "estimated_tokens": prompt_tokens + completion_tokens if estimated else 0,
+    })
+
+
+def _headroom(used: int, quota: int) -> Optional[float]:
+    """Share of the per-minute quota still unused (negative when over), or None without a quota."""
+    return round(1 - used / quota, 4) if quota else None
+
+
+async def _usage_rows(db: AsyncSession, first_hour: datetime, now: datetime) -> Tuple[List[LLMUsageHourly], Tuple[int, int, int]]:
+    """Rollup rows since ``first_hour``, and requests, tokens and estimated tokens of the last minute."""
+    result = await db.execute(
+        select(LLMUsageHourly).where(LLMUsageHourly.hour >= first_hour).order_by(LLMUsageHourly.hour)
+    )
+    rows = result.scalars().all()
+
+    # Served by the created_at index; rollups are too coarse for per-minute quotas
+    tokens = FeedbackRecord.llm_prompt_tokens + FeedbackRecord.llm_completion_tokens
+    minute = await db.execute(
+        select(
+            func.count(FeedbackRecord.id),
+            func.coalesce(func.sum(tokens), 0),
+            func.coalesce(func.sum(case((FeedbackRecord.llm_usage_estimated, tokens), else_=0)), 0)
+        ).where(and_(
+            FeedbackRecord.created_at >= now - timedelta(minutes=1),
+            FeedbackRecord.llm_prompt_tokens.isnot(None)
+        ))
+    )
+    minute_requests, minute_tokens, minute_estimated = minute.one()
+    return rows, (minute_requests, int(minute_tokens), int(minute_estimated))
+
+
+def _merge_hours(rows: Iterable[LLMUsageHourly]) -> List[LLMUsageHourly]:
+    """Sum rows of the same hour from different shards into unsaved rows, oldest first."""
+    merged: Dict[datetime, LLMUsageHourly] = {}
+    for row in rows:
+        total = merged.get(row.hour)
+        if total is None:
+            merged[row.hour] = LLMUsageHourly(
+                hour=row.hour, **{column: getattr(row, column) for column in ROLLUP_COLUMNS}
+            )
+            continue
+        for column in ROLLUP_COLUMNS:
+            setattr(total, column, getattr(total, column) + getattr(row, column))
+    return [merged[hour] for hour in sorted(merged)]
+
+
+async def usage_report(db: AsyncSession, hours: int = 24, now: Optional[datetime] = None) -> Dict[str, Any]:
+    """Hourly usage, totals and current quota headroom, over every shard when sharded."""
+    now = now or datetime.utcnow()
+    first_hour = hour_start(now) - timedelta(hours=hours - 1)
+    if shards.enabled:
+        parts = await shards.scatter(lambda shard_db: _usage_rows(shard_db, first_hour, now))
+    else:
+        parts = [await _usage_rows(db, first_hour, now)]
+
+    hourly = []
+    totals = {
+        "requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0,
+        "estimated_requests": 0, "estimated_tokens": 0,
+    }
+    for row in _merge_hours(row for rows, _ in parts for row in rows):
+        entry = row.to_dict()
+        # The current hour has only run for part of its 3600 seconds
+        seconds = min(3600.0, max((now - row.hour).total_seconds(), 1.0))
+        entry["tokens_per_second"] = round((row.prompt_tokens + row.completion_tokens) / seconds, 3)
+        hourly.append(entry)
+        for key in totals:
+            totals[key] += getattr(row, key)
+    window_seconds = max((now - first_hour).total_seconds(), 1.0)
+    totals["cost_usd"] = round(totals["cost_usd"], 6)
+    totals["tokens_per_second"] = round((totals["prompt_tokens"] + totals["completion_tokens"]) / window_seconds, 3)
+
+    minute_requests = sum(requests for _, (requests, _, _) in parts)
+    minute_tokens = sum(tokens for _, (_, tokens, _) in parts)
+    # Included in the tokens and headroom; estimates miss reasoning tokens
+    minute_estimated = sum(estimated for _, (_, _, estimated) in parts)
+
+    return {
+        "hourly": hourly,
+        "totals": totals,
+        "last_minute": {
+            "requests": minute_requests,
+            "tokens": minute_tokens,
+            "tokens_per_second": round(minute_tokens / 60, 3),
+            "estimated_tokens": minute_estimated,
+        },
+        "quota": {
+            "tpm": LLM_TPM_QUOTA or None,
+            "rpm": LLM_RPM_QUOTA or None,
+            "tpm_headroom": _headroom(minute_tokens, LLM_TPM_QUOTA),
+            "rpm_headroom": _headroom(minute_requests, LLM_RPM_QUOTA),
+        },
+        "time_period_hours": hours,
+    }
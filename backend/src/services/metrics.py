@@ -0,0 +1,410 @@
+"""Lightweight in-process metrics rendered in the Prometheus text format.
+
+Observations are a bisect plus a few integer increments under the GIL, so the
+hot path stays in the low microseconds without a client library dependency.
+
+With several worker processes each one periodically writes its raw state to
+the shared state directory and ``/metrics`` renders the sum over all workers,
+so a scrape that lands on any worker sees the whole server.
+"""
+import asyncio
+import copy
+import json
+import logging
+import math
+import os
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Sequence, Tuple
+
+from .shared_state import shared_path
+
+logger = logging.getLogger(__name__)
+
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "5"))
+
+# Latency buckets in seconds, from sub-millisecond DB work up to the LLM timeout
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _header(self) -> List[str]:
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def state(self) -> List[Any]:
+        """JSON-serialisable raw values, for aggregation across processes."""
+        raise NotImplementedError
+
+    def merge(self, state: List[Any]):
+        """Add a ``state()`` from another process into this metric."""
+        raise NotImplementedError
+
+    def empty_copy(self) -> "_Metric":
+        clone = copy.copy(self)
+        clone.clear()
+        return clone
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1.0):
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}")
+        return lines
+
+    def clear(self):
+        self._values = {}
+
+    def state(self) -> List[Any]:
+        return [[list(labels), value] for labels, value in self._values.items()]
+
+    def merge(self, state: List[Any]):
+        for labels, value in state:
+            self.inc(*labels, amount=value)
+
+
+class Gauge(Counter):
+    type_name = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1.0):
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels: str):
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [per-bucket counts (last slot is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *labels: str):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def time(self, *labels: str) -> "_Timer":
+        """Context manager observing the elapsed wall time of its block."""
+        return _Timer(self, labels)
+
+    def count(self, *labels: str) -> int:
+        series = self._series.get(labels)
+        return sum(series[0]) if series else 0
+
+    def render(self) -> List[str]:
+        lines = self._header()
+        bounds = self.buckets + (math.inf,)
+        for labels, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                bucket_labels = _format_labels(self.labelnames, labels, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            series_labels = _format_labels(self.labelnames, labels)
+            lines.append(f"{self.name}_sum{series_labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{series_labels} {cumulative}")
+        return lines
+
+    def clear(self):
+        self._series = {}
+
+    def state(self) -> List[Any]:
+        return [[list(labels), list(counts), total] for labels, (counts, total) in self._series.items()]
+
+    def merge(self, state: List[Any]):
+        for labels, counts, total in state:
+            series = self._series.setdefault(tuple(labels), [[0] * (len(self.buckets) + 1), 0.0])
+            series[0] = [a + b for a, b in zip(series[0], counts)]
+            series[1] += total
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_labels", "_start")
+
+    def __init__(self, histogram: Histogram, labels: Tuple[str, ...]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._histogram.observe(time.perf_counter() - self._start, *self._labels)
+        return False
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric already registered: {metric.name}")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        """Reset every metric - useful for testing."""
+        for metric in self._metrics.values():
+            metric.clear()
+
+    def state(self) -> Dict[str, List[Any]]:
+        return {name: metric.state() for name, metric in self._metrics.items()}
+
+    def render_merged(self, states: List[Tuple[Dict[str, List[Any]], bool]]) -> str:
+        """Render the sum of several processes' ``state()``.
+
+        Each entry is ``(state, alive)``. Gauges of processes that have exited
+        are dropped; their counters and histograms still count towards totals.
+        """
+        merged = MetricsRegistry()
+        for metric in self._metrics.values():
+            merged.register(metric.empty_copy())
+        for state, alive in states:
+            for name, values in state.items():
+                metric = merged._metrics.get(name)
+                if metric is None or (not alive and isinstance(metric, Gauge)):
+                    continue
+                metric.merge(values)
+        return merged.render()
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_DURATION = registry.register(Histogram(
+    "http_request_duration_seconds",
+    "End-to-end HTTP request latency by route",
+    ("method", "route", "status")
+))
+HTTP_REQUESTS_IN_FLIGHT = registry.register(Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being processed"
+))
+TRIAGE_STAGE_DURATION = registry.register(Histogram(
+    "triage_stage_duration_seconds",
+    "Time spent in each stage of POST /triage",
+    ("stage",)
+))
+LLM_UPSTREAM_RESPONSES = registry.register(Counter(
+    "llm_upstream_responses_total",
+    "LLM API responses by upstream status code",
+    ("status",)
+))
+LLM_TIER_REQUESTS = registry.register(Counter(
+    "llm_tier_requests_total",
+    "Classifications per model tier; outcome is answered, escalated or error",
+    ("tier", "outcome")
+))
+LLM_TIER_DURATION = registry.register(Histogram(
+    "llm_tier_duration_seconds",
+    "LLM call latency per model tier",
+    ("tier",)
+))
+LLM_TIER_TOKENS = registry.register(Counter(
+    "llm_tier_tokens_total",
+    "Tokens used per model tier and kind (prompt or completion)",
+    ("tier", "kind")
+))
+LLM_TIER_COST = registry.register(Counter(
+    "llm_tier_cost_usd_total",
+    "Estimated LLM spend per model tier from the configured per-1K-token prices",
+    ("tier",)
+))
+LLM_PARSE_FAILURES = registry.register(Counter(
+    "llm_parse_failures_total",
+    "LLM replies that were not a valid classification, per model tier",
+    ("tier",)
+))
+LLM_REPAIRS = registry.register(Counter(
+    "llm_repairs_total",
+    "Repair retries after an invalid primary-tier reply; outcome is repaired or failed",
+    ("outcome",)
+))
+LLM_TIME_TO_FIRST_TOKEN = registry.register(Histogram(
+    "llm_time_to_first_token_seconds",
+    "Time from sending a streamed LLM request to its first content token, per model tier",
+    ("tier",)
+))
+LLM_TIME_TO_VERDICT = registry.register(Histogram(
+    "llm_time_to_verdict_seconds",
+    "Time from sending a streamed LLM request to a complete classification object, per model tier",
+    ("tier",)
+))
+LLM_QUEUE_WAIT = registry.register(Histogram(
+    "llm_queue_wait_seconds",
+    "Time an LLM request waited for a concurrency slot, by pre-priority class",
+    ("priority",)
+))
+LLM_QUEUE_DEPTH = registry.register(Gauge(
+    "llm_queue_depth",
+    "LLM requests waiting for a concurrency slot, by pre-priority class",
+    ("priority",)
+))
+EVENT_LOOP_LAG = registry.register(Histogram(
+    "event_loop_lag_seconds",
+    "How late the admission-control timer fired, sampled every 50 ms"
+))
+REQUESTS_SHED = registry.register(Counter(
+    "http_requests_shed_total",
+    "Requests answered 503 by admission control, by route priority and reason",
+    ("priority", "reason")
+))
+VOLUME_SPIKES = registry.register(Counter(
+    "feedback_volume_spikes_total",
+    "Per-minute feedback volume spikes flagged by the anomaly detector, by category",
+    ("category",)
+))
+DB_POOL_WAIT = registry.register(Histogram(
+    "db_pool_wait_seconds",
+    "Time spent waiting to check a connection out of the database pool"
+))
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def write_worker_metrics():
+    """Atomically write this process's metric state to the shared directory."""
+    path = shared_path("metrics", f"{os.getpid()}.json")
+    if path is None:
+        return
+    temp = path.with_suffix(".tmp")
+    temp.write_text(json.dumps(registry.state()))
+    os.replace(temp, path)
+
+
+def render_metrics() -> str:
+    """Prometheus text for this process, or summed over all workers when shared."""
+    own_path = shared_path("metrics", f"{os.getpid()}.json")
+    if own_path is None:
+        return registry.render()
+
+    states = [(registry.state(), True)]
+    for path in own_path.parent.glob("*.json"):
+        pid = int(path.stem)
+        if pid == os.getpid():
+            continue
+        try:
+            states.append((json.loads(path.read_text()), _pid_alive(pid)))
+        except (OSError, ValueError):
+            continue
+    return registry.render_merged(states)
+
+
+async def flush_metrics_periodically(interval: float = METRICS_FLUSH_INTERVAL):
+    """Background task keeping this worker's file at most ``interval`` seconds stale."""
+    while True:
+        try:
+            write_worker_metrics()
+        except OSError as e:
+            logger.warning(f"Could not write worker metrics: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+class MetricsMiddleware:
+    """Pure ASGI middleware recording per-route latency and in-flight requests."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status = ["500"]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the shared scope; use its
+            # template so path parameters do not explode label cardinality.
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.observe(
+                time.perf_counter() - start, scope["method"], route_path, status[0]
+            )
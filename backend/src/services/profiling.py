@@ -0,0 +1,206 @@
+"""On-demand CPU and memory profiling for the running service.
+
+Everything here is inert until ``PROFILING_ENABLED=true`` and an ``ADMIN_TOKEN``
+is configured: the sampler thread only exists while a profile is being taken,
+tracemalloc is only started on request, and the per-request profiler
+middleware is not installed at all otherwise.
+"""
+import cProfile
+import hmac
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+
+from .shared_state import multiprocess_mode, shared_path
+
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() == "true"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+PROFILE_HEADER = "x-profile-request"
+MAX_STORED_PROFILES = 20
+MAX_SAMPLE_DEPTH = 128
+
+
+def profiling_available() -> bool:
+    return PROFILING_ENABLED and bool(ADMIN_TOKEN)
+
+
+def is_admin_token(token: Optional[str]) -> bool:
+    if not profiling_available() or not token:
+        return False
+    return hmac.compare_digest(token, ADMIN_TOKEN)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def sample_stacks(thread_id: int, seconds: float, interval: float = 0.005) -> str:
+    """Sample one thread's stack for ``seconds`` and return collapsed stacks.
+
+    The output is the ``frame;frame;frame count`` format consumed by
+    flamegraph.pl and speedscope. Meant to run in a worker thread while the
+    sampled thread (the event loop) keeps serving requests.
+    """
+    samples: Counter = Counter()
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        frame = sys._current_frames().get(thread_id)
+        if frame is None:
+            break
+        stack = []
+        while frame is not None and len(stack) < MAX_SAMPLE_DEPTH:
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        samples[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class MemoryProfiler:
+    """tracemalloc snapshots and diffs, e.g. to catch unbounded dict growth."""
+
+    def __init__(self, frames: int = 10):
+        self.frames = frames
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    @property
+    def tracing(self) -> bool:
+        return tracemalloc.is_tracing()
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def snapshot(self, limit: int = 25) -> List[Dict]:
+        """Start tracing if needed, take a snapshot and keep it as the diff baseline."""
+        self._baseline = self._snapshot()
+        return [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in self._baseline.statistics("lineno")[:limit]
+        ]
+
+    def diff(self, limit: int = 25) -> List[Dict]:
+        """Allocation growth by line since the last snapshot."""
+        if self._baseline is None:
+            raise ValueError("No baseline snapshot; take a snapshot first")
+        current = self._snapshot()
+        return [
+            {
+                "location": str(stat.traceback),
+                "size_diff_bytes": stat.size_diff,
+                "size_bytes": stat.size,
+                "count_diff": stat.count_diff,
+            }
+            for stat in current.compare_to(self._baseline, "lineno")[:limit]
+        ]
+
+    def stop(self):
+        self._baseline = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+class ProfileStore:
+    """Keeps the most recent per-request profiles for retrieval by id.
+
+    With several workers the reports are files in the shared state directory,
+    so the admin endpoint finds a profile whichever worker took it.
+    """
+
+    def __init__(self, max_items: int = MAX_STORED_PROFILES):
+        self.max_items = max_items
+        self._profiles: "OrderedDict[str, str]" = OrderedDict()
+
+    def put(self, profile_id: str, report: str):
+        path = shared_path("profiles", f"{profile_id}.txt")
+        if path is not None:
+            path.write_text(report)
+            stored = []
+            for item in path.parent.glob("*.txt"):
+                try:
+                    stored.append((item.stat().st_mtime, item))
+                except FileNotFoundError:
+                    # Evicted by another worker between the listing and the stat
+                    continue
+            stored.sort()
+            for _, old in stored[:-self.max_items]:
+                old.unlink(missing_ok=True)
+            return
+        self._profiles[profile_id] = report
+        while len(self._profiles) > self.max_items:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[str]:
+        if multiprocess_mode():
+            # Ids are uuid4 hex; anything else must not become a file path
+            if not profile_id.isalnum():
+                return None
+            path = shared_path("profiles", f"{profile_id}.txt")
+            return path.read_text() if path.exists() else None
+        return self._profiles.get(profile_id)
+
+
+memory_profiler = MemoryProfiler()
+request_profiles = ProfileStore()
+# cProfile hooks the whole thread, so only one request can be profiled at a time
+_request_profile_lock = threading.Lock()
+
+
+class RequestProfilerMiddleware:
+    """Profile a single request when it carries ``X-Profile-Request: <ADMIN_TOKEN>``.
+
+    The report is stored in ``request_profiles`` and its id returned in the
+    ``X-Profile-Id`` response header. Other coroutines running on the loop
+    while the request is in flight are included in the profile.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        token = None
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER.encode():
+                token = value.decode("latin-1")
+                break
+        if not is_admin_token(token) or not _request_profile_lock.acquire(blocking=False):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = cProfile.Profile()
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            profiler.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profiler.disable()
+        finally:
+            _request_profile_lock.release()
+            output = io.StringIO()
+            pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(50)
+            request_profiles.put(profile_id, output.getvalue())
@@ -0,0 +1,294 @@
+"""Re-triage existing feedback after a model or prompt change.
+
+Usage (from backend/):
+
+    python -m src.services.retriage_service --shadow          # record disagreements only
+    python -m src.services.retriage_service --name o4-relabel  # update labels in place
+
+The job walks ``feedback_records`` in id order (keyset pagination, so chunks
+stay cheap however deep it gets), classifies each chunk with bounded
+concurrency under a token/second budget, and commits the chunk's updates or
+disagreements together with its checkpoint. An interrupted run resumes from
+the last committed chunk when started again with the same ``--name``.
+With sharded storage each shard is walked in turn and keeps its own
+checkpoint. Running servers find relabelled records through the checkpoints
+(``relabelled_ranges``) and refresh their in-memory copies of the labels.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..models.database import FeedbackRecord, RetriageRun, RetriageDisagreement
+
+logger = logging.getLogger(__name__)
+
+# Rough characters per token for budgeting before the API reports usage
+CHARS_PER_TOKEN = 4
+COMPLETION_TOKEN_ALLOWANCE = 50
+
+
+class TokenBucket:
+    """Allows ``rate`` tokens per second on average, bursting up to ``capacity``."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def take(self, tokens: float):
+        # The lock keeps waiters first-come first-served
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                # A request larger than the bucket waits for a full bucket, then overdraws
+                if self._tokens >= min(tokens, self.capacity):
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((min(tokens, self.capacity) - self._tokens) / self.rate)
+
+
+class RetriageJob:
+    def __init__(
+        self,
+        session_factory,
+        llm_service,
+        name: str,
+        shadow: bool = False,
+        batch_size: int = 100,
+        concurrency: int = 4,
+        tokens_per_second: float = 2000.0,
+        limit: Optional[int] = None
+    ):
+        self.session_factory = session_factory
+        self.llm_service = llm_service
+        self.name = name
+        self.shadow = shadow
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.bucket = TokenBucket(tokens_per_second, capacity=max(tokens_per_second, 1.0))
+        self.limit = limit
+
+    def estimate_tokens(self, feedback_text: str) -> int:
+        prompt = self.llm_service._create_prompt(feedback_text)
+        return len(prompt) // CHARS_PER_TOKEN + COMPLETION_TOKEN_ALLOWANCE
+
+    async def _load_run(self, restart: bool) -> RetriageRun:
+        async with self.session_factory() as db:
+            run = (await db.execute(
+                select(RetriageRun).where(RetriageRun.name == self.name)
+            )).scalar_one_or_none()
+            if run is None:
+                run = RetriageRun(name=self.name, model=self.llm_service.model, shadow=int(self.shadow))
+                db.add(run)
+            elif restart:
+                await db.execute(delete(RetriageDisagreement).where(RetriageDisagreement.run_id == run.id))
+                run.last_id = run.processed = run.changed = run.failed = run.estimated_tokens = 0
+                run.status = "running"
+            elif bool(run.shadow) != self.shadow:
+                raise ValueError(f"Run '{self.name}' was started with shadow={bool(run.shadow)}")
+            run.model = self.llm_service.model
+            await db.commit()
+            await db.refresh(run)
+            return run
+
+    async def _classify(self, record: Tuple) -> Tuple[Tuple, Optional[Dict[str, Any]]]:
+        record_id, feedback_text = record[0], record[1]
+        await self.bucket.take(self.estimate_tokens(feedback_text))
+        try:
+            return record, await self.llm_service.analyze_feedback(feedback_text)
+        except Exception as e:
+            logger.warning(f"Re-triage of record {record_id} failed: {str(e)}")
+            return record, None
+
+    async def _classify_chunk(self, records: List[Tuple]) -> List[Tuple[Tuple, Optional[Dict[str, Any]]]]:
+        semaphore = asyncio.Semaphore(self.concurrency)
+
+        async def bounded(record):
+            async with semaphore:
+                return await self._classify(record)
+
+        return await asyncio.gather(*(bounded(record) for record in records))
+
+    async def _commit_chunk(self, run_id: int, results: List[Tuple[Tuple, Optional[Dict[str, Any]]]]) -> Dict[str, int]:
+        """Write a chunk's label changes (or disagreements) and advance the checkpoint atomically."""
+        changes = []
+        failed = 0
+        for (record_id, feedback_text, category, urgency_score), result in results:
+            if result is None:
+                failed += 1
+            elif (result["category"], result["urgency_score"]) != (category, urgency_score):
+                changes.append((record_id, category, urgency_score, result))
+        tokens = sum(self.estimate_tokens(record[1]) for record, _ in results)
+
+        async with self.session_factory() as db:
+            if self.shadow:
+                db.add_all([
+                    RetriageDisagreement(
+                        run_id=run_id,
+                        record_id=record_id,
+                        old_category=category,
+                        new_category=result["category"],
+                        old_urgency_score=urgency_score,
+                        new_urgency_score=result["urgency_score"]
+                    )
+                    for record_id, category, urgency_score, result in changes
+                ])
+            elif changes:
+                await db.execute(
+                    update(FeedbackRecord),
+                    [
+                        {
+                            "id": record_id,
+                            "category": result["category"],
+                            "urgency_score": result["urgency_score"],
+                            "model_tier": result.get("model_tier"),
+                            "updated_at": datetime.utcnow()
+                        }
+                        for record_id, _, _, result in changes
+                    ]
+                )
+            await db.execute(
+                update(RetriageRun).where(RetriageRun.id == run_id).values(
+                    last_id=results[-1][0][0],
+                    processed=RetriageRun.processed + len(results),
+                    changed=RetriageRun.changed + len(changes),
+                    failed=RetriageRun.failed + failed,
+                    estimated_tokens=RetriageRun.estimated_tokens + tokens
+                )
+            )
+            await db.commit()
+        return {"processed": len(results), "changed": len(changes), "failed": failed}
+
+    async def run(self, restart: bool = False) -> Dict[str, Any]:
+        """Process records after the checkpoint until the table (or ``limit``) is exhausted."""
+        run = await self._load_run(restart)
+        if run.status == "completed":
+            logger.info(f"Re-triage run '{self.name}' already completed; use restart to run it again")
+            return run.to_dict()
+
+        last_id = run.last_id
+        remaining = self.limit
+        started = time.monotonic()
+        totals = {"processed": 0, "changed": 0, "failed": 0}
+        exhausted = False
+        while remaining is None or remaining > 0:
+            chunk_size = self.batch_size if remaining is None else min(self.batch_size, remaining)
+            async with self.session_factory() as db:
+                records = (await db.execute(
+                    select(
+                        FeedbackRecord.id,
+                        FeedbackRecord.feedback_text,
+                        FeedbackRecord.category,
+                        FeedbackRecord.urgency_score
+                    ).where(FeedbackRecord.id > last_id).order_by(FeedbackRecord.id).limit(chunk_size)
+                )).all()
+            if not records:
+                exhausted = True
+                break
+
+            results = await self._classify_chunk(records)
+            counts = await self._commit_chunk(run.id, results)
+            for key, value in counts.items():
+                totals[key] += value
+            last_id = records[-1][0]
+            if remaining is not None:
+                remaining -= len(records)
+
+            rate = totals["processed"] / max(time.monotonic() - started, 1e-9)
+            logger.info(
+                f"Re-triage '{self.name}': through id {last_id}, {totals['processed']} processed, "
+                f"{totals['changed']} {'disagreeing' if self.shadow else 'changed'}, "
+                f"{totals['failed']} failed, {rate:.1f} records/s"
+            )
+
+        async with self.session_factory() as db:
+            run = await db.get(RetriageRun, run.id)
+            if exhausted:
+                run.status = "completed"
+            await db.commit()
+            await db.refresh(run)
+            return run.to_dict()
+
+
+async def relabelled_ranges(db: AsyncSession, seen: Dict[int, int]) -> List[Tuple[int, int]]:
+    """Id ranges ``(after, through]`` relabelled in place since ``seen`` (run id -> last id), which is updated."""
+    result = await db.execute(select(RetriageRun.id, RetriageRun.last_id).where(RetriageRun.shadow == 0))
+    ranges = []
+    for run_id, last_id in result.all():
+        applied = seen.get(run_id, 0)
+        if last_id < applied:
+            # Restarted; it relabels again from the first record
+            applied = 0
+        if last_id > applied:
+            ranges.append((applied, last_id))
+        seen[run_id] = last_id
+    return ranges
+
+
+async def get_disagreements(db, name: str, limit: int = 100) -> List[Dict[str, Any]]:
+    query = select(RetriageDisagreement).join(
+        RetriageRun, RetriageRun.id == RetriageDisagreement.run_id
+    ).where(RetriageRun.name == name).order_by(RetriageDisagreement.record_id).limit(limit)
+    result = await db.execute(query)
+    return [row.to_dict() for row in result.scalars().all()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--name", help="Run name used for the checkpoint (default: <model>[-shadow])")
+    parser.add_argument("--shadow", action="store_true", help="Only record disagreements; leave labels unchanged")
+    parser.add_argument("--batch-size", type=int, default=100, help="Records per chunk and transaction")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent LLM calls")
+    parser.add_argument("--tokens-per-second", type=float, default=2000.0, help="Estimated LLM token budget")
+    parser.add_argument(
+        "--limit", type=int, help="Stop after this many records, per shard when sharded (e.g. to sample in shadow mode)"
+    )
+    parser.add_argument("--restart", action="store_true", help="Discard the checkpoint and start from the first record")
+    args = parser.parse_args()
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+
+    from ..database.connection import AsyncSessionLocal, init_db
+    from ..database.sharding import init_shards, shards
+    from .llm_service import LLMService
+
+    llm_service = LLMService()
+    name = args.name or f"{llm_service.model}{'-shadow' if args.shadow else ''}"
+    session_factories = shards.session_factories if shards.enabled else [AsyncSessionLocal]
+
+    async def run():
+        await init_db()
+        await init_shards()
+        for index, session_factory in enumerate(session_factories):
+            job = RetriageJob(
+                session_factory,
+                llm_service,
+                name=name,
+                shadow=args.shadow,
+                batch_size=args.batch_size,
+                concurrency=args.concurrency,
+                tokens_per_second=args.tokens_per_second,
+                limit=args.limit
+            )
+            summary = await job.run(restart=args.restart)
+            where = f" on shard {index}" if shards.enabled else ""
+            logger.info(f"Re-triage '{name}'{where} {summary['status']}: {summary}")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
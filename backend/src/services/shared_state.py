@@ -0,0 +1,25 @@
+"""Location of state shared by the worker processes of one server.
+
+Under gunicorn, ``gunicorn.conf.py`` points ``SHARED_STATE_DIR`` at a directory
+all workers can reach. Rate-limit counters, metrics and stored request profiles
+are then kept there instead of in each process. Without it (plain uvicorn, tests)
+everything stays in memory.
+"""
+import os
+from pathlib import Path
+from typing import Optional
+
+SHARED_STATE_DIR = os.getenv("SHARED_STATE_DIR") or None
+
+
+def multiprocess_mode() -> bool:
+    return SHARED_STATE_DIR is not None
+
+
+def shared_path(*parts: str) -> Optional[Path]:
+    """Path inside the shared state directory, creating parent directories; None when not shared."""
+    if SHARED_STATE_DIR is None:
+        return None
+    path = Path(SHARED_STATE_DIR).joinpath(*parts)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    return path
@@ -0,0 +1,11 @@
+"""Word features shared by incident clustering and few-shot example selection."""
+import re
+from typing import Set
+
+_TOKEN_PATTERN = re.compile(r"[a-z]+")
+
+
+def shingles(text: str) -> Set[str]:
+    """Lower-cased word unigrams and bigrams; numbers and punctuation are ignored."""
+    words = _TOKEN_PATTERN.findall(text.lower())
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
@@ -0,0 +1,224 @@
+"""Streaming detection of feedback volume spikes per category and urgency.
+
+Each insert adds one to its category's minute bucket, both for its urgency and
+for the category as a whole. When a minute closes, its counts update an
+exponentially weighted mean and variance per series (``VOLUME_ANOMALY_ALPHA``
+per minute). A series is flagged as soon as the open minute's count reaches
+``VOLUME_ANOMALY_MIN_COUNT`` and is more than ``VOLUME_ANOMALY_THRESHOLD``
+standard deviations above its mean, so a spike shows up while it happens
+rather than when someone next opens the dashboard.
+
+State is a fixed set of series (4 categories x 5 urgencies, plus the
+category totals) and a bounded list of recent spikes, so memory is constant
+however long the process runs. Nothing is written to the database.
+
+With several workers each one watches its own share of the inserts. Spikes
+are written to the shared state directory when flagged and merged when read.
+"""
+import asyncio
+import json
+import logging
+import math
+import os
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Set, Tuple
+
+from ..models.triage import FeedbackCategory
+from .metrics import VOLUME_SPIKES
+from .shared_state import shared_path
+
+logger = logging.getLogger(__name__)
+
+VOLUME_ANOMALY_ENABLED = os.getenv("VOLUME_ANOMALY_ENABLED", "true").lower() == "true"
+VOLUME_ANOMALY_ALPHA = float(os.getenv("VOLUME_ANOMALY_ALPHA", "0.05"))
+VOLUME_ANOMALY_THRESHOLD = float(os.getenv("VOLUME_ANOMALY_THRESHOLD", "4"))
+VOLUME_ANOMALY_MIN_COUNT = int(os.getenv("VOLUME_ANOMALY_MIN_COUNT", "5"))
+# Minutes observed before anything is flagged, so the baseline can settle
+VOLUME_ANOMALY_WARMUP_MINUTES = int(os.getenv("VOLUME_ANOMALY_WARMUP_MINUTES", "30"))
+VOLUME_ANOMALY_HISTORY = int(os.getenv("VOLUME_ANOMALY_HISTORY", "100"))
+
+CATEGORIES = [category.value for category in FeedbackCategory]
+URGENCY_SCORES = (1, 2, 3, 4, 5)
+# After this many quiet minutes the decayed state no longer depends on the old values
+MAX_DECAY_STEPS = 500
+
+# (category, urgency score), with None for every urgency of the category
+SeriesKey = Tuple[str, Optional[int]]
+
+
+class VolumeSeries:
+    """EWMA mean and variance of one series' per-minute counts."""
+
+    __slots__ = ("mean", "variance", "count")
+
+    def __init__(self):
+        self.mean = 0.0
+        self.variance = 0.0
+        # Count of the open minute
+        self.count = 0
+
+    def close_minute(self, alpha: float, count: int):
+        # Incremental EWMA variance (Finch, 2009)
+        diff = count - self.mean
+        increment = alpha * diff
+        self.mean += increment
+        self.variance = (1 - alpha) * (self.variance + diff * increment)
+
+    def z_score(self, weight: float = 1.0) -> float:
+        """Deviation of the open minute; ``weight`` corrects the zero start of a young average."""
+        mean, variance = self.mean / weight, self.variance / weight
+        # Counts are roughly Poisson, so the variance is floored at the mean
+        # (and at 1): a series that has been flat does not flag on +1
+        spread = math.sqrt(max(variance, mean, 1.0))
+        return (self.count - mean) / spread
+
+
+class VolumeAnomalyDetector:
+    def __init__(
+        self,
+        alpha: float = VOLUME_ANOMALY_ALPHA,
+        threshold: float = VOLUME_ANOMALY_THRESHOLD,
+        min_count: int = VOLUME_ANOMALY_MIN_COUNT,
+        warmup_minutes: int = VOLUME_ANOMALY_WARMUP_MINUTES,
+        history: int = VOLUME_ANOMALY_HISTORY
+    ):
+        self.alpha = alpha
+        self.threshold = threshold
+        self.min_count = min_count
+        self.warmup_minutes = warmup_minutes
+        self.history = history
+        self._subscribers: Set[asyncio.Queue] = set()
+        self.reset()
+
+    def reset(self):
+        self._series: Dict[SeriesKey, VolumeSeries] = {
+            (category, urgency): VolumeSeries()
+            for category in CATEGORIES
+            for urgency in (None,) + URGENCY_SCORES
+        }
+        self._minute: Optional[int] = None
+        self._minutes_observed = 0
+        self._spikes: Deque[Dict[str, Any]] = deque(maxlen=self.history)
+        # Spikes of the open minute by series, updated as more reports arrive
+        self._open: Dict[SeriesKey, Dict[str, Any]] = {}
+
+    def _advance(self, minute: int):
+        if self._minute is None:
+            self._minute = minute
+            return
+        if minute <= self._minute:
+            return
+        for series in self._series.values():
+            series.close_minute(self.alpha, series.count)
+            series.count = 0
+        # Minutes without any insert are zero counts
+        for _ in range(min(minute - self._minute - 1, MAX_DECAY_STEPS)):
+            for series in self._series.values():
+                series.close_minute(self.alpha, 0)
+        self._minutes_observed += minute - self._minute
+        self._minute = minute
+        self._open = {}
+
+    def record(self, category: str, urgency_score: int, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """Count one insert; returns the spikes it flagged (usually none)."""
+        now = time.time() if now is None else now
+        self._advance(int(now // 60))
+        flagged = []
+        for key in ((category, None), (category, urgency_score)):
+            series = self._series.get(key)
+            if series is None:
+                continue
+            series.count += 1
+            spike = self._open.get(key)
+            if spike is not None:
+                spike["count"] = series.count
+                spike["z_score"] = round(series.z_score(self._weight()), 2)
+            elif self._is_spike(series):
+                flagged.append(self._flag(key, series))
+        return flagged
+
+    def _weight(self) -> float:
+        # Share of the EWMA's weight on observed minutes rather than the initial zero
+        return 1 - (1 - self.alpha) ** self._minutes_observed if self._minutes_observed else 1.0
+
+    def _is_spike(self, series: VolumeSeries) -> bool:
+        return (
+            self._minutes_observed >= self.warmup_minutes
+            and series.count >= self.min_count
+            and series.z_score(self._weight()) > self.threshold
+        )
+
+    def _flag(self, key: SeriesKey, series: VolumeSeries) -> Dict[str, Any]:
+        category, urgency_score = key
+        weight = self._weight()
+        spike = {
+            "category": category,
+            "urgency_score": urgency_score,
+            "minute": datetime.fromtimestamp(self._minute * 60, tz=timezone.utc).isoformat(),
+            "count": series.count,
+            "expected": round(series.mean / weight, 2),
+            "z_score": round(series.z_score(weight), 2),
+            "worker": os.getpid(),
+        }
+        self._open[key] = spike
+        self._spikes.append(spike)
+        VOLUME_SPIKES.inc(category)
+        logger.warning(
+            f"Volume spike: {series.count} {category} reports (urgency {urgency_score or 'any'}) "
+            f"this minute, expected {spike['expected']:.1f}"
+        )
+        for queue in self._subscribers:
+            queue.put_nowait({"type": "anomaly", "spike": spike})
+        self._write_spikes()
+        return spike
+
+    def subscribe(self, queue: asyncio.Queue):
+        """Have spikes flagged by this worker put on ``queue`` as ``{"type": "anomaly", ...}``."""
+        self._subscribers.add(queue)
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.discard(queue)
+
+    def baselines(self) -> List[Dict[str, Any]]:
+        weight = self._weight()
+        return [
+            {
+                "category": category,
+                "urgency_score": urgency_score,
+                "expected_per_minute": round(series.mean / weight, 3),
+                "stddev": round(math.sqrt(series.variance / weight), 3),
+                "current_minute": series.count,
+            }
+            for (category, urgency_score), series in self._series.items()
+        ]
+
+    def recent_spikes(self, limit: int = 20) -> List[Dict[str, Any]]:
+        """Newest spikes first, merged over all workers when state is shared."""
+        spikes = list(self._spikes)
+        own_path = shared_path("anomalies", f"{os.getpid()}.json")
+        if own_path is not None:
+            for path in own_path.parent.glob("*.json"):
+                if path == own_path:
+                    continue
+                try:
+                    spikes.extend(json.loads(path.read_text()))
+                except (OSError, ValueError):
+                    continue
+        spikes.sort(key=lambda spike: spike["minute"], reverse=True)
+        return spikes[:limit]
+
+    def _write_spikes(self):
+        path = shared_path("anomalies", f"{os.getpid()}.json")
+        if path is None:
+            return
+        try:
+            temp = path.with_suffix(".tmp")
+            temp.write_text(json.dumps(list(self._spikes)))
+            os.replace(temp, path)
+        except OSError as e:
+            logger.warning(f"Could not write volume spikes: {str(e)}")
+
+
+volume_detector = VolumeAnomalyDetector()
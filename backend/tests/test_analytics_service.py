@@ -0,0 +1,130 @@
+import pytest
+import pytest_asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.database.connection import Base
+from src.models.database import FeedbackRecord
+from src.services.analytics_service import AnalyticsSnapshot
+from src.services.feedback_service import FeedbackService
+import src.services.feedback_service as feedback_service_module
+
+ROWS = [
+    # (days ago, category, urgency, processing_time_ms)
+    (0, "Bug Report", 5, 120.0),
+    (0, "Bug Report", 4, None),
+    (1, "Feature Request", 2, 80.0),
+    (2, "Praise/Positive Feedback", 1, 60.0),
+    (3, "Bug Report", 4, 100.0),
+    (5, "General Inquiry", 3, 90.0),
+    (10, "Bug Report", 5, 110.0),
+    (40, "Feature Request", 4, 70.0),
+]
+
+
+@pytest_asyncio.fixture
+async def session():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with session_factory() as db:
+        now = datetime.utcnow().replace(microsecond=0)
+        for i, (days_ago, category, urgency, processing) in enumerate(ROWS):
+            db.add(FeedbackRecord(
+                feedback_text=f"feedback {i}",
+                category=category,
+                urgency_score=urgency,
+                processing_time_ms=processing,
+                created_at=now - timedelta(days=days_ago, minutes=i)
+            ))
+        await db.commit()
+        yield db
+    await engine.dispose()
+
+
+class TestAnalyticsSnapshot:
+    @pytest.mark.asyncio
+    async def test_stats_match_sql(self, session, monkeypatch):
+        service = FeedbackService(session)
+        monkeypatch.setattr(feedback_service_module, "analytics_snapshot", AnalyticsSnapshot())
+        sql_stats = await service.get_dashboard_stats(days_back=30)
+
+        snapshot = AnalyticsSnapshot()
+        assert await snapshot.load(session) == len(ROWS)
+        monkeypatch.setattr(feedback_service_module, "analytics_snapshot", snapshot)
+        snapshot_stats = await service.get_dashboard_stats(days_back=30)
+
+        assert snapshot_stats == sql_stats
+        assert snapshot_stats["total_feedback"] == 7
+
+    @pytest.mark.asyncio
+    async def test_filters_match_sql(self, session, monkeypatch):
+        service = FeedbackService(session)
+        filters = [
+            {},
+            {"category": "Bug Report"},
+            {"urgency_min": 4, "days_back": 7},
+            {"urgency_max": 2, "limit": 1, "offset": 1},
+            {"category": "Unknown"},
+        ]
+        snapshot = AnalyticsSnapshot()
+        await snapshot.load(session)
+
+        for kwargs in filters:
+            monkeypatch.setattr(feedback_service_module, "analytics_snapshot", AnalyticsSnapshot())
+            sql_ids = [r.id for r in await service.get_feedback_history(**kwargs)]
+            monkeypatch.setattr(feedback_service_module, "analytics_snapshot", snapshot)
+            snapshot_ids = [r.id for r in await service.get_feedback_history(**kwargs)]
+            assert snapshot_ids == sql_ids, kwargs
+
+    def test_append_keeps_created_order(self):
+        snapshot = AnalyticsSnapshot(initial_capacity=2)
+        now = datetime.utcnow()
+        snapshot.append(1, now, "Bug Report", 5, 10.0)
+        snapshot.append(2, now + timedelta(seconds=5), "Bug Report", 4)
+        snapshot.append(3, now + timedelta(seconds=2), "General Inquiry", 1)
+
+        assert len(snapshot) == 3
+        assert snapshot.filter_ids(limit=10) == [2, 3, 1]
+        stats, urgent_ids = snapshot.dashboard_stats(days_back=1)
+        assert stats["avg_processing_time_ms"] == 10.0
+        assert urgent_ids == [1, 2]
+
+    @pytest.mark.asyncio
+    async def test_load_catches_up_on_new_rows(self, session):
+        snapshot = AnalyticsSnapshot()
+        await snapshot.load(session)
+
+        # Inserted by another worker process
+        session.add(FeedbackRecord(
+            feedback_text="from another worker",
+            category="Bug Report",
+            urgency_score=5,
+            created_at=datetime.utcnow()
+        ))
+        await session.commit()
+
+        assert await snapshot.load(session) == 1
+        assert await snapshot.load(session) == 0
+        assert len(snapshot) == len(ROWS) + 1
+        stats, _ = snapshot.dashboard_stats(days_back=30)
+        assert stats["total_feedback"] == 8
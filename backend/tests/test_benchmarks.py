@@ -0,0 +1,37 @@
+import sys
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+from benchmarks.common import find_regressions, percentile
+
+GATES = {
+    "requests_per_second": "higher",
+    "latency_ms.p99": "lower",
+}
+
+
+class TestRegressionGates:
+    def test_percentile(self):
+        values = list(range(1, 101))
+        assert percentile(values, 50) == 50
+        assert percentile(values, 99) == 99
+        assert percentile([], 99) == 0.0
+
+    def test_within_threshold(self):
+        baseline = {"requests_per_second": 100, "latency_ms": {"p99": 200}}
+        result = {"requests_per_second": 95, "latency_ms": {"p99": 215}}
+        assert find_regressions(result, baseline, GATES, 0.10) == []
+
+    def test_regressions_detected(self):
+        baseline = {"requests_per_second": 100, "latency_ms": {"p99": 200}}
+        result = {"requests_per_second": 80, "latency_ms": {"p99": 260}}
+        regressions = find_regressions(result, baseline, GATES, 0.10)
+        assert len(regressions) == 2
+        assert regressions[0].startswith("requests_per_second")
+
+    def test_missing_baseline_metric_ignored(self):
+        result = {"requests_per_second": 10, "latency_ms": {"p99": 999}}
+        assert find_regressions(result, {"requests_per_second": 10}, GATES, 0.10) == []
@@ -0,0 +1,180 @@
+import pytest
+import pytest_asyncio
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select, text
+from sqlalchemy.exc import StatementError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.database.connection import Base, get_db, get_session_factory
+from src.models.database import FeedbackRecord
+from src.models.types import pack_ip, unpack_ip
+from src.services.feedback_service import FeedbackService
+from src.api.triage import llm_service
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        now = datetime.utcnow()
+        for i in range(20):
+            db.add(FeedbackRecord(
+                feedback_text=f"Login page \"broken\" ünïcode #{i}",
+                category="Bug Report" if i % 2 else "Feature Request",
+                urgency_score=i % 5 + 1,
+                client_ip="2001:db8::1" if i % 3 else None,
+                processing_time_ms=None if i % 4 == 0 else 100.0 / (i + 1),
+                model_tier=("primary" if i % 4 == 0 else "cheap") if i < 16 else None,
+                created_at=now - timedelta(hours=i, microseconds=i * 7),
+                updated_at=datetime(2024, 1, 1, tzinfo=timezone.utc) if i == 3 else None
+            ))
+        await db.commit()
+
+    async def override_get_db():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    await engine.dispose()
+
+
+class TestDashboardFastPath:
+    @pytest.mark.asyncio
+    async def test_history_matches_to_dict(self, session_factory):
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/feedback", params={"limit": 10, "offset": 2})
+
+        assert response.status_code == 200
+        async with session_factory() as db:
+            records = await FeedbackService(db).get_feedback_history(limit=10, offset=2)
+        data = response.json()
+        assert data["count"] == 10
+        assert data["feedback"] == [record.to_dict() for record in records]
+
+    @pytest.mark.asyncio
+    async def test_search_matches_to_dict(self, session_factory):
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/search", params={"q": "#1"})
+
+        assert response.status_code == 200
+        async with session_factory() as db:
+            records = await FeedbackService(db).search_feedback("#1")
+        data = response.json()
+        assert data["search_term"] == "#1"
+        assert data["feedback"] == [record.to_dict() for record in records]
+
+
+class TestDashboardBootstrap:
+    @pytest.mark.asyncio
+    async def test_matches_separate_endpoints(self, session_factory):
+        app.dependency_overrides[get_session_factory] = lambda: session_factory
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                response = await client.get("/api/dashboard/bootstrap", params={"days_back": 7, "limit": 10})
+                stats = await client.get("/api/dashboard/stats", params={"days_back": 7})
+                feedback = await client.get("/api/dashboard/feedback", params={"limit": 10})
+                categories = await client.get("/api/dashboard/categories")
+        finally:
+            app.dependency_overrides.pop(get_session_factory, None)
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "stats": stats.json(),
+            "feedback": feedback.json(),
+            "categories": categories.json()
+        }
+
+
+class TestLLMTierStats:
+    @pytest.mark.asyncio
+    async def test_escalation_rate(self, session_factory, monkeypatch):
+        monkeypatch.setattr(llm_service, "cascade_model", "cheap-model")
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/llm-tiers", params={"days_back": 7})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["tiers"]["cheap"]["count"] == 12
+        assert data["tiers"]["primary"]["count"] == 4
+        assert data["tiers"]["primary"]["avg_processing_time_ms"] is None
+        assert data["escalation_rate"] == 0.25
+
+    @pytest.mark.asyncio
+    async def test_no_escalation_rate_without_cascade(self, session_factory, monkeypatch):
+        monkeypatch.setattr(llm_service, "cascade_model", None)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/llm-tiers")
+
+        assert response.json()["escalation_rate"] is None
+
+
+class TestCompactColumns:
+    def test_ip_round_trip(self):
+        for host in ("203.0.113.7", "255.255.255.255", "255.0.0.1", "2001:db8::1", "ff02::1", "::1",
+                     "unknown", "testclient", "abc", "a" * 15, ""):
+            assert unpack_ip(pack_ip(host)) == host
+        assert (len(pack_ip("203.0.113.7")), len(pack_ip("2001:db8::1"))) == (4, 16)
+
+    @pytest.mark.asyncio
+    async def test_records_read_back_as_strings(self, session_factory):
+        async with session_factory() as db:
+            db.add(FeedbackRecord(feedback_text="Export is empty", category="Bug Report",
+                                  urgency_score=4, client_ip="198.51.100.2"))
+            await db.commit()
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/feedback", params={"category": "Bug Report", "limit": 1})
+            unknown = await client.get("/api/dashboard/feedback", params={"category": "Nonsense"})
+
+        record = response.json()["feedback"][0]
+        assert (record["category"], record["client_ip"]) == ("Bug Report", "198.51.100.2")
+        assert unknown.json()["count"] == 0
+
+    @pytest.mark.asyncio
+    async def test_unknown_categories_are_rejected_on_write_and_tolerated_on_read(self, session_factory):
+        async with session_factory() as db:
+            db.add(FeedbackRecord(feedback_text="Hi", category="Nonsense", urgency_score=1))
+            with pytest.raises(StatementError, match="Unknown feedback category"):
+                await db.commit()
+            await db.rollback()
+
+            # A code from a newer release
+            await db.execute(text(
+                "INSERT INTO feedback_records (id, feedback_text, category, urgency_score, content_hash) "
+                "VALUES (9999, 'Hi', 9, 1, 0)"
+            ))
+            record = await db.get(FeedbackRecord, 9999)
+        assert record.category == "Unknown (9)"
+
+    @pytest.mark.asyncio
+    async def test_text_lookup_uses_content_hash(self, session_factory):
+        async with session_factory() as db:
+            result = await db.execute(
+                select(FeedbackRecord.id).where(FeedbackRecord.matching_text('Login page "broken" ünïcode #3'))
+            )
+            assert result.scalars().all() == [4]
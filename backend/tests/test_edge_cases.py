@@ -77,10 +77,10 @@ class TestEdgeCases:
         
         response = client.post("/triage", json={"text": "Test feedback"})
         
-        assert response.status_code == 400
+        assert response.status_code == 502
         data = response.json()
-        assert data["error"] == "Validation Error"
-        assert "Invalid JSON response" in data["message"]
+        assert data["error"] == "Invalid LLM Response"
+        assert "try again later" in data["message"]
 
 
 class TestLLMServiceEdgeCases:
@@ -109,7 +109,7 @@ class TestLLMServiceEdgeCases:
             await self.llm_service.analyze_feedback(large_text)
     
     @pytest.mark.asyncio
-    @patch('services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_empty_llm_response(self, mock_openai):
         """Test handling of empty LLM response."""
         mock_response = MagicMock()
@@ -126,7 +126,7 @@ class TestLLMServiceEdgeCases:
             await service.analyze_feedback("Test feedback")
     
     @pytest.mark.asyncio
-    @patch('services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_missing_category_field(self, mock_openai):
         """Test handling of LLM response missing category field."""
         mock_response = MagicMock()
@@ -143,7 +143,7 @@ class TestLLMServiceEdgeCases:
             await service.analyze_feedback("Test feedback")
     
     @pytest.mark.asyncio
-    @patch('services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_missing_urgency_field(self, mock_openai):
         """Test handling of LLM response missing urgency field."""
         mock_response = MagicMock()
@@ -160,7 +160,7 @@ class TestLLMServiceEdgeCases:
             await service.analyze_feedback("Test feedback")
     
     @pytest.mark.asyncio
-    @patch('services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_non_dict_response(self, mock_openai):
         """Test handling of non-dictionary LLM response."""
         mock_response = MagicMock()
@@ -177,7 +177,7 @@ class TestLLMServiceEdgeCases:
             await service.analyze_feedback("Test feedback")
     
     @pytest.mark.asyncio
-    @patch('services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_json_extraction_with_extra_text(self, mock_openai):
         """Test JSON extraction when LLM includes extra text."""
         mock_response = MagicMock()
@@ -195,7 +195,7 @@ class TestLLMServiceEdgeCases:
         assert result["urgency_score"] == 4
     
     @pytest.mark.asyncio
-    @patch('services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_string_urgency_score(self, mock_openai):
         """Test handling of string urgency score."""
         mock_response = MagicMock()
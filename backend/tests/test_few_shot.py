@@ -0,0 +1,93 @@
+import pytest
+import os
+import sys
+from pathlib import Path
+
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.database.connection import Base
+from src.models.database import FeedbackRecord
+from src.services.few_shot import DEFAULT_EXAMPLES, MAX_EXAMPLE_CHARS, Example, ExampleIndex
+from src.services.llm_service import LLMService, PROMPT_INSTRUCTIONS
+
+EXPORT_BUG = Example("The export button downloads an empty CSV file", "Bug Report", 3)
+PDF_REQUEST = Example("Could you support exporting reports to PDF", "Feature Request", 2)
+DISCOUNT_QUESTION = Example("Is there a student discount for the annual plan", "General Inquiry", 1)
+
+
+class TestExampleIndex:
+    def test_picks_most_similar_examples_last(self):
+        index = ExampleIndex(DEFAULT_EXAMPLES + (EXPORT_BUG, PDF_REQUEST, DISCOUNT_QUESTION))
+        chosen = index.nearest("The CSV export button is downloading an empty file again", k=2)
+
+        assert len(chosen) == 2
+        assert chosen[-1] == EXPORT_BUG
+
+    def test_input_does_not_see_its_own_label(self):
+        index = ExampleIndex(DEFAULT_EXAMPLES + (EXPORT_BUG,))
+        assert EXPORT_BUG not in index.nearest(EXPORT_BUG.text, k=3)
+
+    def test_pads_with_built_in_examples(self):
+        index = ExampleIndex(())
+        assert index.nearest("something unrelated", k=2) == list(DEFAULT_EXAMPLES[:2])[::-1]
+
+    def test_duplicates_are_indexed_once(self):
+        index = ExampleIndex(())
+        assert index.add(EXPORT_BUG)
+        assert not index.add(EXPORT_BUG)
+        assert not index.add(Example("!!! 42", "Bug Report", 1))
+        assert len(index) == 1
+
+    @pytest.mark.asyncio
+    async def test_seed_from_feedback_records(self):
+        engine = create_async_engine(
+            "sqlite+aiosqlite:///:memory:",
+            connect_args={"check_same_thread": False},
+            poolclass=StaticPool
+        )
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        async with factory() as db:
+            for example in (EXPORT_BUG, EXPORT_BUG, PDF_REQUEST):
+                db.add(FeedbackRecord(feedback_text=example.text, category=example.category,
+                                      urgency_score=example.urgency_score))
+            db.add(FeedbackRecord(feedback_text="x" * (MAX_EXAMPLE_CHARS + 1), category="Bug Report", urgency_score=2))
+            await db.commit()
+
+            index = ExampleIndex()
+            assert await index.seed(db) == 2
+        await engine.dispose()
+
+        assert len(index) == len(DEFAULT_EXAMPLES) + 2
+        assert index.nearest("export is empty", k=1) == [EXPORT_BUG]
+
+
+class TestPrompt:
+    def test_instructions_are_a_fixed_prefix(self):
+        service = LLMService()
+        for mode in ("static", "dynamic"):
+            service.few_shot_mode = mode
+            first = service._create_prompt("The export button is broken")
+            second = service._create_prompt("Please add a dark mode")
+            assert first.startswith(PROMPT_INSTRUCTIONS)
+            assert second.startswith(PROMPT_INSTRUCTIONS)
+
+    def test_dynamic_prompt_is_shorter(self):
+        service = LLMService()
+        static = service._create_prompt("The export button is broken")
+        service.few_shot_mode = "dynamic"
+        dynamic = service._create_prompt("The export button is broken")
+
+        assert dynamic.count("Example ") == 3
+        assert len(dynamic) < len(static)
+        assert dynamic.endswith('Feedback to analyze: "The export button is broken"\n\nResponse:')
@@ -0,0 +1,134 @@
+from fastapi.testclient import TestClient
+import os
+import sys
+import random
+from collections import Counter
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.services import heavy_hitters
+from src.services.heavy_hitters import CountMinSketch, SpaceSaving, SubmitterTracker, submitter_tracker
+
+client = TestClient(app)
+
+
+def skewed_stream(n=20000, seed=1):
+    """A few heavy IPs over a long tail of one-off submitters."""
+    rng = random.Random(seed)
+    stream = []
+    for i in range(n):
+        roll = rng.random()
+        if roll < 0.3:
+            stream.append("10.0.0.1")
+        elif roll < 0.45:
+            stream.append("10.0.0.2")
+        elif roll < 0.5:
+            stream.append("10.0.0.3")
+        else:
+            stream.append(f"172.16.{i // 256 % 256}.{i % 256}")
+    return stream
+
+
+class TestSketches:
+    def test_space_saving_keeps_heavy_keys_with_bounded_error(self):
+        stream = skewed_stream()
+        summary = SpaceSaving(capacity=64)
+        for key in stream:
+            summary.add(key)
+
+        exact = Counter(stream)
+        assert [key for key, _, _ in summary.top(3)] == ["10.0.0.1", "10.0.0.2", "10.0.0.3"]
+        for key, count, error in summary.top(64):
+            assert count - error <= exact[key] <= count
+        assert len(summary) == 64
+
+    def test_merged_summaries_match_a_single_summary_on_heavy_keys(self):
+        stream = skewed_stream()
+        left, right = SpaceSaving(capacity=64), SpaceSaving(capacity=64)
+        for i, key in enumerate(stream):
+            (left if i % 2 else right).add(key)
+        left.merge(right.state(), capacity=64)
+
+        exact = Counter(stream)
+        for key, count, error in left.top(3):
+            assert count - error <= exact[key] <= count
+
+    def test_count_min_never_underestimates(self):
+        sketch = CountMinSketch(width=64, depth=4)
+        exact = Counter()
+        for i in range(2000):
+            key = f"ip-{i % 300}"
+            sketch.add(key, i % 7)
+            exact[key] += i % 7
+        assert all(sketch.estimate(key) >= value for key, value in exact.items())
+
+
+class TestSubmitterTracker:
+    def test_top_submitters_with_category_mix_and_tokens(self):
+        tracker = SubmitterTracker()
+        for _ in range(30):
+            tracker.record("10.0.0.1", "Bug Report", tokens=400)
+        for _ in range(10):
+            tracker.record("10.0.0.1", "Praise/Positive Feedback", tokens=400)
+            tracker.record("10.0.0.2", "Feature Request", tokens=2000)
+
+        by_requests = tracker.top_submitters(limit=2)
+        assert by_requests["total_requests"] == 50
+        top = by_requests["submitters"][0]
+        assert (top["client_ip"], top["requests"], top["tokens"]) == ("10.0.0.1", 40, 16000)
+        assert top["category_mix"] == {"Bug Report": 30, "Praise/Positive Feedback": 10}
+        assert top["share"] == 0.8
+
+        by_tokens = tracker.top_submitters(limit=1, by="tokens")
+        assert by_tokens["submitters"][0]["client_ip"] == "10.0.0.2"
+
+    def test_windows_rotate(self):
+        tracker = SubmitterTracker(window_seconds=60)
+        tracker.record("10.0.0.1", "Bug Report", now=30)
+        tracker.record("10.0.0.2", "Bug Report", now=70)
+
+        assert tracker.window(now=70).requests == 1
+        assert tracker.window(previous=True, now=70).requests == 1
+        # A gap longer than a window leaves nothing to compare against
+        assert tracker.window(previous=True, now=500).requests == 0
+
+    def test_dominant_source_gets_tighter_rate_limit(self, monkeypatch):
+        monkeypatch.setattr(heavy_hitters, "HEAVY_HITTER_THROTTLE_MIN_REQUESTS", 10)
+        tracker = SubmitterTracker(throttle_share=0.5)
+        for i in range(20):
+            tracker.record("10.0.0.1", "Bug Report")
+            tracker.record(f"10.0.1.{i % 4}", "Bug Report")
+
+        assert tracker.rate_limit_for("10.0.0.1", 10) == 2
+        assert tracker.rate_limit_for("10.0.1.1", 10) == 10
+        assert SubmitterTracker(throttle_share=0).rate_limit_for("10.0.0.1", 10) == 10
+
+
+class TestSubmittersEndpoint:
+    def setup_method(self):
+        submitter_tracker.reset()
+
+    def teardown_method(self):
+        submitter_tracker.reset()
+
+    def test_endpoint(self):
+        submitter_tracker.record("203.0.113.9", "Bug Report", tokens=500)
+        submitter_tracker.record("203.0.113.9", "General Inquiry", tokens=500)
+
+        response = client.get("/api/dashboard/submitters", params={"limit": 5, "by": "tokens"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total_tokens"] == 1000
+        assert data["submitters"][0]["client_ip"] == "203.0.113.9"
+        assert data["submitters"][0]["throttled"] is False
+
+    def test_invalid_ranking(self):
+        response = client.get("/api/dashboard/submitters", params={"by": "cost"})
+        assert response.status_code == 422
@@ -0,0 +1,217 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, patch
+import os
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.api.triage import idempotency_store
+from src.services.idempotency import (
+    IdempotencyConflict, IdempotencyInProgress, IdempotencyUnavailable, InMemoryIdempotencyStore, SQLiteIdempotencyStore,
+    StoredResponse, key_digest, new_owner
+)
+
+client = TestClient(app)
+
+BUG = {"category": "Bug Report", "urgency_score": 4}
+
+
+class TestTriageIdempotency:
+    def setup_method(self):
+        idempotency_store.clear()
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_retry_replays_stored_response(self, mock_analyze):
+        mock_analyze.return_value = dict(BUG)
+        headers = {"Idempotency-Key": "retry-1"}
+
+        first = client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+        second = client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+
+        assert first.status_code == second.status_code == 200
+        assert second.json() == first.json()
+        assert second.headers["Idempotent-Replayed"] == "true"
+        assert "Idempotent-Replayed" not in first.headers
+        assert mock_analyze.await_count == 1
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_key_reused_for_different_request(self, mock_analyze):
+        mock_analyze.return_value = dict(BUG)
+        headers = {"Idempotency-Key": "reused"}
+
+        client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+        response = client.post("/triage", json={"text": "Export is broken"}, headers=headers)
+
+        assert response.status_code == 422
+        assert response.json()["error"] == "Idempotency Key Reused"
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_server_errors_are_not_replayed(self, mock_analyze):
+        mock_analyze.side_effect = [Exception("LLM API error"), dict(BUG)]
+        headers = {"Idempotency-Key": "flaky"}
+
+        first = client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+        second = client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+
+        assert (first.status_code, second.status_code) == (500, 200)
+        assert mock_analyze.await_count == 2
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_invalid_llm_replies_are_not_replayed(self, mock_analyze):
+        mock_analyze.side_effect = [ValueError("Invalid JSON response from LLM: {"), dict(BUG)]
+        headers = {"Idempotency-Key": "unparseable"}
+
+        first = client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+        second = client.post("/triage", json={"text": "Login is broken"}, headers=headers)
+
+        assert (first.status_code, second.status_code) == (502, 200)
+
+    def test_locked_store_answers_503(self):
+        with patch.object(idempotency_store, "acquire", AsyncMock(side_effect=IdempotencyUnavailable())):
+            response = client.post("/triage", json={"text": "Login is broken"}, headers={"Idempotency-Key": "locked"})
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_requests_without_key_are_not_deduplicated(self, mock_analyze):
+        mock_analyze.return_value = dict(BUG)
+        client.post("/triage", json={"text": "Login is broken"})
+        client.post("/triage", json={"text": "Login is broken"})
+        assert mock_analyze.await_count == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_retry_waits_for_first_attempt(self):
+        calls = 0
+
+        async def slow_analyze(text):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.05)
+            return dict(BUG)
+
+        headers = {"Idempotency-Key": "in-flight"}
+        with patch('src.api.triage.llm_service.analyze_feedback', side_effect=slow_analyze):
+            async with httpx.AsyncClient(app=app, base_url="http://test") as async_client:
+                first, second = await asyncio.gather(
+                    async_client.post("/triage", json={"text": "Login is broken"}, headers=headers),
+                    async_client.post("/triage", json={"text": "Login is broken"}, headers=headers),
+                )
+
+        assert calls == 1
+        assert first.json() == second.json()
+        assert {first.headers.get("Idempotent-Replayed"), second.headers.get("Idempotent-Replayed")} == {None, "true"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryIdempotencyStore(ttl=60)
+    return SQLiteIdempotencyStore(tmp_path / "idempotency.db", ttl=60)
+
+
+class TestIdempotencyStores:
+    @pytest.mark.asyncio
+    async def test_complete_then_replay(self, store):
+        digest, owner = key_digest("k"), new_owner()
+        assert await store.acquire(digest, 1, owner) is None
+        await store.complete(digest, owner, StoredResponse(200, b'{"ok": true}'))
+
+        assert await store.acquire(digest, 1, new_owner()) == StoredResponse(200, b'{"ok": true}')
+        with pytest.raises(IdempotencyConflict):
+            await store.acquire(digest, 2, new_owner())
+
+    @pytest.mark.asyncio
+    async def test_waiter_times_out_then_takes_over_released_key(self, store):
+        digest, owner = key_digest("k"), new_owner()
+        assert await store.acquire(digest, 1, owner) is None
+        with pytest.raises(IdempotencyInProgress):
+            await store.acquire(digest, 1, new_owner(), wait=0.1)
+
+        await store.release(digest, owner)
+        assert await store.acquire(digest, 1, new_owner()) is None
+
+    @pytest.mark.asyncio
+    async def test_keys_expire(self, store):
+        store.ttl = 0
+        digest, owner = key_digest("k"), new_owner()
+        await store.acquire(digest, 1, owner)
+        await store.complete(digest, owner, StoredResponse(200, b"{}"))
+
+        assert await store.acquire(digest, 1, new_owner()) is None
+
+    @pytest.mark.asyncio
+    async def test_only_the_owner_completes_or_releases(self, store):
+        digest, owner = key_digest("k"), new_owner()
+        await store.acquire(digest, 1, owner)
+        await store.release(digest, new_owner())
+        await store.complete(digest, new_owner(), StoredResponse(500, b"{}"))
+        with pytest.raises(IdempotencyInProgress):
+            await store.acquire(digest, 1, new_owner(), wait=0.1)
+
+        await store.complete(digest, owner, StoredResponse(200, b"{}"))
+        assert await store.acquire(digest, 1, new_owner()) == StoredResponse(200, b"{}")
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_taken_over_and_old_owner_is_ignored(self, tmp_path):
+        store = SQLiteIdempotencyStore(tmp_path / "idempotency.db", ttl=60, lease=0)
+        digest, slow, retry = key_digest("k"), new_owner(), new_owner()
+        await store.acquire(digest, 1, slow)
+        # The slow attempt's lease ran out, e.g. because its worker died
+        assert await store.acquire(digest, 1, retry) is None
+
+        store.lease = 60
+        await store.renew(digest, retry)
+        await store.complete(digest, slow, StoredResponse(500, b"stale"))
+        await store.release(digest, slow)
+        with pytest.raises(IdempotencyInProgress):
+            await store.acquire(digest, 1, new_owner(), wait=0.1)
+
+        await store.complete(digest, retry, StoredResponse(200, b"{}"))
+        assert await store.acquire(digest, 1, new_owner()) == StoredResponse(200, b"{}")
+
+    @pytest.mark.asyncio
+    async def test_locked_file_is_reported_not_raised(self, tmp_path, monkeypatch):
+        import sqlite3
+        from src.services import idempotency
+
+        monkeypatch.setattr(idempotency, "IDEMPOTENCY_LOCK_TIMEOUT", 0.05)
+        store = SQLiteIdempotencyStore(tmp_path / "idempotency.db", ttl=60)
+        digest, owner = key_digest("k"), new_owner()
+        assert await store.acquire(digest, 1, owner) is None
+
+        holder = sqlite3.connect(tmp_path / "idempotency.db", isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            with pytest.raises(IdempotencyUnavailable):
+                await store.acquire(key_digest("other"), 1, new_owner())
+            # Skipped; the claim stays until its lease runs out
+            await store.complete(digest, owner, StoredResponse(200, b"{}"))
+        finally:
+            holder.execute("ROLLBACK")
+            holder.close()
+        with pytest.raises(IdempotencyInProgress):
+            await store.acquire(digest, 1, new_owner(), wait=0.1)
+
+    def test_memory_store_is_bounded(self):
+        store = InMemoryIdempotencyStore(ttl=60, max_keys=2)
+
+        async def fill():
+            for key in ("a", "b", "c"):
+                owner = new_owner()
+                await store.acquire(key_digest(key), 1, owner)
+                await store.complete(key_digest(key), owner, StoredResponse(200, b"{}"))
+
+        asyncio.run(fill())
+        assert list(store._completed) == [key_digest("b"), key_digest("c")]
@@ -0,0 +1,140 @@
+import pytest
+import pytest_asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.database.connection import Base, get_db
+from src.models.database import FeedbackRecord
+from src.services.incident_clustering import IncidentIndex, incident_index, minhash
+
+OUTAGE = [
+    "Checkout page crashes when I apply a discount code",
+    "The checkout page crashes when I apply my discount code!",
+    "checkout page crashes when I apply a discount code on mobile",
+    "URGENT: checkout page crashes when I apply a discount code",
+]
+UNRELATED = "Notifications arrive twice and sometimes hours late"
+
+
+class TestIncidentIndex:
+    def test_minhash_ignores_case_and_punctuation(self):
+        assert (minhash("Checkout CRASHES!") == minhash("checkout crashes")).all()
+        assert minhash("!!! 123") is None
+
+    def test_near_duplicates_share_a_cluster(self):
+        index = IncidentIndex()
+        now = datetime.utcnow()
+        ids = {index.add(i, text, now, "Bug Report", 5) for i, text in enumerate(OUTAGE, start=1)}
+        other = index.add(10, UNRELATED, now, "Bug Report", 4)
+
+        assert len(ids) == 1
+        assert other not in ids
+        clusters = index.active_clusters()
+        assert [c["count"] for c in clusters] == [4, 1]
+        assert clusters[0]["representative_id"] == 1
+        assert clusters[0]["recent_ids"] == [4, 3, 2, 1]
+
+    def test_ignores_ineligible_records(self):
+        index = IncidentIndex()
+        now = datetime.utcnow()
+        assert index.add(1, OUTAGE[0], now, "Bug Report", 3) is None
+        assert index.add(2, OUTAGE[0], now, "Feature Request", 5) is None
+        assert len(index) == 0
+
+    def test_clusters_expire_after_window(self):
+        index = IncidentIndex(window=timedelta(hours=1))
+        now = datetime.utcnow()
+        old = index.add(1, OUTAGE[0], now - timedelta(hours=3), "Bug Report", 5)
+        # Too long after the old cluster's last report to join it
+        new = index.add(2, OUTAGE[1], now, "Bug Report", 5)
+
+        assert new != old
+        assert [c["cluster_id"] for c in index.active_clusters()] == [new]
+        assert len(index) == 1
+
+    def test_adding_expires_stale_clusters_without_reads(self):
+        index = IncidentIndex(window=timedelta(hours=1))
+        now = datetime.utcnow()
+        index.add(1, OUTAGE[0], now - timedelta(hours=3), "Bug Report", 5)
+        index.add(2, UNRELATED, now - timedelta(hours=3), "Bug Report", 5)
+        assert len(index) == 2
+
+        index.add(3, OUTAGE[1], now, "Bug Report", 5)
+        assert len(index) == 1
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with factory() as db:
+        now = datetime.utcnow()
+        for i, text in enumerate(OUTAGE):
+            db.add(FeedbackRecord(feedback_text=text, category="Bug Report", urgency_score=5,
+                                  created_at=now - timedelta(minutes=i)))
+        db.add(FeedbackRecord(feedback_text=UNRELATED, category="Bug Report", urgency_score=4, created_at=now))
+        db.add(FeedbackRecord(feedback_text=OUTAGE[0], category="Bug Report", urgency_score=2, created_at=now))
+        db.add(FeedbackRecord(feedback_text=OUTAGE[0], category="Bug Report", urgency_score=5,
+                              created_at=now - timedelta(days=2)))
+        await db.commit()
+
+    async def override_get_db():
+        async with factory() as db:
+            yield db
+
+    incident_index.reset()
+    app.dependency_overrides[get_db] = override_get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    incident_index.reset()
+    await engine.dispose()
+
+
+class TestIncidentCatchUp:
+    @pytest.mark.asyncio
+    async def test_catch_up_indexes_only_new_eligible_records(self, session_factory):
+        index = IncidentIndex()
+        async with session_factory() as db:
+            assert await index.catch_up(db) == 5
+            assert index.loaded
+            assert await index.catch_up(db) == 0
+
+            db.add(FeedbackRecord(feedback_text=OUTAGE[2], category="Bug Report", urgency_score=4))
+            await db.commit()
+            assert await index.catch_up(db) == 1
+
+        assert [c["count"] for c in index.active_clusters()] == [5, 1]
+
+    @pytest.mark.asyncio
+    async def test_incidents_endpoint(self, session_factory):
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/incidents", params={"min_count": 2})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["count"] == 1
+        assert data["incidents"][0]["count"] == 4
+        assert data["incidents"][0]["max_urgency"] == 5
+        assert data["window_hours"] == 6
@@ -0,0 +1,105 @@
+import pytest
+import asyncio
+import os
+import sys
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.services.llm_scheduler import (
+    PriorityScheduler,
+    pre_priority,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW,
+)
+from src.services.metrics import LLM_QUEUE_WAIT, registry
+
+
+async def run_queued(scheduler, requests):
+    """Enqueue ``(name, priority)`` pairs behind a held slot; return the order they ran."""
+    order = []
+
+    async def job(name, priority):
+        async with scheduler.slot(priority):
+            order.append(name)
+
+    await scheduler.acquire()
+    tasks = []
+    for name, priority in requests:
+        tasks.append(asyncio.create_task(job(name, priority)))
+        await asyncio.sleep(0.01)
+    scheduler.release()
+    await asyncio.gather(*tasks)
+    return order
+
+
+class TestPrePriority:
+    def test_urgent_feedback(self):
+        assert pre_priority("URGENT: Payment processing is completely broken!") == PRIORITY_HIGH
+        assert pre_priority("The app crashes when I upload a photo") == PRIORITY_HIGH
+
+    def test_praise_and_suggestions(self):
+        assert pre_priority("Amazing update, thank you!") == PRIORITY_LOW
+        assert pre_priority("It would be nice to have dark mode") == PRIORITY_LOW
+
+    def test_everything_else(self):
+        assert pre_priority("How do I change my notification settings?") == PRIORITY_NORMAL
+
+    def test_urgency_wins_over_politeness(self):
+        assert pre_priority("Thanks, but checkout is down for everyone") == PRIORITY_HIGH
+
+
+class TestPriorityScheduler:
+    def setup_method(self):
+        registry.clear()
+
+    @pytest.mark.asyncio
+    async def test_higher_priority_served_first(self):
+        scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=60)
+        order = await run_queued(scheduler, [
+            ("praise", PRIORITY_LOW),
+            ("question", PRIORITY_NORMAL),
+            ("outage", PRIORITY_HIGH),
+        ])
+        assert order == ["outage", "question", "praise"]
+        assert scheduler.active == 0
+        assert LLM_QUEUE_WAIT.count("low") == 1
+
+    @pytest.mark.asyncio
+    async def test_aging_prevents_starvation(self):
+        # After 20 ms of waiting the low-priority request outranks newer high ones
+        scheduler = PriorityScheduler(max_concurrency=1, aging_seconds=0.01)
+        order = await run_queued(scheduler, [
+            ("praise", PRIORITY_LOW),
+            ("outage-1", PRIORITY_HIGH),
+            ("outage-2", PRIORITY_HIGH),
+            ("outage-3", PRIORITY_HIGH),
+        ])
+        assert order.index("praise") < order.index("outage-3")
+
+    @pytest.mark.asyncio
+    async def test_runs_immediately_when_not_saturated(self):
+        scheduler = PriorityScheduler(max_concurrency=2)
+        await scheduler.acquire(PRIORITY_LOW)
+        await asyncio.wait_for(scheduler.acquire(PRIORITY_LOW), timeout=0.1)
+        assert scheduler.active == 2
+
+    @pytest.mark.asyncio
+    async def test_cancelled_waiter_does_not_leak_slot(self):
+        scheduler = PriorityScheduler(max_concurrency=1)
+        await scheduler.acquire()
+        waiter = asyncio.create_task(scheduler.acquire(PRIORITY_HIGH))
+        await asyncio.sleep(0)
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        assert len(scheduler) == 0
+
+        scheduler.release()
+        assert scheduler.active == 0
+        await asyncio.wait_for(scheduler.acquire(), timeout=0.1)
@@ -1,7 +1,9 @@
 import pytest
 import pytest_asyncio
 from unittest.mock import AsyncMock, patch, MagicMock
+import inspect
 import json
+from types import SimpleNamespace
 import os
 import sys
 from pathlib import Path
@@ -13,7 +15,11 @@ sys.path.insert(0, str(backend_src))
 os.environ["LLM_API_KEY"] = "test_key"
 os.environ["TESTING"] = "true"
 
-from src.services.llm_service import LLMService
+from src.services.llm_service import LLMService, JSONObjectScanner, TIER_CHEAP, TIER_PRIMARY
+from src.services.metrics import (
+    registry, LLM_TIER_REQUESTS, LLM_TIER_TOKENS, LLM_PARSE_FAILURES, LLM_REPAIRS,
+    LLM_TIME_TO_FIRST_TOKEN, LLM_TIME_TO_VERDICT
+)
 
 class TestLLMService:
     def setup_method(self):
@@ -21,8 +27,10 @@ class TestLLMService:
     
     def test_init_with_missing_api_key(self):
         with patch.dict(os.environ, {}, clear=True):
-            with pytest.raises(ValueError, match="LLM_API_KEY environment variable is required"):
-                LLMService()
+            # Construction is cheap and lazy; the key is required once the client is used
+            service = LLMService()
+            with pytest.raises(RuntimeError, match="LLM_API_KEY environment variable is required"):
+                service.client
     
     def test_create_prompt(self):
         feedback = "Test feedback"
@@ -34,7 +42,7 @@ class TestLLMService:
         assert "JSON" in prompt
     
     @pytest.mark.asyncio
-    @patch('src.services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_analyze_feedback_success(self, mock_openai):
         mock_response = MagicMock()
         mock_response.choices[0].message.content = '{"category": "Bug Report", "urgency_score": 4}'
@@ -52,7 +60,7 @@ class TestLLMService:
         assert result["urgency_score"] == 4
     
     @pytest.mark.asyncio
-    @patch('src.services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_analyze_feedback_invalid_json(self, mock_openai):
         mock_response = MagicMock()
         mock_response.choices[0].message.content = 'Invalid JSON'
@@ -68,7 +76,7 @@ class TestLLMService:
             await service.analyze_feedback("Test feedback")
     
     @pytest.mark.asyncio
-    @patch('src.services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_analyze_feedback_invalid_category(self, mock_openai):
         mock_response = MagicMock()
         mock_response.choices[0].message.content = '{"category": "Invalid Category", "urgency_score": 4}'
@@ -84,7 +92,7 @@ class TestLLMService:
             await service.analyze_feedback("Test feedback")
     
     @pytest.mark.asyncio
-    @patch('src.services.llm_service.AsyncOpenAI')
+    @patch('openai.AsyncOpenAI')
     async def test_analyze_feedback_invalid_urgency(self, mock_openai):
         mock_response = MagicMock()
         mock_response.choices[0].message.content = '{"category": "Bug Report", "urgency_score": 6}'
@@ -97,4 +105,257 @@ class TestLLMService:
         service.client = mock_client
         
         with pytest.raises(ValueError, match="Invalid urgency score"):
-            await service.analyze_feedback("Test feedback")
\ No newline at end of file
+            await service.analyze_feedback("Test feedback")
+
+def completion(content, prompt_tokens=400, completion_tokens=20, logprobs=None):
+    response = MagicMock()
+    response.choices[0].message.content = content
+    response.choices[0].logprobs = logprobs
+    response.usage.prompt_tokens = prompt_tokens
+    response.usage.completion_tokens = completion_tokens
+    return response
+
+
+class TestModelCascade:
+    def setup_method(self):
+        registry.clear()
+    
+    def make_service(self, *responses, **env):
+        with patch.dict(os.environ, {"LLM_CASCADE_MODEL": "cheap-model", "LLM_MODEL": "gpt-4o", **env}):
+            service = LLMService()
+        service.client = AsyncMock()
+        service.client.chat.completions.create.side_effect = list(responses)
+        return service
+    
+    def models_called(self, service):
+        return [call.kwargs["model"] for call in service.client.chat.completions.create.call_args_list]
+    
+    @pytest.mark.asyncio
+    async def test_confident_cheap_answer_is_used(self):
+        service = self.make_service(
+            completion('{"category": "Bug Report", "urgency_score": 5, "confidence": 0.95}')
+        )
+        result = await service.analyze_feedback("Checkout is down")
+        
+        latency_ms = result.pop("llm_latency_ms")
+        assert result == {
+            "category": "Bug Report", "urgency_score": 5, "model_tier": TIER_CHEAP,
+            "llm_tokens": 420, "llm_prompt_tokens": 400, "llm_completion_tokens": 20, "llm_cost_usd": 0.0,
+            "llm_usage_estimated": False
+        }
+        assert latency_ms >= 0
+        assert self.models_called(service) == ["cheap-model"]
+        assert LLM_TIER_REQUESTS.value(TIER_CHEAP, "answered") == 1
+        assert LLM_TIER_TOKENS.value(TIER_CHEAP, "prompt") == 400
+    
+    @pytest.mark.asyncio
+    async def test_low_confidence_escalates(self):
+        service = self.make_service(
+            completion('{"category": "General Inquiry", "urgency_score": 2, "confidence": 0.4}'),
+            completion('{"category": "Bug Report", "urgency_score": 3}')
+        )
+        result = await service.analyze_feedback("The export looks odd")
+        
+        assert result["category"] == "Bug Report"
+        assert result["model_tier"] == TIER_PRIMARY
+        assert self.models_called(service) == ["cheap-model", "gpt-4o"]
+        assert LLM_TIER_REQUESTS.value(TIER_CHEAP, "escalated") == 1
+        assert LLM_TIER_REQUESTS.value(TIER_PRIMARY, "answered") == 1
+        # Both attempts count towards the request's spend
+        assert result["llm_tokens"] == 840
+    
+    @pytest.mark.asyncio
+    async def test_invalid_cheap_answer_escalates(self):
+        service = self.make_service(
+            completion('{"category": "Complaint", "urgency_score": 9, "confidence": 0.99}'),
+            completion('{"category": "Feature Request", "urgency_score": 2}')
+        )
+        result = await service.analyze_feedback("Add dark mode")
+        
+        assert result["model_tier"] == TIER_PRIMARY
+        assert LLM_TIER_REQUESTS.value(TIER_CHEAP, "error") == 1
+    
+    @pytest.mark.asyncio
+    async def test_logprob_confidence(self):
+        confident = {"content": [{"token": "Bug", "logprob": -0.01}, {"token": "5", "logprob": -0.05}]}
+        unsure = {"content": [{"token": "Bug", "logprob": -0.01}, {"token": "3", "logprob": -1.2}]}
+        service = self.make_service(
+            completion('{"category": "Bug Report", "urgency_score": 5}', logprobs=confident),
+            completion('{"category": "Bug Report", "urgency_score": 3}', logprobs=unsure),
+            completion('{"category": "Bug Report", "urgency_score": 4}'),
+            LLM_CASCADE_CONFIDENCE="logprobs"
+        )
+        assert (await service.analyze_feedback("Login fails"))["model_tier"] == TIER_CHEAP
+        assert (await service.analyze_feedback("Login fails again"))["model_tier"] == TIER_PRIMARY
+        first_call = service.client.chat.completions.create.call_args_list[0]
+        assert first_call.kwargs["extra_body"] == {"logprobs": True}
+    
+    @pytest.mark.asyncio
+    async def test_single_model_without_cascade(self):
+        with patch.dict(os.environ, {"LLM_MODEL": "gpt-4o"}):
+            service = LLMService()
+        service.client = AsyncMock()
+        service.client.chat.completions.create.return_value = completion(
+            '{"category": "Praise/Positive Feedback", "urgency_score": 1}'
+        )
+        result = await service.analyze_feedback("Love it")
+        
+        assert result["model_tier"] == TIER_PRIMARY
+        assert "confidence" not in service.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+
+
+class TestStructuredOutput:
+    def setup_method(self):
+        registry.clear()
+    
+    def make_service(self, *responses, **env):
+        with patch.dict(os.environ, {"LLM_MODEL": "gpt-4o", **env}):
+            service = LLMService()
+        service.client = AsyncMock()
+        service.client.chat.completions.create.side_effect = list(responses)
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_json_schema_request(self):
+        service = self.make_service(
+            completion('{"category": "Bug Report", "urgency_score": 4}', completion_tokens=16),
+            LLM_STRUCTURED_OUTPUT="json_schema"
+        )
+        await service.analyze_feedback("Login is broken")
+        
+        kwargs = service.client.chat.completions.create.call_args.kwargs
+        response_format = kwargs["extra_body"]["response_format"]
+        schema = response_format["json_schema"]["schema"]
+        assert response_format["json_schema"]["strict"] is True
+        assert schema["properties"]["category"]["enum"][0] == "Bug Report"
+        assert schema["required"] == ["category", "urgency_score"]
+        assert kwargs["max_tokens"] == 32
+    
+    @pytest.mark.asyncio
+    async def test_invalid_reply_is_repaired_once(self):
+        service = self.make_service(
+            completion('Sure! {"category": "Bug", "urgency_score": 4}'),
+            completion('{"category": "Bug Report", "urgency_score": 4}', prompt_tokens=100)
+        )
+        result = await service.analyze_feedback("Login is broken")
+        
+        assert result["category"] == "Bug Report"
+        assert result["llm_tokens"] == 420 + 120
+        repair_prompt = service.client.chat.completions.create.call_args.kwargs["messages"][0]["content"]
+        assert "Invalid category: Bug" in repair_prompt
+        assert "Example 1" not in repair_prompt
+        assert LLM_PARSE_FAILURES.value(TIER_PRIMARY) == 1
+        assert LLM_REPAIRS.value("repaired") == 1
+    
+    @pytest.mark.asyncio
+    async def test_failed_repair_raises(self):
+        service = self.make_service(completion("no idea"), completion("still no idea"))
+        with pytest.raises(ValueError):
+            await service.analyze_feedback("Login is broken")
+        assert service.client.chat.completions.create.await_count == 2
+        assert LLM_REPAIRS.value("failed") == 1
+    
+    def test_unknown_mode(self):
+        with patch.dict(os.environ, {"LLM_STRUCTURED_OUTPUT": "xml"}):
+            with pytest.raises(ValueError, match="LLM_STRUCTURED_OUTPUT"):
+                LLMService()
+
+
+class FakeStream:
+    """Chat completion chunks, recording how many were read and whether it was closed."""
+    
+    def __init__(self, pieces, usage=None):
+        self.pieces = pieces
+        self.usage = usage
+        self.read = 0
+        self.response = AsyncMock()
+    
+    def __aiter__(self):
+        return self
+    
+    async def __anext__(self):
+        if self.read == len(self.pieces) + (self.usage is not None):
+            raise StopAsyncIteration
+        self.read += 1
+        if self.read > len(self.pieces):
+            # include_usage: a last chunk with usage and no choices
+            return SimpleNamespace(choices=[], usage=self.usage)
+        delta = SimpleNamespace(content=self.pieces[self.read - 1])
+        return SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+
+class TestStreaming:
+    def setup_method(self):
+        registry.clear()
+    
+    def make_service(self, *streams):
+        with patch.dict(os.environ, {"LLM_STREAMING": "true"}):
+            service = LLMService()
+        service.client = AsyncMock()
+        # Checked against the installed SDK's signature, which rejects unknown parameters
+        from openai import AsyncOpenAI
+        
+        signature = inspect.signature(AsyncOpenAI(api_key="test_key").chat.completions.create)
+        remaining = iter(streams)
+        
+        async def create(**kwargs):
+            signature.bind(**kwargs)
+            return next(remaining)
+        
+        service.client.chat.completions.create.side_effect = create
+        return service
+    
+    @pytest.mark.asyncio
+    async def test_stops_reading_once_verdict_is_complete(self):
+        stream = FakeStream(['', 'Here you go: {"categ', 'ory": "Bug Report", "urg', 'ency_score": 4}',
+                             ' The login page', ' is clearly broken because...'])
+        service = self.make_service(stream)
+        result = await service.analyze_feedback("Login is broken")
+        
+        assert result["category"] == "Bug Report"
+        assert result["urgency_score"] == 4
+        assert stream.read == 4
+        stream.response.aclose.assert_awaited_once()
+        assert service.client.chat.completions.create.call_args.kwargs["stream"] is True
+        assert LLM_TIME_TO_FIRST_TOKEN.count(TIER_PRIMARY) == 1
+        assert LLM_TIME_TO_VERDICT.count(TIER_PRIMARY) == 1
+        extra_body = service.client.chat.completions.create.call_args.kwargs["extra_body"]
+        assert extra_body["stream_options"] == {"include_usage": True}
+        # No usage in a stream cut short: estimated from the characters read
+        assert result["llm_tokens"] > 0
+        assert result["llm_usage_estimated"] is True
+    
+    @pytest.mark.asyncio
+    async def test_reported_usage_is_used_when_the_stream_ends(self):
+        usage = SimpleNamespace(prompt_tokens=100000, completion_tokens=12)
+        service = self.make_service(
+            # No verdict, so the stream is read to its usage chunk
+            FakeStream(['{"category": "Bug Report", "urgency'], usage=usage),
+            FakeStream(['{"category": "Bug Report", "urgency_score": 3}'])
+        )
+        result = await service.analyze_feedback("Login is broken")
+        
+        assert result["urgency_score"] == 3
+        assert result["llm_prompt_tokens"] > 100000
+        # The repair's stream was cut short
+        assert result["llm_usage_estimated"] is True
+    
+    @pytest.mark.asyncio
+    async def test_incomplete_reply_is_repaired(self):
+        service = self.make_service(
+            FakeStream(['{"note": "{not it}"} ', '{"category": "Bug Report", "urgency']),
+            FakeStream(['{"category": "Bug Report", "urgency_score": 3}'])
+        )
+        result = await service.analyze_feedback("Login is broken")
+        
+        assert result["urgency_score"] == 3
+        assert LLM_PARSE_FAILURES.value(TIER_PRIMARY) == 1
+        assert LLM_TIME_TO_VERDICT.count(TIER_PRIMARY) == 1
+    
+    def test_scanner_ignores_braces_in_strings(self):
+        scanner = JSONObjectScanner()
+        assert scanner.feed('Sure { "a": "}\\"{", ') is None
+        assert scanner.feed('"b": {"c": 1}} and {"d": 2}') == '{ "a": "}\\"{", "b": {"c": 1}}'
+        assert scanner.feed("") == '{"d": 2}'
+        assert scanner.feed("") is None
+
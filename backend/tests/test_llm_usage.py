@@ -0,0 +1,127 @@
+import pytest
+import pytest_asyncio
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.database.connection import Base, get_db
+from src.models.database import LLMUsageHourly
+from src.services import llm_usage
+from src.services.feedback_service import FeedbackService
+from src.services.llm_usage import add_to_rollup, hour_start, usage_report
+
+# Taken before the autouse conftest fixture replaces it with a no-op
+create_feedback_record = FeedbackService.create_feedback_record
+
+
+@pytest_asyncio.fixture
+async def session_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def override_get_db():
+        async with factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_get_db
+    yield factory
+    app.dependency_overrides.pop(get_db, None)
+    await engine.dispose()
+
+
+async def store(db, prompt_tokens=None, completion_tokens=None, estimated=False):
+    return await create_feedback_record(
+        FeedbackService(db),
+        feedback_text="Login is broken",
+        category="Bug Report",
+        urgency_score=4,
+        llm_prompt_tokens=prompt_tokens,
+        llm_completion_tokens=completion_tokens,
+        llm_cost_usd=None if prompt_tokens is None else 0.002,
+        llm_latency_ms=None if prompt_tokens is None else 300.0,
+        llm_usage_estimated=estimated
+    )
+
+
+class TestLLMUsage:
+    @pytest.mark.asyncio
+    async def test_records_add_to_hourly_rollup(self, session_factory):
+        async with session_factory() as db:
+            record = await store(db, 400, 20)
+            await store(db, 300, 10)
+            # Records without usage (e.g. imported) are not counted
+            await store(db)
+            await add_to_rollup(db, 1000, 50, 0.01, 900.0, now=datetime.utcnow() - timedelta(hours=2))
+            await db.commit()
+            rows = (await db.execute(select(LLMUsageHourly).order_by(LLMUsageHourly.hour))).scalars().all()
+
+        assert record.to_dict()["llm_prompt_tokens"] == 400
+        assert [row.requests for row in rows] == [1, 2]
+        current = rows[-1].to_dict()
+        assert current["hour"] == hour_start(datetime.utcnow()).isoformat()
+        assert (current["prompt_tokens"], current["completion_tokens"]) == (700, 30)
+        assert current["cost_usd"] == pytest.approx(0.004)
+        assert current["avg_llm_latency_ms"] == 300.0
+
+    @pytest.mark.asyncio
+    async def test_report_totals_and_headroom(self, session_factory, monkeypatch):
+        monkeypatch.setattr(llm_usage, "LLM_TPM_QUOTA", 1000)
+        async with session_factory() as db:
+            await store(db, 400, 20)
+            await store(db, 300, 10)
+            await add_to_rollup(db, 1000, 50, 0.01, 900.0, now=datetime.utcnow() - timedelta(hours=30))
+            await db.commit()
+            report = await usage_report(db, hours=24)
+
+        assert len(report["hourly"]) == 1
+        assert report["totals"]["requests"] == 2
+        assert report["last_minute"] == {"requests": 2, "tokens": 730, "tokens_per_second": 12.167, "estimated_tokens": 0}
+        assert report["quota"]["tpm_headroom"] == 0.27
+        assert report["quota"]["rpm"] is None
+        assert report["quota"]["rpm_headroom"] is None
+
+    @pytest.mark.asyncio
+    async def test_estimated_usage_is_labelled(self, session_factory):
+        async with session_factory() as db:
+            await store(db, 400, 20)
+            record = await store(db, 300, 10, estimated=True)
+            report = await usage_report(db, hours=1)
+
+        assert record.to_dict()["llm_usage_estimated"] is True
+        assert (report["totals"]["requests"], report["totals"]["estimated_requests"]) == (2, 1)
+        assert report["hourly"][0]["estimated_tokens"] == 310
+        assert (report["last_minute"]["tokens"], report["last_minute"]["estimated_tokens"]) == (730, 310)
+
+    @pytest.mark.asyncio
+    async def test_usage_endpoint(self, session_factory):
+        async with session_factory() as db:
+            await store(db, 400, 20)
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/llm-usage", params={"hours": 48})
+            invalid = await client.get("/api/dashboard/llm-usage", params={"hours": 0})
+
+        assert response.status_code == 200
+        assert response.json()["totals"]["prompt_tokens"] == 400
+        assert response.json()["time_period_hours"] == 48
+        assert invalid.status_code == 422
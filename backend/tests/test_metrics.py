@@ -0,0 +1,108 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock, MagicMock, patch
+import os
+import sys
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.services.llm_service import LLMService
+from src.services import metrics
+from src.services.metrics import (
+    Gauge,
+    Histogram,
+    MetricsRegistry,
+    registry,
+    TRIAGE_STAGE_DURATION,
+    LLM_UPSTREAM_RESPONSES,
+    HTTP_REQUEST_DURATION,
+)
+
+client = TestClient(app)
+
+
+class TestMetrics:
+    def setup_method(self):
+        registry.clear()
+
+    def test_merge_across_workers(self):
+        worker = MetricsRegistry()
+        latency = worker.register(Histogram("demo_seconds", "Demo", buckets=(0.1, 1.0)))
+        in_flight = worker.register(Gauge("demo_in_flight", "Demo"))
+        latency.observe(0.05)
+        in_flight.inc()
+        state = worker.state()
+        latency.observe(0.5)
+
+        merged = worker.render_merged([(worker.state(), True), (state, True)]).splitlines()
+        assert 'demo_seconds_count 3' in merged
+        assert 'demo_in_flight 2' in merged
+
+        # An exited worker keeps its counts but not its gauges
+        merged = worker.render_merged([(worker.state(), True), (state, False)]).splitlines()
+        assert 'demo_seconds_count 3' in merged
+        assert 'demo_in_flight 1' in merged
+
+    def test_shared_metrics_include_other_workers(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(metrics, "shared_path", lambda *parts: tmp_path.joinpath(*parts))
+        (tmp_path / "metrics").mkdir()
+        other = MetricsRegistry()
+        for metric in registry._metrics.values():
+            other.register(metric.empty_copy())
+        other._metrics["llm_upstream_responses_total"].inc("200", amount=4)
+        # pid 1 is always running
+        (tmp_path / "metrics" / "1.json").write_text(metrics.json.dumps(other.state()))
+
+        LLM_UPSTREAM_RESPONSES.inc("200")
+        assert 'llm_upstream_responses_total{status="200"} 5' in metrics.render_metrics()
+
+    def test_histogram_render(self):
+        histogram = Histogram("demo_seconds", "Demo", ("stage",), buckets=(0.1, 1.0))
+        histogram.observe(0.05, "llm")
+        histogram.observe(0.5, "llm")
+        histogram.observe(5.0, "llm")
+
+        lines = histogram.render()
+        assert '# TYPE demo_seconds histogram' in lines
+        assert 'demo_seconds_bucket{stage="llm",le="0.1"} 1' in lines
+        assert 'demo_seconds_bucket{stage="llm",le="1"} 2' in lines
+        assert 'demo_seconds_bucket{stage="llm",le="+Inf"} 3' in lines
+        assert 'demo_seconds_count{stage="llm"} 3' in lines
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_triage_stages_and_route_recorded(self, mock_analyze):
+        mock_analyze.return_value = {"category": "Bug Report", "urgency_score": 4}
+
+        response = client.post("/triage", json={"text": "Login is broken"})
+        assert response.status_code == 200
+
+        for stage in ("rate_limit", "validation", "db_commit", "serialization"):
+            assert TRIAGE_STAGE_DURATION.count(stage) == 1
+        assert HTTP_REQUEST_DURATION.count("POST", "/triage", "200") == 1
+
+        body = client.get("/metrics").text
+        assert 'triage_stage_duration_seconds_count{stage="db_commit"} 1' in body
+        assert 'http_request_duration_seconds_count{method="POST",route="/triage",status="200"} 1' in body
+        assert "http_requests_in_flight" in body
+
+    @pytest.mark.asyncio
+    async def test_llm_upstream_status_recorded(self):
+        mock_response = MagicMock()
+        mock_response.choices[0].message.content = '{"category": "Bug Report", "urgency_score": 4}'
+        mock_client = AsyncMock()
+        mock_client.chat.completions.create.return_value = mock_response
+
+        service = LLMService()
+        service.client = mock_client
+        await service.analyze_feedback("Login is broken")
+
+        assert LLM_UPSTREAM_RESPONSES.value("200") == 1
+        assert TRIAGE_STAGE_DURATION.count("llm") == 1
+        assert TRIAGE_STAGE_DURATION.count("parse") == 1
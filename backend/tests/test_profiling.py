@@ -0,0 +1,93 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+import os
+import sys
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.services import profiling
+from src.services.profiling import RequestProfilerMiddleware, memory_profiler, request_profiles
+
+client = TestClient(app)
+ADMIN_HEADERS = {"X-Admin-Token": "secret"}
+
+
+@pytest.fixture
+def profiling_enabled(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "ADMIN_TOKEN", "secret")
+    yield
+    memory_profiler.stop()
+
+
+class TestProfiling:
+    def test_admin_endpoints_hidden_by_default(self):
+        response = client.post("/api/admin/profile/cpu", params={"seconds": 0.1}, headers=ADMIN_HEADERS)
+        assert response.status_code == 404
+
+    def test_admin_token_required(self, profiling_enabled):
+        response = client.post("/api/admin/profile/cpu", params={"seconds": 0.1}, headers={"X-Admin-Token": "wrong"})
+        assert response.status_code == 403
+
+    def test_cpu_profile_returns_collapsed_stacks(self, profiling_enabled):
+        response = client.post(
+            "/api/admin/profile/cpu",
+            params={"seconds": 0.1, "interval_ms": 5},
+            headers=ADMIN_HEADERS
+        )
+        assert response.status_code == 200
+        assert "attachment" in response.headers["content-disposition"]
+        lines = response.text.strip().splitlines()
+        assert lines
+        stack, count = lines[0].rsplit(" ", 1)
+        assert int(count) >= 1
+        assert ";" in stack
+
+    def test_memory_snapshot_and_diff(self, profiling_enabled):
+        response = client.get("/api/admin/profile/memory/diff", headers=ADMIN_HEADERS)
+        assert response.status_code == 409
+
+        response = client.post("/api/admin/profile/memory/snapshot", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert response.json()["tracing"] is True
+
+        leak = [bytearray(1024) for _ in range(100)]
+        response = client.get("/api/admin/profile/memory/diff", headers=ADMIN_HEADERS)
+        assert response.status_code == 200
+        assert any("test_profiling.py" in row["location"] for row in response.json()["growth"])
+        del leak
+
+        response = client.delete("/api/admin/profile/memory", headers=ADMIN_HEADERS)
+        assert response.json()["tracing"] is False
+
+    def test_request_profile_by_header(self, profiling_enabled):
+        profiled_app = FastAPI()
+
+        @profiled_app.get("/work")
+        async def work():
+            return {"total": sum(range(1000))}
+
+        profiled_app.add_middleware(RequestProfilerMiddleware)
+        profiled_client = TestClient(profiled_app)
+
+        response = profiled_client.get("/work")
+        assert "x-profile-id" not in response.headers
+
+        response = profiled_client.get("/work", headers={"X-Profile-Request": "secret"})
+        assert response.status_code == 200
+        report = request_profiles.get(response.headers["x-profile-id"])
+        assert "function calls" in report
+
+        response = client.get(
+            f"/api/admin/profile/requests/{response.headers['x-profile-id']}",
+            headers=ADMIN_HEADERS
+        )
+        assert response.status_code == 200
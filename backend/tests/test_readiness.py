@@ -0,0 +1,204 @@
+import pytest
+from fastapi.testclient import TestClient
+from unittest.mock import AsyncMock
+import os
+import sys
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.main import app, readiness_service
+from src.database import connection
+# Bound at import; the autouse conftest fixture replaces connection.init_db with a no-op
+from src.database.connection import Base, init_db
+from src.database.migrations import SCHEMA_VERSION
+from src.models.types import unpack_ip
+from src.services import health_service
+
+client = TestClient(app)
+
+# feedback_records as created before schema versioning
+LEGACY_FEEDBACK_TABLE = """
+CREATE TABLE feedback_records (
+    id INTEGER NOT NULL PRIMARY KEY,
+    feedback_text TEXT NOT NULL,
+    category VARCHAR(50) NOT NULL,
+    urgency_score INTEGER NOT NULL,
+    client_ip VARCHAR(45),
+    processing_time_ms FLOAT,
+    created_at DATETIME DEFAULT (CURRENT_TIMESTAMP),
+    updated_at DATETIME
+)
+"""
+
+
+@pytest.fixture
+def memory_engine(monkeypatch):
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    monkeypatch.setattr(connection, "engine", engine)
+    monkeypatch.setattr(health_service, "engine", engine)
+    return engine
+
+
+async def index_names(engine):
+    async with engine.connect() as conn:
+        result = await conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'index'"))
+        return {row[0] for row in result}
+
+
+class TestReadiness:
+    def test_health_is_liveness_only(self):
+        response = client.get("/health")
+        assert response.status_code == 200
+        assert response.json() == {"status": "healthy"}
+
+    def test_ready_when_dependencies_reachable(self, monkeypatch):
+        monkeypatch.setattr(readiness_service, "check_database", AsyncMock(return_value={"ok": True, "latency_ms": 1.0}))
+        monkeypatch.setattr(readiness_service, "check_llm", AsyncMock(return_value={"ok": True, "latency_ms": 50.0}))
+
+        response = client.get("/ready")
+        assert response.status_code == 200
+        assert response.json()["status"] == "ready"
+
+    def test_not_ready_when_llm_unreachable(self, monkeypatch):
+        monkeypatch.setattr(readiness_service, "check_database", AsyncMock(return_value={"ok": True, "latency_ms": 1.0}))
+        monkeypatch.setattr(readiness_service, "check_llm", AsyncMock(return_value={"ok": False, "error": "APIConnectionError"}))
+
+        response = client.get("/ready")
+        assert response.status_code == 503
+        assert response.json()["checks"]["llm"]["ok"] is False
+
+    @pytest.mark.asyncio
+    async def test_database_check_runs_query(self, memory_engine):
+        result = await readiness_service.check_database()
+        assert result["ok"] is True
+        await memory_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_llm_probe_is_cached(self, monkeypatch):
+        service = health_service.ReadinessService(AsyncMock())
+        await service.check_llm()
+        await service.check_llm()
+        assert service.llm_service.check_connection.await_count == 1
+
+        service.llm_service.check_connection.side_effect = TimeoutError()
+        result = await service.check_llm(force=True)
+        assert result["ok"] is False
+
+
+class TestSchemaVersion:
+    @pytest.mark.asyncio
+    async def test_fresh_database_is_stamped(self, memory_engine):
+        await init_db()
+        assert await connection.get_schema_version() == SCHEMA_VERSION
+        async with memory_engine.connect() as conn:
+            await conn.execute(text("SELECT COUNT(*) FROM feedback_records"))
+
+        # A second boot only reads the version
+        await init_db()
+        assert await connection.get_schema_version() == SCHEMA_VERSION
+        await memory_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_legacy_database_is_migrated(self, memory_engine):
+        async with memory_engine.begin() as conn:
+            await conn.execute(text(LEGACY_FEEDBACK_TABLE))
+            await conn.execute(text(
+                "CREATE INDEX ix_feedback_records_urgency_score ON feedback_records (urgency_score)"
+            ))
+        assert await connection.get_schema_version() is None
+
+        await init_db()
+        assert await connection.get_schema_version() == SCHEMA_VERSION
+        assert "ix_feedback_records_urgency_score" not in await index_names(memory_engine)
+        async with memory_engine.connect() as conn:
+            await conn.execute(text("SELECT model_tier FROM feedback_records"))
+        await memory_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_legacy_rows_are_copied_to_compact_table(self, memory_engine):
+        async with memory_engine.begin() as conn:
+            await conn.execute(text(LEGACY_FEEDBACK_TABLE))
+            await conn.execute(text(
+                "CREATE INDEX ix_feedback_records_client_ip ON feedback_records (client_ip)"
+            ))
+            await conn.execute(text(
+                "INSERT INTO feedback_records (id, feedback_text, category, urgency_score, client_ip, created_at) VALUES "
+                "(3, 'App crashes', 'Bug Report', 5, '203.0.113.7', '2024-05-01 12:00:00'), "
+                "(8, 'Dark mode?', 'Feature Request', 2, '2001:db8::1', '2024-05-02 12:00:00'), "
+                "(9, 'Hi', 'General Inquiry', 1, 'unknown', NULL)"
+            ))
+
+        await init_db()
+        async with memory_engine.connect() as conn:
+            rows = (await conn.execute(text(
+                "SELECT id, category, typeof(client_ip), length(client_ip), content_hash IS NOT NULL "
+                "FROM feedback_records ORDER BY id"
+            ))).all()
+        assert [tuple(row) for row in rows] == [
+            (3, 1, "blob", 4, 1), (8, 2, "blob", 16, 1), (9, 4, "blob", 8, 1)
+        ]
+        assert "ix_feedback_records_client_ip" in await index_names(memory_engine)
+        assert "ix_feedback_records_category" not in await index_names(memory_engine)
+        await memory_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_unknown_legacy_category_stops_the_migration(self, memory_engine):
+        async with memory_engine.begin() as conn:
+            await conn.execute(text(LEGACY_FEEDBACK_TABLE))
+            await conn.execute(text(
+                "INSERT INTO feedback_records (id, feedback_text, category, urgency_score) VALUES "
+                "(1, 'Hi', 'Something else', 1), (2, 'Hello', 'Something else', 1)"
+            ))
+
+        with pytest.raises(ValueError, match="'Something else': 2"):
+            await init_db()
+        assert await connection.get_schema_version() is None
+        async with memory_engine.connect() as conn:
+            assert (await conn.execute(text("SELECT category FROM feedback_records WHERE id = 1"))).scalar() == "Something else"
+        await memory_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_version_4_database_gets_usage_columns(self, memory_engine):
+        async with memory_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            for column in ("llm_prompt_tokens", "llm_completion_tokens", "llm_cost_usd", "llm_latency_ms"):
+                await conn.execute(text(f"ALTER TABLE feedback_records DROP COLUMN {column}"))
+            await conn.execute(text("DROP TABLE llm_usage_hourly"))
+            await conn.execute(text("INSERT INTO schema_version (version) VALUES (4)"))
+
+        await init_db()
+        assert await connection.get_schema_version() == SCHEMA_VERSION
+        async with memory_engine.connect() as conn:
+            await conn.execute(text("SELECT llm_prompt_tokens, llm_latency_ms FROM feedback_records"))
+            await conn.execute(text("SELECT requests FROM llm_usage_hourly"))
+        await memory_engine.dispose()
+
+    @pytest.mark.asyncio
+    async def test_version_6_short_text_hosts_are_padded(self, memory_engine):
+        async with memory_engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.execute(text(
+                "INSERT INTO feedback_records (id, feedback_text, category, urgency_score, client_ip, content_hash) VALUES "
+                "(1, 'Hi', 4, 1, X'FF616263', 0), (2, 'Hi', 4, 1, X'FFFFFFFF', 0), (3, 'Hi', 4, 1, X'FF756E6B6E6F776E', 0)"
+            ))
+            await conn.execute(text("INSERT INTO schema_version (version) VALUES (6)"))
+
+        await init_db()
+        async with memory_engine.connect() as conn:
+            rows = (await conn.execute(text("SELECT client_ip FROM feedback_records ORDER BY id"))).all()
+        assert [unpack_ip(row[0]) for row in rows] == ["abc", "255.255.255.255", "unknown"]
+        await memory_engine.dispose()
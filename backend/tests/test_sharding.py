@@ -0,0 +1,207 @@
+import pytest
+import pytest_asyncio
+import itertools
+import os
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.database.connection import Base, create_engine, get_db, init_db
+from src.database.sharding import ShardSet, shard_url, shards
+from src.models.database import FeedbackRecord, LLMUsageHourly
+from src.services.feedback_service import FeedbackService
+from src.services.llm_usage import usage_report
+
+# Taken before the autouse conftest fixture replaces it with a no-op
+create_feedback_record = FeedbackService.create_feedback_record
+
+SHARD_COUNT = 3
+
+
+def sample_records(now):
+    return [
+        dict(
+            feedback_text=f"Checkout {'timeout' if i % 3 else 'crash'} #{i}",
+            category="Bug Report" if i % 2 else "Feature Request",
+            urgency_score=i % 5 + 1,
+            processing_time_ms=None if i % 4 == 0 else 100.0 / (i + 1),
+            model_tier="primary" if i % 4 == 0 else "cheap",
+            created_at=now - timedelta(hours=i, microseconds=i * 7)
+        )
+        for i in range(30)
+    ]
+
+
+@pytest_asyncio.fixture
+async def single_factory():
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def shard_set(tmp_path):
+    url = f"sqlite+aiosqlite:///{tmp_path}/feedback.db"
+    shard_engines = [create_engine(url)] + [create_engine(shard_url(url, index)) for index in range(1, SHARD_COUNT)]
+    await init_db(shard_engines[0])
+    test_shards = ShardSet(shard_engines)
+    await test_shards.init()
+    yield test_shards
+    await test_shards.dispose()
+
+
+def use_shards(monkeypatch, test_shards):
+    """Point the configured shard set at ``test_shards``."""
+    monkeypatch.setattr(shards, "engines", test_shards.engines)
+    monkeypatch.setattr(shards, "session_factories", test_shards.session_factories)
+    monkeypatch.setattr(shards, "id_floor", test_shards.id_floor)
+    monkeypatch.setattr(shards, "_placement", itertools.count())
+
+
+async def seed(single_factory, test_shards, now):
+    """The same records in one database and spread over the shards."""
+    records = sample_records(now)
+    async with single_factory() as db:
+        db.add_all([FeedbackRecord(id=i + 1, **values) for i, values in enumerate(records)])
+        await db.commit()
+    for shard, session_factory in enumerate(test_shards.session_factories):
+        async with session_factory() as db:
+            db.add_all([
+                FeedbackRecord(id=i + 1, **values)
+                for i, values in enumerate(records)
+                if (i + 1) % SHARD_COUNT == shard
+            ])
+            await db.commit()
+
+
+async def shard_counts(test_shards):
+    async def count(db):
+        return (await db.execute(select(func.count(FeedbackRecord.id)))).scalar()
+
+    return await test_shards.scatter(count)
+
+
+class TestShardUrl:
+    def test_inserts_shard_suffix_before_extension(self):
+        assert shard_url("sqlite+aiosqlite:///./feedback_triage.db", 2) == "sqlite+aiosqlite:///./feedback_triage.shard2.db"
+        assert shard_url("sqlite+aiosqlite:////data/feedback", 1) == "sqlite+aiosqlite:////data/feedback.shard1"
+        assert shard_url("sqlite+aiosqlite:///./v1.2/feedback", 1) == "sqlite+aiosqlite:///./v1.2/feedback.shard1"
+
+
+class TestShardedWrites:
+    @pytest.mark.asyncio
+    async def test_records_are_spread_with_ids_naming_their_shard(self, shard_set, monkeypatch):
+        use_shards(monkeypatch, shard_set)
+        records = []
+        for i in range(7):
+            records.append(await create_feedback_record(
+                FeedbackService(None),
+                feedback_text=f"Report {i}",
+                category="Bug Report",
+                urgency_score=3,
+                llm_prompt_tokens=100,
+                llm_completion_tokens=10,
+                llm_cost_usd=0.001,
+                llm_latency_ms=200.0
+            ))
+
+        ids = [record.id for record in records]
+        assert len(set(ids)) == 7
+        assert [record_id % SHARD_COUNT for record_id in ids] == [0, 1, 2, 0, 1, 2, 0]
+        assert await shard_counts(shard_set) == [3, 2, 2]
+
+        # Each shard rolls up its own records; the report sums them
+        async def requests(db):
+            return (await db.execute(select(func.sum(LLMUsageHourly.requests)))).scalar()
+
+        assert await shard_set.scatter(requests) == [3, 2, 2]
+        report = await usage_report(None)
+        assert report["totals"]["requests"] == 7
+        assert report["totals"]["prompt_tokens"] == 700
+        assert len(report["hourly"]) == 1
+        assert report["last_minute"]["requests"] == 7
+
+    @pytest.mark.asyncio
+    async def test_empty_shards_start_above_existing_ids(self, shard_set, monkeypatch):
+        # Records stored before sharding was enabled keep their ids on shard 0
+        async with shard_set.session_factories[0]() as db:
+            db.add(FeedbackRecord(id=41, feedback_text="Legacy", category="General Inquiry", urgency_score=1))
+            await db.commit()
+        await shard_set.init()
+        use_shards(monkeypatch, shard_set)
+
+        records = [
+            await create_feedback_record(FeedbackService(None), feedback_text="New", category="Bug Report", urgency_score=2)
+            for _ in range(3)
+        ]
+        assert [record.id for record in records] == [42, 43, 44]
+
+
+class TestScatterGather:
+    @pytest.mark.asyncio
+    async def test_reads_match_a_single_database(self, single_factory, shard_set, monkeypatch):
+        await seed(single_factory, shard_set, datetime.utcnow())
+        async with single_factory() as db:
+            service = FeedbackService(db)
+            expected_page = await service.get_feedback_history(limit=7, offset=5, rows=True)
+            expected_filtered = await service.get_feedback_history(limit=4, category="Bug Report", urgency_min=3)
+            expected_search = await service.search_feedback("crash", limit=6, rows=True)
+            expected_stats = await service.get_dashboard_stats(days_back=1)
+            expected_tiers = await service.get_model_tier_stats()
+
+        use_shards(monkeypatch, shard_set)
+        service = FeedbackService(None)
+        page = await service.get_feedback_history(limit=7, offset=5, rows=True)
+        filtered = await service.get_feedback_history(limit=4, category="Bug Report", urgency_min=3)
+        search = await service.search_feedback("crash", limit=6, rows=True)
+        stats = await service.get_dashboard_stats(days_back=1)
+        tiers = await service.get_model_tier_stats()
+
+        assert [row.id for row in page] == [row.id for row in expected_page]
+        assert [record.id for record in filtered] == [record.id for record in expected_filtered]
+        assert [row.id for row in search] == [row.id for row in expected_search]
+        assert stats == expected_stats
+        assert stats["total_feedback"] == 24
+        assert tiers == expected_tiers
+
+    @pytest.mark.asyncio
+    async def test_endpoints_read_every_shard(self, single_factory, shard_set, monkeypatch):
+        await seed(single_factory, shard_set, datetime.utcnow())
+        use_shards(monkeypatch, shard_set)
+
+        async def override_get_db():
+            async with shard_set.session_factories[0]() as db:
+                yield db
+
+        app.dependency_overrides[get_db] = override_get_db
+        try:
+            async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+                history = await client.get("/api/dashboard/feedback", params={"limit": 100})
+                incidents = await client.get("/api/dashboard/incidents")
+        finally:
+            app.dependency_overrides.pop(get_db, None)
+
+        assert history.status_code == 200
+        assert [record["id"] for record in history.json()["feedback"]] == list(range(1, 31))
+        # The incident index loads from a single database
+        assert incidents.status_code == 404
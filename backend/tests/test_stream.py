@@ -0,0 +1,110 @@
+import pytest
+import asyncio
+from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
+from unittest.mock import AsyncMock, patch
+import os
+import sys
+from pathlib import Path
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.api import stream
+from src.api.stream import parse_message
+from src.services.volume_anomalies import volume_detector
+
+client = TestClient(app)
+
+
+def classify(text):
+    if "broken" in text:
+        return {"category": "Bug Report", "urgency_score": 4}
+    if "fail" in text:
+        raise Exception("LLM API error")
+    return {"category": "Feature Request", "urgency_score": 2}
+
+
+class TestTriageStream:
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_results_are_tagged_with_client_ids(self, mock_analyze):
+        mock_analyze.side_effect = classify
+        with client.websocket_connect("/triage/stream") as ws:
+            assert ws.receive_json() == {"type": "credit", "credit": stream.WS_INGEST_CREDITS}
+            ws.send_json({"id": "a", "text": "Login is broken"})
+            ws.send_json({"id": 2, "text": "Add dark mode"})
+            ws.send_json({"id": "c", "text": "this will fail"})
+            replies = {reply["id"]: reply for reply in (ws.receive_json() for _ in range(3))}
+
+        assert replies["a"]["type"] == "result"
+        assert replies["a"]["result"] == {"feedback_text": "Login is broken", "category": "Bug Report", "urgency_score": 4}
+        assert replies[2]["result"]["category"] == "Feature Request"
+        assert replies["c"]["type"] == "error"
+        assert replies["c"]["status_code"] == 500
+
+    def test_invalid_messages_get_error_replies(self):
+        with client.websocket_connect("/triage/stream") as ws:
+            ws.receive_json()
+            ws.send_text("not json")
+            assert ws.receive_json()["id"] is None
+            ws.send_json({"id": "x", "text": ""})
+            reply = ws.receive_json()
+            assert (reply["id"], reply["status_code"]) == ("x", 422)
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_sending_without_credit_closes_connection(self, mock_analyze, monkeypatch):
+        async def slow(text):
+            await asyncio.sleep(0.2)
+            return {"category": "Bug Report", "urgency_score": 4}
+
+        mock_analyze.side_effect = slow
+        monkeypatch.setattr(stream, "WS_INGEST_CREDITS", 1)
+        with client.websocket_connect("/triage/stream") as ws:
+            assert ws.receive_json()["credit"] == 1
+            ws.send_json({"id": 1, "text": "Login is broken"})
+            ws.send_json({"id": 2, "text": "Login is broken"})
+            with pytest.raises(WebSocketDisconnect) as closed:
+                ws.receive_json()
+        assert closed.value.code == 1008
+
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_anomalies_are_pushed_without_using_credit(self, mock_analyze, monkeypatch):
+        async def classify_and_count(text):
+            # Stands in for the insert, which conftest replaces with a no-op
+            volume_detector.record("Bug Report", 4)
+            return {"category": "Bug Report", "urgency_score": 4}
+
+        mock_analyze.side_effect = classify_and_count
+        volume_detector.reset()
+        monkeypatch.setattr(volume_detector, "warmup_minutes", 0)
+        monkeypatch.setattr(volume_detector, "min_count", 2)
+        monkeypatch.setattr(volume_detector, "threshold", 1)
+        monkeypatch.setattr(stream, "WS_INGEST_CREDITS", 2)
+        try:
+            with client.websocket_connect("/triage/stream?anomalies=true") as ws:
+                ws.receive_json()
+                ws.send_json({"id": 1, "text": "Login is broken"})
+                assert ws.receive_json()["type"] == "result"
+                ws.send_json({"id": 2, "text": "Login is broken"})
+                replies = [ws.receive_json() for _ in range(3)]
+                # Both credits are back despite the extra anomaly messages
+                ws.send_json({"id": 3, "text": "Login is broken"})
+                ws.send_json({"id": 4, "text": "Login is broken"})
+                assert {ws.receive_json()["id"] for _ in range(2)} == {3, 4}
+        finally:
+            volume_detector.reset()
+
+        anomalies = [reply["spike"] for reply in replies if reply["type"] == "anomaly"]
+        assert {(spike["category"], spike["urgency_score"]) for spike in anomalies} == {
+            ("Bug Report", None), ("Bug Report", 4)
+        }
+
+    def test_parse_message(self):
+        assert parse_message(b'{"id": true, "text": "hi"}')[0] is None
+        message_id, request = parse_message('{"id": "k", "text": "hi"}')
+        assert (message_id, request.text) == ("k", "hi")
@@ -15,6 +15,7 @@ os.environ["TESTING"] = "true"
 
 # Import app from the module
 from src.main import app
+from src.services.llm_service import InvalidFeedback
 
 client = TestClient(app)
 
@@ -70,11 +71,28 @@ class TestTriageEndpoint:
     
     @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
     def test_triage_validation_error(self, mock_analyze):
-        mock_analyze.side_effect = ValueError("Invalid category")
+        mock_analyze.side_effect = InvalidFeedback("Feedback text cannot be empty")
         
         response = client.post("/triage", json={"text": "Test feedback"})
         
         assert response.status_code == 400
         data = response.json()
         assert data["error"] == "Validation Error"
-        assert data["status_code"] == 400
\ No newline at end of file
+        assert data["status_code"] == 400
+    
+    @patch('src.api.triage.llm_service.analyze_feedback', new_callable=AsyncMock)
+    def test_triage_invalid_llm_reply_is_not_a_client_error(self, mock_analyze):
+        mock_analyze.side_effect = ValueError("Invalid category")
+        
+        response = client.post("/triage", json={"text": "Test feedback"})
+        
+        assert response.status_code == 502
+        assert response.json()["error"] == "Invalid LLM Response"    
+    def test_triage_without_api_key_is_a_server_error(self):
+        from src.api.triage import llm_service
+        
+        with patch.object(llm_service, "api_key", None), patch.object(llm_service, "_client", None):
+            response = client.post("/triage", json={"text": "Test feedback"})
+        
+        assert response.status_code == 500
+        assert "LLM_API_KEY" not in response.json()["message"]
@@ -0,0 +1,91 @@
+import pytest
+import random
+import os
+import sys
+from pathlib import Path
+
+import httpx
+
+# Add backend/src to path for imports
+backend_src = Path(__file__).parent.parent / "src"
+sys.path.insert(0, str(backend_src))
+
+os.environ["LLM_API_KEY"] = "test_key"
+os.environ["TESTING"] = "true"
+
+from src.main import app
+from src.services.metrics import VOLUME_SPIKES
+from src.services.volume_anomalies import VolumeAnomalyDetector, volume_detector
+
+START = 1_700_000_040.0
+
+
+def feed_baseline(detector, minutes, seed=7, per_minute=3):
+    """Steady, noisy Bug Report traffic spread over ``minutes`` minutes."""
+    rng = random.Random(seed)
+    spikes = []
+    for minute in range(minutes):
+        for second in range(rng.randint(per_minute - 2, per_minute + 2)):
+            spikes += detector.record("Bug Report", rng.choice([2, 3]), now=START + minute * 60 + second)
+    return spikes
+
+
+class TestVolumeAnomalyDetector:
+    def test_steady_volume_is_not_flagged(self):
+        detector = VolumeAnomalyDetector(warmup_minutes=10)
+        assert feed_baseline(detector, 120) == []
+        baseline = next(b for b in detector.baselines() if b["category"] == "Bug Report" and b["urgency_score"] is None)
+        assert 2 < baseline["expected_per_minute"] < 4
+
+    def test_spike_is_flagged_while_the_minute_is_open(self):
+        VOLUME_SPIKES.clear()
+        detector = VolumeAnomalyDetector(warmup_minutes=10)
+        feed_baseline(detector, 60)
+        now = START + 60 * 60
+        flagged = []
+        for second in range(25):
+            flagged += detector.record("Bug Report", 5, now=now + second)
+
+        assert {(spike["category"], spike["urgency_score"]) for spike in flagged} == {
+            ("Bug Report", None), ("Bug Report", 5)
+        }
+        # Flagged once per series and minute; the count keeps up with later reports
+        spikes = detector.recent_spikes()
+        assert len(spikes) == 2
+        assert all(spike["count"] == 25 for spike in spikes)
+        assert all(spike["z_score"] > detector.threshold for spike in spikes)
+        assert VOLUME_SPIKES.value("Bug Report") == 2
+        # Other categories are unaffected
+        assert detector.record("Praise/Positive Feedback", 1, now=now + 30) == []
+
+    def test_nothing_is_flagged_during_warmup(self):
+        detector = VolumeAnomalyDetector(warmup_minutes=30)
+        feed_baseline(detector, 5)
+        assert [detector.record("Bug Report", 5, now=START + 5 * 60 + i) for i in range(50)][-1] == []
+
+    def test_quiet_minutes_decay_the_baseline(self):
+        detector = VolumeAnomalyDetector(warmup_minutes=0)
+        feed_baseline(detector, 30, per_minute=10)
+        detector.record("Bug Report", 3, now=START + 30 * 60 + 3600)
+        baseline = next(b for b in detector.baselines() if b["category"] == "Bug Report" and b["urgency_score"] is None)
+        assert baseline["expected_per_minute"] < 0.5
+
+
+class TestAnomaliesEndpoint:
+    @pytest.mark.asyncio
+    async def test_lists_recent_spikes(self, monkeypatch):
+        volume_detector.reset()
+        monkeypatch.setattr(volume_detector, "warmup_minutes", 0)
+        monkeypatch.setattr(volume_detector, "min_count", 3)
+        for i in range(5):
+            volume_detector.record("Feature Request", 2, now=START + i)
+
+        async with httpx.AsyncClient(app=app, base_url="http://test") as client:
+            response = await client.get("/api/dashboard/anomalies", params={"limit": 1})
+        volume_detector.reset()
+
+        data = response.json()
+        assert response.status_code == 200
+        assert data["count"] == 1
+        assert data["spikes"][0]["category"] == "Feature Request"
+        assert len(data["baselines"]) == 24
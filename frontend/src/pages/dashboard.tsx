@@ -123,15 +123,11 @@ const Dashboard: React.FC = () => {
   const loadDashboardData = async () => {
     setLoading(true);
     try {
-      // Load dashboard stats
-      const statsResponse = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/dashboard/stats?days_back=${timeRange}`);
-      const statsData = await statsResponse.json();
-      setStats(statsData);
-
-      // Load feedback history
-      const feedbackResponse = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/dashboard/feedback?limit=100`);
-      const feedbackData = await feedbackResponse.json();
-      setFeedbackHistory(feedbackData.feedback || []);
+      // Stats and the first history page in one round trip
+      const response = await fetch(`${process.env.NEXT_PUBLIC_API_URL || 'http://localhost:8000'}/api/dashboard/bootstrap?days_back=${timeRange}&limit=100`);
+      const data = await response.json();
+      setStats(data.stats);
+      setFeedbackHistory(data.feedback?.feedback || []);
     } catch (error) {
       console.error('Error loading dashboard data:', error);
     } finally {